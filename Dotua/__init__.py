@@ -1 +1,3 @@
 name="Dotua"
+
+from Dotua.derivatives import jacobian
@@ -1,5 +1,12 @@
+import numpy as np
+import scipy.sparse as sp
+from Dotua.coloring import star_coloring
+from Dotua import derivatives
+from Dotua.dual import Dual, tangent
 from Dotua.nodes.scalar import Scalar
+from Dotua.nodes.jacobian import Universe
 from Dotua.nodes.vector import Vector
+from Dotua.trace import trace, optimize, hessian_sparsity, CompiledFunction
 
 
 class AutoDiff():
@@ -13,16 +20,34 @@ class AutoDiff():
     create_vector.  This requirement allows AutoDiff to create an implicit
     variable 'universe' which facilitates the tracking of function
     derivatives in Scalar and Vector objects.
+
+    The sparse_threshold class attribute configures the size of universe
+    above which create_scalar switches to sparse jacobians in 'auto' mode.
     """
 
+    sparse_threshold = 1000
+
     @staticmethod
-    def create_scalar(vals):
+    def create_scalar(vals, mode='auto', batched=False):
         """
         Return Scalar object(s) with user defined value(s).
 
         INPUTS
         =======
         vals: a list of numeric types or a single numeric type value
+        mode: string, optional, default value is 'auto'
+              Representation of the jacobians of the Scalar objects.  'dict'
+              keys the partial derivatives by variable in a dictionary,
+              'dense' assigns each variable an integer slot in a contiguous
+              float64 gradient array and 'sparse' stores only the nonzero
+              partial derivatives.  'auto' selects 'sparse' when more than
+              AutoDiff.sparse_threshold variables are created and 'dict'
+              otherwise.
+        batched: boolean, optional, default value is False
+                 If True, vals holds a batch of input points for each
+                 variable: a one dimensional array of points for a single
+                 Scalar or a two dimensional array with one row of points
+                 per Scalar.
 
         RETURNS
         =======
@@ -38,21 +63,91 @@ class AutoDiff():
         user defined value.  Before returning these Scalar objects, this method
         solidifies the variable 'universe' by seeding the jacobians of each
         of the Scalar objects with appropriate values with respect to all
-        Scalars requested by the user.
+        Scalars requested by the user.  In 'dense' mode every arithmetic
+        operation on the returned Scalars updates the whole jacobian with a
+        single vectorized array operation, which is considerably faster than
+        rebuilding a dictionary once the universe holds more than a handful
+        of variables.  In 'sparse' mode seeding the universe costs O(n)
+        instead of O(n^2) and each operation only touches the variables an
+        expression depends on.  In batched mode the values and all of the
+        partial derivatives of the returned Scalars, and of every Scalar
+        computed from them, are arrays over the batch of points, so each
+        operation processes the whole batch with NumPy.
         """
+        if mode not in ('auto', 'dict', 'dense', 'sparse'):
+            raise ValueError("Unknown jacobian mode '{}'.".format(mode))
+        if batched:
+            return AutoDiff._create_batched_scalar(vals, mode)
         try:
             scalars = [None] * len(vals)
             for i in range(len(vals)):
                 scalars[i] = Scalar(vals[i])
-
-            # Initialize the jacobians
-            for var in scalars:
-                var.init_jacobian(scalars)
-            return scalars
         except TypeError:
             scalar = Scalar(vals)
-            scalar.init_jacobian([scalar])
+            AutoDiff._init_universe([scalar], mode)
+            return scalar
+        AutoDiff._init_universe(scalars, mode)
+        return scalars
+
+    @staticmethod
+    def _create_batched_scalar(vals, mode):
+        """
+        Return batched Scalar object(s) as requested by create_scalar.
+
+        INPUTS
+        =======
+        vals: one or two dimensional array-like of numeric types
+        mode: string, jacobian representation as accepted by create_scalar
+
+        RETURNS
+        =======
+        A Scalar instance if vals is one dimensional, otherwise a list of
+        Scalar instances, one per row of vals
+        """
+        vals = np.asarray(vals, dtype=float)
+        if vals.ndim == 1:
+            scalar = Scalar(vals)
+            AutoDiff._init_universe([scalar], mode, vals.shape)
             return scalar
+        if vals.ndim != 2:
+            raise ValueError("Batched values must be a one or two " +
+                             "dimensional array.")
+        scalars = [Scalar(row) for row in vals]
+        AutoDiff._init_universe(scalars, mode, vals.shape[1:])
+        return scalars
+
+    @staticmethod
+    def _init_universe(scalars, mode, shape=()):
+        """
+        Seed the jacobians of scalars, the variables of a single universe.
+
+        INPUTS
+        =======
+        scalars: list of Scalar objects created by one call to create_scalar
+        mode: string, jacobian representation as accepted by create_scalar
+        shape: tuple, optional, default value is ()
+               Batch shape of the values of scalars
+
+        RETURNS
+        =======
+        Nothing is returned by this method.
+        """
+        if mode == 'auto':
+            if len(scalars) > AutoDiff.sparse_threshold:
+                mode = 'sparse'
+            else:
+                mode = 'dict'
+        if mode == 'dense':
+            universe = Universe(scalars, shape)
+            for var in scalars:
+                var.init_dense_jacobian(universe)
+        elif mode == 'sparse':
+            universe = Universe(scalars, shape)
+            for var in scalars:
+                var.init_sparse_jacobian(universe)
+        else:
+            for var in scalars:
+                var.init_jacobian(scalars, shape)
 
     @staticmethod
     def create_vector(vals):
@@ -73,3 +168,138 @@ class AutoDiff():
         for i in range(len(vals)):
             vectors[i] = Vector(vals[i])
         return vectors
+
+    @staticmethod
+    def compile(fn, n_inputs):
+        """
+        Return a callable evaluating fn and its gradient in forward mode.
+
+        INPUTS
+        =======
+        fn: function of n_inputs scalar arguments composed of arithmetic
+            operators and Operator functions, returning a single value
+        n_inputs: integer, the number of arguments of fn
+
+        RETURNS
+        =======
+        compiled: CompiledFunction instance; compiled(*inputs) returns the
+                  value of fn at inputs and a NumPy array holding the partial
+                  derivatives of fn with respect to each input
+
+        NOTES
+        ======
+        fn is traced once into a flat instruction list (see Dotua.trace),
+        from which repeated subexpressions, constant subexpressions and
+        additions of 0 or multiplications by 1 are removed.  Each call of the
+        compiled function replays the instructions on plain numbers,
+        propagating a tangent vector of length n_inputs alongside each value,
+        so repeated evaluations do not build Scalar objects or jacobians.
+        Inputs may also be NumPy arrays of points, which are evaluated as a
+        batch.  fn cannot branch on the values of its arguments, since the
+        placeholders it is traced with define no comparison operators: a
+        comparison such as x > 0 raises a TypeError.  A ValueError is raised
+        if fn returns a list or tuple.
+        """
+        return CompiledFunction(optimize(trace(fn, n_inputs)), 'forward')
+
+    @staticmethod
+    def hessian(func, vars, sparse=False):
+        """
+        Return the Hessian of func at the values of vars.
+
+        INPUTS
+        =======
+        func: function of len(vars) scalar arguments composed of arithmetic
+              operators and Operator or rOperator functions
+        vars: list of Scalar variables (or numbers) at whose values the
+              Hessian is evaluated
+        sparse: bool, optional, default value is False
+                Whether to return a scipy.sparse CSR matrix instead of a
+                dense numpy array
+
+        RETURNS
+        =======
+        numpy array or scipy.sparse CSR matrix of shape (len(vars),
+        len(vars))
+
+        NOTES
+        ======
+        func is traced once (see Dotua.trace) and the structural sparsity of
+        its Hessian is read from the traced program.  The variables are
+        star colored (see Dotua.coloring) so that columns sharing a color are
+        computed together; the entries of the Hessian are then recovered by
+        symmetry, so only as many Hessian-vector products as colors are
+        needed.  All of them are obtained from a single evaluation of the
+        compiled reverse mode gradient of func on Dual numbers carrying one
+        tangent component per color.
+        """
+        vals = [getattr(var, '_val', var) for var in vars]
+        n = len(vals)
+        program = optimize(trace(func, n))
+        pattern = hessian_sparsity(program)
+        colors = star_coloring(pattern)
+        n_colors = colors.max() + 1 if n else 0
+        seed = np.zeros((n, n_colors))
+        seed[np.arange(n), colors] = 1
+        reverse = CompiledFunction(program, 'reverse')
+        _, partials = reverse._function(*[Dual(vals[i], seed[i])
+                                          for i in range(n)])
+        compressed = np.zeros((n, n_colors))
+        for i in range(n):
+            compressed[i] += tangent(partials[i])
+
+        rows, cols, entries = [], [], []
+        for i in range(n):
+            for j in pattern[i]:
+                if j < i:
+                    continue
+                # (i, j) is read from row i if j is the only column of its
+                # color in row i, and from row j otherwise
+                unique = sum(colors[k] == colors[j] for k in pattern[i]) == 1
+                if unique:
+                    entry = compressed[i, colors[j]]
+                else:
+                    entry = compressed[j, colors[i]]
+                rows.append(i)
+                cols.append(j)
+                entries.append(entry)
+                if i != j:
+                    rows.append(j)
+                    cols.append(i)
+                    entries.append(entry)
+        hessian = sp.csr_matrix((entries, (rows, cols)), shape=(n, n))
+        if sparse:
+            return hessian
+        return hessian.toarray()
+
+    @staticmethod
+    def jacobian(func, vars, sparse=False):
+        """
+        Return the Jacobian of func at the values of vars in forward mode.
+
+        INPUTS
+        =======
+        func: function of len(vars) scalar arguments composed of arithmetic
+              operators and Operator or rOperator functions, returning a list
+              of m values (or a single value)
+        vars: list of Scalar variables (or numbers) at whose values the
+              Jacobian is evaluated
+        sparse: bool, optional, default value is False
+                Whether to return a scipy.sparse CSR matrix instead of a
+                dense numpy array
+
+        RETURNS
+        =======
+        numpy array or scipy.sparse CSR matrix of shape (m, len(vars))
+
+        NOTES
+        ======
+        func is traced once (see Dotua.trace) and the sparsity pattern of its
+        Jacobian is read from the traced program.  The columns are colored
+        so that columns sharing a color never have a nonzero in the same row
+        (see Dotua.coloring), and a single forward sweep on Dual numbers
+        carrying one tangent component per color yields all the compressed
+        columns at once.  A banded Jacobian therefore costs as many tangent
+        components as its bandwidth rather than one per variable.
+        """
+        return derivatives.jacobian(func, vars, 'forward', sparse)
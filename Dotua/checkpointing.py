@@ -0,0 +1,199 @@
+"""
+Checkpointing of segments of reverse mode computations.
+
+A checkpointed segment keeps only its inputs and the values of its outputs
+on the computational graph.  Its interior nodes are dropped after the
+forward pass and recomputed, one segment at a time, when a backward pass
+reaches the segment, trading one extra evaluation of the segment for memory
+proportional to the number of segments rather than to the number of
+operations.
+"""
+from Dotua.tape import Tape
+
+
+def _is_node(x):
+    """Return whether x is a reverse mode node rather than a constant."""
+    return hasattr(x, '_children')
+
+
+def _as_list(out):
+    """Return the outputs of a segment as a list."""
+    if isinstance(out, (list, tuple)):
+        return list(out)
+    return [out]
+
+
+class _Sink():
+    """
+    Node joining the outputs of a segment, so that one Tape sweep over the
+    recomputed segment propagates the adjoints of all its outputs at once.
+    """
+
+    __slots__ = ('_children', '_grad_val', '_gen')
+
+    def __init__(self, children):
+        self._children = tuple(children)
+        self._grad_val = 1
+        self._gen = 0
+
+
+class _Adjoints(dict):
+    """Adjoints of the outputs of a segment, keyed by output position."""
+
+    def __add__(self, other):
+        # Each output has a single edge to its segment, so the keys of self
+        # and other never overlap
+        total = _Adjoints(self)
+        total.update(other)
+        return total
+
+
+class _Select():
+    """
+    Local derivative of the k-th output of a segment with respect to the
+    segment node, which files the adjoint of the output under k.
+    """
+
+    __slots__ = ('_k',)
+
+    # Make NumPy defer to the reflected multiplication of _Select
+    __array_ufunc__ = None
+
+    def __init__(self, k):
+        self._k = k
+
+    def __rmul__(self, adjoint):
+        return _Adjoints({self._k: adjoint})
+
+
+class _Input():
+    """
+    Local derivative of a segment node with respect to its i-th node input,
+    which returns the adjoint of that input from the recomputed segment.
+    """
+
+    __slots__ = ('_segment', '_i')
+
+    def __init__(self, segment, i):
+        self._segment = segment
+        self._i = i
+
+    def __rmul__(self, adjoints):
+        return self._segment._gradient(adjoints, self._i)
+
+
+class _Segment():
+    """
+    Graph node standing for a checkpointed segment.
+
+    The children of a _Segment are the node arguments of the segment, and it
+    is itself the only child of every node output of the segment.  The Tape
+    collects the adjoints of the outputs into the adjoint of the _Segment
+    (an _Adjoints), and the first of its children to be processed triggers
+    the recomputation of the segment and a single reverse sweep over it; the
+    gradients of the remaining children are served from a cache released
+    once the last one has been read.
+    """
+
+    __slots__ = ('_fn', '_args', '_children', '_grad_val', '_gen', '_cache')
+
+    def __init__(self, fn, args):
+        self._fn = fn
+        self._args = args
+        nodes = [arg for arg in args if _is_node(arg)]
+        self._children = tuple((node, _Input(self, i))
+                               for i, node in enumerate(nodes))
+        self._grad_val = 0
+        self._gen = 0
+        self._cache = None
+
+    def _run(self):
+        """
+        Evaluate the segment on fresh copies of its node arguments.
+
+        RETURNS
+        =======
+        (copies, out): the list of copies of the node arguments, which are
+                       the roots of the recomputed graph, and the value
+                       returned by the function of the segment
+        """
+        copies = []
+        inputs = []
+        for arg in self._args:
+            if _is_node(arg):
+                arg = type(arg)(arg._val)
+                arg._init_roots()
+                copies.append(arg)
+            inputs.append(arg)
+        return copies, self._fn(*inputs)
+
+    def _gradient(self, adjoints, i):
+        """
+        Return the adjoint of the i-th node argument given the adjoints of
+        the outputs of the segment, recomputing the segment once per
+        backward pass.
+        """
+        if self._cache is None or self._cache[0] is not adjoints:
+            copies, out = self._run()
+            outputs = _as_list(out)
+            sink = _Sink((outputs[k], adjoint)
+                         for k, adjoint in adjoints.items()
+                         if _is_node(outputs[k]))
+            generation = Tape(sink).backward()
+            self._cache = (adjoints, [copy._grad_val
+                                      if copy._gen == generation else 0
+                                      for copy in copies])
+        gradient = self._cache[1][i]
+        if i == len(self._children) - 1:
+            self._cache = None
+        return gradient
+
+
+def checkpoint(fn, *args):
+    """
+    Return fn(*args), recording it on the graph as a checkpointed segment.
+
+    INPUTS
+    =======
+    fn: function of the arguments args composed of arithmetic operators and
+        rOperator functions, returning an rScalar, rVector or rTensor, or a
+        list or tuple of them (and constants)
+    args: rScalar, rVector or rTensor nodes, or constants, on which fn is
+          evaluated
+
+    RETURNS
+    =======
+    the value of fn(*args), with every node output replaced by a new node of
+    the same type and value whose only child is the segment
+
+    NOTES
+    ======
+    fn is evaluated on copies of the node arguments and only the values of
+    its outputs are kept, so the intermediate nodes of fn are freed as soon
+    as checkpoint returns.  When a backward pass reaches the segment, fn is
+    evaluated again and differentiated with a reverse sweep seeded with the
+    adjoints of its outputs.  fn must be deterministic and must receive every
+    node it depends on through args; a ValueError is raised if it uses any
+    other variable, since the nested sweep would overwrite the adjoints of
+    such variables.  Constants used by fn should be plain numbers or arrays.
+    Segments may be nested.
+    """
+    segment = _Segment(fn, args)
+    copies, out = segment._run()
+    outputs = _as_list(out)
+    tape = Tape(_Sink((output, 1) for output in outputs if _is_node(output)))
+    roots = set(copies)
+    for node in tape._nodes[:-1]:
+        if not node._children and node not in roots:
+            raise ValueError("A checkpointed function used a variable that " +
+                             "was not passed to checkpoint as an argument.")
+    results = []
+    for k, output in enumerate(outputs):
+        if _is_node(output):
+            node = type(output)(output._val)
+            node._children = ((segment, _Select(k)),)
+            output = node
+        results.append(output)
+    if isinstance(out, (list, tuple)):
+        return type(out)(results)
+    return results[0]
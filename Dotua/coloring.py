@@ -0,0 +1,114 @@
+"""
+Graph colorings used to compress the computation of sparse derivative
+matrices.
+
+Structurally orthogonal columns of a sparse derivative matrix can share a
+color and be computed together from a single directional derivative, so a
+matrix with n columns needs only as many directional derivatives as colors.
+Patterns are given as a list with, for each column, the set of columns
+adjacent to it (its structural neighbours in the symmetric case).
+"""
+import numpy as np
+
+
+def _smallest_allowed(forbidden, v):
+    """Return the smallest color c with forbidden[c] != v."""
+    c = 0
+    while forbidden[c] == v:
+        c += 1
+    return c
+
+
+def star_coloring(pattern):
+    """
+    Return a star coloring of the adjacency graph of a symmetric pattern.
+
+    INPUTS
+    =======
+    pattern: list of sets, pattern[i] holding the indices j != i (entries
+             equal to i are ignored) such that entry (i, j) of a symmetric
+             matrix may be nonzero
+
+    RETURNS
+    =======
+    numpy integer array holding the color, from 0, of each vertex
+
+    NOTES
+    ======
+    Adjacent vertices receive different colors and every path on four
+    vertices uses at least three colors.  Every off-diagonal entry (i, j) of
+    the matrix can then be recovered either from row i of the compressed
+    column of the color of j or from row j of the compressed column of the
+    color of i, which usually needs far fewer colors than requiring every
+    column to be recovered on its own.  The greedy algorithm of Gebremedhin,
+    Manne and Pothen (SIAM Review, 2005) is used, visiting vertices in order.
+    """
+    n = len(pattern)
+    adjacency = [[w for w in pattern[v] if w != v] for v in range(n)]
+    color = [-1] * n
+    forbidden = [-1] * (n + 1)
+    for v in range(n):
+        for w in adjacency[v]:
+            if color[w] != -1:
+                forbidden[color[w]] = v
+        for w in adjacency[v]:
+            for x in adjacency[w]:
+                if x == v or color[x] == -1:
+                    continue
+                if color[w] == -1:
+                    forbidden[color[x]] = v
+                    continue
+                for y in adjacency[x]:
+                    if y != w and color[y] == color[w]:
+                        forbidden[color[x]] = v
+                        break
+        color[v] = _smallest_allowed(forbidden, v)
+    return np.array(color, dtype=int)
+
+
+def transpose(rows, n):
+    """
+    Return the pattern of the transpose of the matrix with n columns whose
+    rows have the structurally nonzero columns rows.
+    """
+    columns = [set() for _ in range(n)]
+    for i, row in enumerate(rows):
+        for j in row:
+            columns[j].add(i)
+    return columns
+
+
+def column_coloring(rows, n):
+    """
+    Return a coloring of the columns of a sparse matrix such that no two
+    columns of the same color have a nonzero entry in the same row.
+
+    INPUTS
+    =======
+    rows: list of sets, rows[i] holding the column indices of the
+          structurally nonzero entries of row i
+    n: integer, the number of columns
+
+    RETURNS
+    =======
+    numpy integer array holding the color, from 0, of each column
+
+    NOTES
+    ======
+    Columns of the same color are structurally orthogonal, so every nonzero
+    entry (i, j) can be read directly from row i of the compressed column
+    of the color of j.  Columns are colored greedily in order with the
+    smallest color not used by a column sharing a row with them.  Coloring
+    the rows of a matrix is the same problem on its transpose.
+    """
+    columns = transpose(rows, n)
+    color = [-1] * n
+    forbidden = [-1] * (n + 1)
+    for j in range(n):
+        for i in columns[j]:
+            for k in rows[i]:
+                if color[k] != -1:
+                    forbidden[color[k]] = j
+        color[j] = _smallest_allowed(forbidden, j)
+    return np.array(color, dtype=int)
+
@@ -0,0 +1,148 @@
+"""
+Mode independent entry points for computing derivatives of traced functions.
+
+The functions of this module trace a function once (see Dotua.trace) and then
+decide how to differentiate it from the traced program, so users do not need
+to choose between the forward mode of AutoDiff and the reverse mode of
+rAutoDiff themselves.
+"""
+import numpy as np
+import scipy.sparse as sp
+from Dotua.coloring import column_coloring, transpose
+from Dotua.dual import Dual, tangent
+from Dotua.trace import (trace, optimize, outputs, evaluate, pullback,
+                         jacobian_sparsity)
+
+
+def _n_colors(colors):
+    """Return the number of colors used by colors."""
+    return colors.max() + 1 if len(colors) else 0
+
+
+def _forward(program, vals, rows, colors):
+    """
+    Return the Jacobian entries of program at vals, as (row, column, value)
+    lists, from one forward sweep compressed with the column coloring colors.
+    """
+    n_colors = _n_colors(colors)
+    seed = np.zeros((len(vals), n_colors))
+    seed[np.arange(len(vals)), colors] = 1
+    values = evaluate(program, [Dual(vals[j], seed[j])
+                                for j in range(len(vals))])
+    indices, cols, entries = [], [], []
+    for i, o in enumerate(outputs(program)):
+        compressed = np.zeros(n_colors) + tangent(values[o])
+        for j in rows[i]:
+            indices.append(i)
+            cols.append(j)
+            entries.append(compressed[colors[j]])
+    return indices, cols, entries
+
+
+def _reverse(program, vals, rows, colors):
+    """
+    Return the Jacobian entries of program at vals, as (row, column, value)
+    lists, from one reverse sweep compressed with the row coloring colors.
+    """
+    n_colors = _n_colors(colors)
+    seeds = [(o, np.eye(n_colors)[colors[i]])
+             for i, o in enumerate(outputs(program))]
+    adjoints = pullback(program, evaluate(program, vals), seeds)
+    compressed = [np.zeros(n_colors) + (0 if a is None else a)
+                  for a in adjoints]
+    indices, cols, entries = [], [], []
+    for i, row in enumerate(rows):
+        for j in row:
+            indices.append(i)
+            cols.append(j)
+            entries.append(compressed[j][colors[i]])
+    return indices, cols, entries
+
+
+def select_mode(rows, n):
+    """
+    Return the cheaper differentiation mode for a Jacobian pattern.
+
+    INPUTS
+    =======
+    rows: list of sets, the structurally nonzero columns of each row of the
+          Jacobian, as returned by Dotua.trace.jacobian_sparsity
+    n: integer, the number of columns (inputs)
+
+    RETURNS
+    =======
+    (mode, colors): mode is 'forward' or 'reverse' and colors is the column
+                    or row coloring that mode uses
+
+    NOTES
+    ======
+    The forward sweep costs one tangent component per column color and the
+    reverse sweep one adjoint component per row color.  Both sweeps cost
+    about the same per component, so the mode needing fewer colors is
+    selected.  On a tie the sweeps differ by their overhead, which forward
+    mode pays for each of the n seeded inputs and reverse mode for each of
+    the len(rows) seeded outputs, so reverse mode is selected when there are
+    fewer outputs than inputs and forward mode otherwise.
+    """
+    forward = column_coloring(rows, n)
+    reverse = column_coloring(transpose(rows, n), len(rows))
+    n_forward, n_reverse = _n_colors(forward), _n_colors(reverse)
+    if n_forward < n_reverse or (n_forward == n_reverse and len(rows) >= n):
+        return 'forward', forward
+    return 'reverse', reverse
+
+
+def jacobian(fn, x, mode='auto', sparse=False):
+    """
+    Return the Jacobian of fn at x.
+
+    INPUTS
+    =======
+    fn: function of len(x) scalar arguments composed of arithmetic operators
+        and Operator or rOperator functions, returning a list of m values
+        (or a single value)
+    x: list of numbers (or Scalar or rScalar variables) at which the
+       Jacobian is evaluated
+    mode: string, optional, default value is 'auto'
+          'forward', 'reverse', or 'auto' to select the cheaper of the two
+          from the traced program
+    sparse: bool, optional, default value is False
+            Whether to return a scipy.sparse CSR matrix instead of a dense
+            numpy array
+
+    RETURNS
+    =======
+    numpy array or scipy.sparse CSR matrix of shape (m, len(x))
+
+    NOTES
+    ======
+    fn is traced once and its sparsity pattern is read from the traced
+    program.  Forward mode colors the columns and computes all compressed
+    columns in one sweep on Dual numbers; reverse mode colors the rows and
+    computes all compressed rows in one reverse sweep.  With mode='auto' the
+    mode needing fewer colors is used (see select_mode): reverse mode for
+    gradients of scalar functions, forward mode for functions of a few
+    inputs, and whichever compresses better for sparse Jacobians; ties go
+    to reverse mode if fn has fewer outputs than inputs.
+    """
+    if mode not in ('auto', 'forward', 'reverse'):
+        raise ValueError("Unknown differentiation mode '{}'.".format(mode))
+    vals = [getattr(var, '_val', var) for var in x]
+    n = len(vals)
+    program = optimize(trace(fn, n))
+    rows = jacobian_sparsity(program)
+    if mode == 'auto':
+        mode, colors = select_mode(rows, n)
+    elif mode == 'forward':
+        colors = column_coloring(rows, n)
+    else:
+        colors = column_coloring(transpose(rows, n), len(rows))
+    if mode == 'forward':
+        entries = _forward(program, vals, rows, colors)
+    else:
+        entries = _reverse(program, vals, rows, colors)
+    indices, cols, entries = entries
+    matrix = sp.csr_matrix((entries, (indices, cols)), shape=(len(rows), n))
+    if sparse:
+        return matrix
+    return matrix.toarray()
@@ -0,0 +1,131 @@
+import numpy as np
+from scipy.special import expit
+from Dotua.elementary import ELEMENTARY
+
+
+# Derivatives of the NumPy ufuncs supported by Dual, as functions of the
+# real part of their argument.  They are taken from the table of elementary
+# functions so that every mode differentiates them the same way; log, whose
+# value in the table is not a ufunc, is evaluated by Dual through np.log.
+_UNARY = {value: derivative for value, derivative in ELEMENTARY.values()
+          if isinstance(value, np.ufunc)}
+_UNARY[np.log] = ELEMENTARY['log'][1]
+_UNARY[np.negative] = lambda x: -1
+
+# Binary NumPy ufuncs, evaluated through the operators of Dual
+_BINARY = {
+    np.add: lambda a, b: a + b,
+    np.subtract: lambda a, b: a - b,
+    np.multiply: lambda a, b: a * b,
+    np.true_divide: lambda a, b: a / b,
+    np.power: lambda a, b: a ** b,
+    np.logaddexp: lambda a, b: Dual(np.logaddexp(a._real, b._real),
+                                    a._tangent * expit(a._real - b._real) +
+                                    b._tangent * expit(b._real - a._real)),
+}
+
+
+def _lift(x):
+    """Return x as a Dual, with a zero tangent if x is a constant."""
+    if isinstance(x, Dual):
+        return x
+    return Dual(x, 0)
+
+
+def tangent(x):
+    """Return the tangent of x, which is 0 if x is not a Dual."""
+    if isinstance(x, Dual):
+        return x._tangent
+    return 0
+
+
+class Dual():
+    """
+    Dual number carrying a value and its directional derivative.
+
+    A Dual holds a real part (a number or NumPy array) and a tangent, the
+    derivative of the real part along a fixed direction in input space.
+    Arithmetic operators and the NumPy ufuncs behind the elementary functions
+    of Dotua.elementary propagate both parts, so using Duals as the values of
+    rScalar objects differentiates the whole reverse sweep, local
+    derivatives included, along that direction (forward-over-reverse).  The
+    attributes are deliberately not named _val so that a Dual is never
+    mistaken for a node by the operators of rScalar.
+    """
+
+    __slots__ = ('_real', '_tangent')
+
+    def __init__(self, real, tangent):
+        """
+        Return the Dual number real + tangent * eps.
+
+        INPUTS
+        =======
+        real: numeric type or NumPy array, the value
+        tangent: numeric type or NumPy array, the directional derivative of
+                 the value
+        """
+        self._real = real
+        self._tangent = tangent
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """Apply the NumPy ufunc to Dual inputs, propagating tangents."""
+        if method != '__call__' or kwargs:
+            return NotImplemented
+        if ufunc in _BINARY:
+            return _BINARY[ufunc](*[_lift(x) for x in inputs])
+        if ufunc in _UNARY:
+            x, = inputs
+            return Dual(ufunc(x._real), _UNARY[ufunc](x._real) * x._tangent)
+        return NotImplemented
+
+    def __repr__(self):
+        return 'Dual({}, {})'.format(self._real, self._tangent)
+
+    def __add__(self, other):
+        other = _lift(other)
+        return Dual(self._real + other._real, self._tangent + other._tangent)
+
+    def __radd__(self, other):
+        return self + other
+
+    def __sub__(self, other):
+        other = _lift(other)
+        return Dual(self._real - other._real, self._tangent - other._tangent)
+
+    def __rsub__(self, other):
+        return _lift(other) - self
+
+    def __mul__(self, other):
+        other = _lift(other)
+        return Dual(self._real * other._real,
+                    self._tangent * other._real + self._real * other._tangent)
+
+    def __rmul__(self, other):
+        return self * other
+
+    def __truediv__(self, other):
+        other = _lift(other)
+        return Dual(self._real / other._real,
+                    (self._tangent * other._real -
+                     self._real * other._tangent) / other._real ** 2)
+
+    def __rtruediv__(self, other):
+        return _lift(other) / self
+
+    def __pow__(self, other):
+        if not isinstance(other, Dual):
+            return Dual(self._real ** other,
+                        other * self._real ** (other - 1) * self._tangent)
+        real = self._real ** other._real
+        return Dual(real,
+                    other._real * self._real ** (other._real - 1) *
+                    self._tangent +
+                    real * np.log(self._real) * other._tangent)
+
+    def __rpow__(self, other):
+        real = other ** self._real
+        return Dual(real, real * np.log(other) * self._tangent)
+
+    def __neg__(self):
+        return Dual(-self._real, -self._tangent)
@@ -0,0 +1,72 @@
+"""
+Table of the elementary functions supported by Operator and rOperator.
+
+Each elementary function is declared exactly once as a pair (value,
+derivative) of functions acting on raw numeric values (numbers or NumPy
+arrays).  Operator and rOperator look the pair up by name and leave it to
+their node type registries to wrap the results in the appropriate forward or
+reverse mode node, so adding an elementary function only requires adding an
+entry to this table and a thin method to each operator class.  Extra
+arguments, such as the base of log, are passed to both functions.
+"""
+import math
+import numpy as np
+from scipy.special import expit
+
+
+def _log(x, base=np.exp(1)):
+    return np.log(x) / np.log(base)
+
+
+def _log_derivative(x, base=np.exp(1)):
+    return 1 / (x * math.log(base))
+
+
+def _sigmoid_derivative(x):
+    s = expit(x)
+    return s * (1 - s)
+
+
+def _softplus(x):
+    return np.logaddexp(0, x)
+
+
+def _logsumexp(x, axis=None, keepdims=False):
+    """
+    Return the log of the sum of the exponentials of the entries of x along
+    axis, shifted by their maximum so that no exponential overflows.
+    """
+    shift = np.max(x, axis=axis, keepdims=True)
+    total = shift + np.log(np.sum(np.exp(x - shift), axis=axis,
+                                  keepdims=True))
+    return total if keepdims else np.squeeze(total, axis=axis)
+
+
+def _softmax(x, axis=None):
+    """Return the derivative of _logsumexp at x, the softmax of x."""
+    e = np.exp(x - np.max(x, axis=axis, keepdims=True))
+    return e / np.sum(e, axis=axis, keepdims=True)
+
+
+# The fused activations sigmoid and softplus are computed by a single
+# stable NumPy ufunc (scipy.special.expit and numpy.logaddexp) rather than
+# composed from exp, addition and division, so they never overflow and
+# record a single node.
+ELEMENTARY = {
+    'sin': (np.sin, np.cos),
+    'cos': (np.cos, lambda x: -np.sin(x)),
+    'tan': (np.tan, lambda x: 1/np.cos(x)**2),
+    'arcsin': (np.arcsin, lambda x: (1-x**2)**-0.5),
+    'arccos': (np.arccos, lambda x: -(1-x**2)**-0.5),
+    'arctan': (np.arctan, lambda x: 1/(1+x**2)),
+    'sinh': (np.sinh, np.cosh),
+    'cosh': (np.cosh, np.sinh),
+    'tanh': (np.tanh, lambda x: 1-np.tanh(x)**2),
+    'arcsinh': (np.arcsinh, lambda x: (x**2+1)**-0.5),
+    'arccosh': (np.arccosh, lambda x: (x**2-1)**-0.5),
+    'arctanh': (np.arctanh, lambda x: 1/(1-x**2)),
+    'exp': (np.exp, np.exp),
+    'log': (_log, _log_derivative),
+    'sigmoid': (expit, _sigmoid_derivative),
+    'softplus': (_softplus, expit),
+}
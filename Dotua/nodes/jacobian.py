@@ -0,0 +1,390 @@
+import numpy as np
+import scipy.sparse as sp
+
+
+class Universe():
+    """
+    Assign integer slots to the variables of a single variable 'universe'.
+
+    A Universe is created by AutoDiff.create_scalar for all of the Scalar
+    objects requested by one call.  Array backed jacobians index their
+    gradient vectors with the slots stored here, so every jacobian in the
+    same universe shares one layout.
+    """
+
+    def __init__(self, nodes, shape=()):
+        """
+        Return a Universe whose slots follow the order of nodes.
+
+        INPUTS
+        =======
+        nodes: list of Scalar objects, created by the same call to
+               AutoDiff.create_scalar
+        shape: tuple, optional, default value is ()
+               Batch shape of the values of the Scalar objects; every
+               partial derivative stored for this universe has this shape
+
+        RETURNS
+        =======
+        Universe class instance
+        """
+        self._nodes = list(nodes)
+        self._slots = {node: i for i, node in enumerate(self._nodes)}
+        self._shape = tuple(shape)
+
+    def __len__(self):
+        """Return the number of variables in the universe."""
+        return len(self._nodes)
+
+    def slot(self, node):
+        """Return the integer slot of node, raising KeyError if absent."""
+        return self._slots[node]
+
+
+def _check_universe(jacobian, other):
+    """
+    Raise a ValueError unless jacobian and other share a Universe.
+
+    DictJacobian objects have no Universe and only match each other, so a
+    DictJacobian combined with an array backed jacobian raises as well.
+    """
+    if (getattr(jacobian, '_universe', None) is not
+            getattr(other, '_universe', None)):
+        raise ValueError("User attempted to combine Scalar variables " +
+                         "created by separate calls to create_scalar.")
+
+
+class DictJacobian(dict):
+    """
+    Dictionary representation of the jacobian of a Scalar object.
+
+    Keys are the Scalar variables of the 'universe' and values are the
+    partial derivatives with respect to them.  This is the historical
+    representation of Scalar jacobians; the scale and combine methods give it
+    the same arithmetic interface as the array backed representations.
+    """
+
+    def scale(self, a):
+        """Return the jacobian a * self."""
+        return DictJacobian({k: v * a for k, v in self.items()})
+
+    def combine(self, a, other, b):
+        """Return the jacobian a * self + b * other."""
+        _check_universe(self, other)
+        return DictJacobian({k: v * a + other[k] * b
+                             for k, v in self.items()})
+
+
+class DenseJacobian():
+    """
+    Contiguous float64 array representation of the jacobian of a Scalar.
+
+    The partial derivative with respect to a variable is stored at the slot
+    the variable was assigned by its Universe.  Arithmetic on Scalar objects
+    therefore reduces to a single vectorized axpy on the gradient arrays
+    instead of rebuilding a dictionary.  DenseJacobian supports the read-only
+    part of the dictionary interface (keys, values, items, indexing) so that
+    code written against DictJacobian keeps working.
+    """
+
+    def __init__(self, universe, grad):
+        """
+        Return a DenseJacobian over universe with gradient array grad.
+
+        INPUTS
+        =======
+        universe: Universe instance shared by all jacobians it is combined
+                  with
+        grad: numpy float64 array with one entry per slot of universe (one
+              row per slot for batched universes)
+        """
+        self._universe = universe
+        self._grad = grad
+
+    @classmethod
+    def seed(cls, universe, node):
+        """Return the jacobian of the variable node with respect to universe."""
+        grad = np.zeros((len(universe),) + universe._shape)
+        grad[universe.slot(node)] = 1
+        return cls(universe, grad)
+
+    def __getitem__(self, var):
+        return self._grad[self._universe.slot(var)]
+
+    def __len__(self):
+        return len(self._universe)
+
+    def __iter__(self):
+        return iter(self._universe._nodes)
+
+    def __contains__(self, var):
+        return var in self._universe._slots
+
+    def keys(self):
+        return list(self._universe._nodes)
+
+    def values(self):
+        return list(self._grad)
+
+    def items(self):
+        return list(zip(self._universe._nodes, self._grad))
+
+    def scale(self, a):
+        """Return the jacobian a * self."""
+        return DenseJacobian(self._universe, self._grad * a)
+
+    def combine(self, a, other, b):
+        """Return the jacobian a * self + b * other."""
+        _check_universe(self, other)
+        return DenseJacobian(self._universe,
+                             self._grad * a + other._grad * b)
+
+
+class SparseJacobian():
+    """
+    Sparse representation of the jacobian of a Scalar.
+
+    Only the structurally nonzero partial derivatives are stored, as a sorted
+    array of Universe slots and a matching array of values.  Variables
+    without a stored entry have a partial derivative of 0.  This keeps the
+    cost of seeding a universe of n variables at O(n) rather than O(n^2) and
+    lets each operation touch only the variables an expression actually
+    depends on.
+    """
+
+    def __init__(self, universe, index, vals):
+        """
+        Return a SparseJacobian over universe.
+
+        INPUTS
+        =======
+        universe: Universe instance shared by all jacobians it is combined
+                  with
+        index: sorted numpy integer array of the slots with stored entries
+        vals: numpy float64 array of the partial derivatives at index
+        """
+        self._universe = universe
+        self._index = index
+        self._vals = vals
+
+    @classmethod
+    def seed(cls, universe, node):
+        """Return the jacobian of the variable node with respect to universe."""
+        return cls(universe, np.array([universe.slot(node)]),
+                   np.ones((1,) + universe._shape))
+
+    def __getitem__(self, var):
+        slot = self._universe.slot(var)
+        pos = np.searchsorted(self._index, slot)
+        if pos < len(self._index) and self._index[pos] == slot:
+            return self._vals[pos]
+        if self._universe._shape:
+            return np.zeros(self._universe._shape)
+        return 0
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __contains__(self, var):
+        return var in self._universe._slots
+
+    def keys(self):
+        nodes = self._universe._nodes
+        return [nodes[slot] for slot in self._index]
+
+    def values(self):
+        return list(self._vals)
+
+    def items(self):
+        return list(zip(self.keys(), self._vals))
+
+    def scale(self, a):
+        """Return the jacobian a * self."""
+        return SparseJacobian(self._universe, self._index, self._vals * a)
+
+    def combine(self, a, other, b):
+        """
+        Return the jacobian a * self + b * other.
+
+        NOTES
+        ======
+        The stored slots of both operands are merged in sorted order; slots
+        present in only one operand contribute only that operand's term.
+        """
+        _check_universe(self, other)
+        if (self._index is other._index or
+                np.array_equal(self._index, other._index)):
+            return SparseJacobian(self._universe, self._index,
+                                  self._vals * a + other._vals * b)
+        index = np.union1d(self._index, other._index)
+        vals = np.zeros((len(index),) + self._universe._shape)
+        vals[np.searchsorted(index, self._index)] = self._vals * a
+        vals[np.searchsorted(index, other._index)] += other._vals * b
+        return SparseJacobian(self._universe, index, vals)
+
+
+class DiagonalJacobian():
+    """
+    Diagonal representation of the jacobian of a Vector.
+
+    Elementwise operations on Vector objects only ever produce diagonal
+    jacobians with respect to the input Vectors, so storing the diagonal
+    alone keeps the memory of a jacobian at O(n) and every operation at O(n).
+    The Vector jacobian types (DiagonalJacobian, CSRJacobian and
+    MatrixJacobian) share the scale and combine methods of the Scalar
+    jacobian types; combining two of them returns the most specialized type
+    able to hold the result.  Their premultiply method applies a matrix on
+    the left, as needed by matrix-vector products and reductions; a
+    scipy.sparse matrix keeps a DiagonalJacobian or CSRJacobian sparse as a
+    CSRJacobian, and any other product is a MatrixJacobian.
+    """
+
+    def __init__(self, diag):
+        """
+        Return a DiagonalJacobian with diagonal diag.
+
+        INPUTS
+        =======
+        diag: numpy array, the partial derivatives of each element of a
+              Vector with respect to the matching element of an input Vector
+        """
+        self._diag = diag
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.toarray(), dtype=dtype)
+
+    def toarray(self):
+        """Return the jacobian as a dense numpy array."""
+        return np.diag(self._diag)
+
+    def tocsr(self):
+        """Return the jacobian as a scipy.sparse CSR matrix."""
+        return sp.diags(self._diag, format='csr')
+
+    def sum(self, axis=None):
+        """Return the sum of the entries of the jacobian along axis."""
+        if axis is None:
+            return self._diag.sum()
+        return np.array(self._diag)
+
+    def scale(self, a):
+        """Return the jacobian diag(a) @ self, a being a scalar or array."""
+        return DiagonalJacobian(self._diag * a)
+
+    def premultiply(self, a):
+        """Return the jacobian a @ self for a two dimensional matrix a."""
+        if sp.issparse(a):
+            return CSRJacobian(a @ sp.diags(self._diag))
+        return MatrixJacobian(a * self._diag)
+
+    def combine(self, a, other, b):
+        """Return the jacobian diag(a) @ self + diag(b) @ other."""
+        if isinstance(other, DiagonalJacobian):
+            return DiagonalJacobian(self._diag * a + other._diag * b)
+        return other.combine(b, self, a)
+
+
+class CSRJacobian():
+    """
+    Sparse representation of the jacobian of a Vector.
+
+    The jacobian is stored as a scipy.sparse CSR matrix, which holds
+    jacobians that are no longer diagonal but remain structurally sparse in
+    memory proportional to their number of nonzero entries.
+    """
+
+    def __init__(self, matrix):
+        """
+        Return a CSRJacobian wrapping matrix.
+
+        INPUTS
+        =======
+        matrix: scipy.sparse matrix, converted to CSR format if necessary
+        """
+        self._matrix = sp.csr_matrix(matrix)
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self.toarray(), dtype=dtype)
+
+    def toarray(self):
+        """Return the jacobian as a dense numpy array."""
+        return self._matrix.toarray()
+
+    def tocsr(self):
+        """Return the jacobian as a scipy.sparse CSR matrix."""
+        return self._matrix
+
+    def sum(self, axis=None):
+        """Return the sum of the entries of the jacobian along axis."""
+        if axis is None:
+            return self._matrix.sum()
+        return np.asarray(self._matrix.sum(axis=axis)).ravel()
+
+    def scale(self, a):
+        """Return the jacobian diag(a) @ self, a being a scalar or array."""
+        if np.ndim(a) == 0:
+            return CSRJacobian(self._matrix * a)
+        return CSRJacobian(sp.diags(a) @ self._matrix)
+
+    def premultiply(self, a):
+        """Return the jacobian a @ self for a two dimensional matrix a."""
+        if sp.issparse(a):
+            return CSRJacobian(a @ self._matrix)
+        return MatrixJacobian((self._matrix.T @ a.T).T)
+
+    def combine(self, a, other, b):
+        """Return the jacobian diag(a) @ self + diag(b) @ other."""
+        if isinstance(other, MatrixJacobian):
+            return other.combine(b, self, a)
+        return CSRJacobian(self.scale(a)._matrix + other.scale(b).tocsr())
+
+
+class MatrixJacobian():
+    """
+    Dense representation of the jacobian of a Vector.
+
+    The jacobian is stored as a two dimensional numpy array.  This is the
+    most general representation and the result of combining a dense jacobian
+    with any other Vector jacobian.
+    """
+
+    def __init__(self, matrix):
+        """
+        Return a MatrixJacobian wrapping matrix.
+
+        INPUTS
+        =======
+        matrix: two dimensional numpy array
+        """
+        self._matrix = np.asarray(matrix)
+
+    def __array__(self, dtype=None, copy=None):
+        return np.asarray(self._matrix, dtype=dtype)
+
+    def toarray(self):
+        """Return the jacobian as a dense numpy array."""
+        return self._matrix
+
+    def tocsr(self):
+        """Return the jacobian as a scipy.sparse CSR matrix."""
+        return sp.csr_matrix(self._matrix)
+
+    def sum(self, axis=None):
+        """Return the sum of the entries of the jacobian along axis."""
+        return self._matrix.sum(axis=axis)
+
+    def scale(self, a):
+        """Return the jacobian diag(a) @ self, a being a scalar or array."""
+        return MatrixJacobian(self._matrix * np.reshape(a, (-1, 1)))
+
+    def premultiply(self, a):
+        """Return the dense jacobian a @ self for a matrix a."""
+        return MatrixJacobian(a @ self._matrix)
+
+    def combine(self, a, other, b):
+        """Return the jacobian diag(a) @ self + diag(b) @ other."""
+        return MatrixJacobian(self.scale(a)._matrix +
+                              other.scale(b).toarray())
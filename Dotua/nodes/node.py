@@ -9,6 +9,10 @@ class Node():
     documentation).
     """
 
+    # Subclasses declare their attributes in __slots__, so Node must not
+    # add a per-instance __dict__.
+    __slots__ = ()
+
     def eval(self):
         raise NotImplementedError
 
@@ -1,4 +1,6 @@
 import numpy as np
+from Dotua.tape import Tape
+from Dotua.nodes.rtensor import rTensor
 
 
 class rScalar():
@@ -6,14 +8,16 @@ class rScalar():
     Allow user defined variables capable of reverse audotmatic differentiation.
 
     rScalar objects have a single user defined value and 'private' class
-    variables parents and grad_val corresponding to functions defined using
-    the given rScalar and the current gradient value of the rScalar
-    respectively.  The parents of rScalar are defined via operator
-    overloading.  Each time the user crreates functions using rScalar
+    variables _children and _grad_val corresponding to the rScalar objects
+    used to compute the given rScalar and the current gradient value of the
+    rScalar respectively.  The children of rScalar are defined via operator
+    overloading.  Each time the user creates functions using rScalar
     variables, at least one new rScalar object is created and assigned as the
     parent of the rScalar objects used to create it.
     """
 
+    __slots__ = ('_val', '_children', '_grad_val', '_gen')
+
     def __init__(self, val):
         """
         Return an rScalar object with user specified value.
@@ -29,19 +33,21 @@ class rScalar():
         NOTES
         ======
         The val class variable is user defined during initialization.  It can
-        be accessed directly but it should never be modified.  The parents and
-        grad_val class variables are meant to be 'private' and should never be
-        accessed or modified directly by users.  Additionally, note that
-        parents is a list of tuples (par, val) where par is an rScalar
-        instance and val is the derivative of the rScalar par with respect
-        to the rScalar self.
+        be accessed directly but it should never be modified.  The _children
+        and _grad_val class variables are meant to be 'private' and should
+        never be accessed or modified directly by users.  Additionally, note
+        that _children is a tuple of pairs (child, val) where child is an
+        rScalar instance used to compute self and val is the derivative of
+        self with respect to child.
         """
         self._val = val
-        self._roots = {}  # keys are input rScalars, vals are lists intemediary rScalars
+        self._children = ()  # tuple of (child, local derivative) pairs
         self._grad_val = 0
+        self._gen = 0  # generation of the last backward pass to set _grad_val
 
     def _init_roots(self):
-        self._roots[self] = [(None, 1)]
+        """Mark self as an input variable (a root of the graph)."""
+        self._children = ()
 
     def eval(self):
         """
@@ -67,39 +73,33 @@ class rScalar():
 
     def gradient(self, input_var):
         """
-        Return the derivative of some function with respect to this rScalar.
+        Return the derivative of the function self with respect to input_var.
 
         INPUTS
         =======
-        self: rScalar class instance
+        self: rScalar class instance, the function being differentiated
+        input_var: rScalar class instance on which self is defined
 
         RETURNS
         =======
-        self.grad_val: numeric type value repesenting the derivative of a
-                       function with respect to this rScalar variable
+        input_var._grad_val: numeric type value repesenting the derivative of
+                             the function self with respect to input_var
 
         NOTES
         ======
-        This function is called by rAutoDiff.partial which dictates which
-        function's derivative is being calculated with respect to the
-        variable represented by the rScalar self.  This method calculates the
-        necessary derivative using reverse automatic differentiation by
-        recursively finding the derivative of the specified function with
-        respect to the given rScalar by defining this derivative in terms of
-        the rScalar objects that represent 'intermediary functions' in the
-        implicit computational graph that are defined using the rScalar self.
+        The _grad_val of self must be seeded before calling this method.  The
+        computational graph on which self depends is recorded on a Tape and a
+        single reverse sweep over the tape sets the _grad_val of every node in
+        the graph, including input_var, to the derivative of self with
+        respect to that node.
         """
-        try:
-            for child, val in self._roots[input_var]:
-                if child is not None:
-                    if child._grad_val == 0:
-                        child._grad_val += self._grad_val * val
-                    child.gradient(input_var)
-
-        except KeyError:
+        tape = Tape(self)
+        if input_var not in tape:
             raise ValueError("User attempted to differentiate a function " +
                              "respect to a variable on which it is not " +
                              "defined.")
+        tape.backward()
+        return input_var._grad_val
 
     def __add__(self, other):
         """
@@ -119,28 +119,22 @@ class rScalar():
         ======
         The rScalar object that is returned by this method is assigned as the
         parent of the rScalar self (and of other if other is an rScalar
-        instance).  Specifically, this relationship is stored as a tuple
-        (par, val) where par is the new_parent rScalar instance and val is
-        the derivative of new_parent with respect to its child rScalar object.
+        instance).  Specifically, this relationship is stored in the _children
+        attribute of the new parent as a tuple (child, val) where val is the
+        derivative of the new parent with respect to its child rScalar object.
         Storing relationships in this way facilitates the computation of
         gradients through reverse automatic differentiation.
         """
+        if isinstance(other, rTensor):
+            # Let rTensor reduce the derivative over the broadcast axes
+            return NotImplemented
         new_child = rScalar(self._val)
         try:
-            new_child._val += other._val
-            # For each input variable on which self is defined
-            new_child._roots = {input_var: [(self, 1)]
-                                for input_var in self._roots.keys()}
-
-            for input_var in other._roots.keys():
-                try:
-                    new_child._roots[input_var] += [(other, 1)]
-                except KeyError:
-                    new_child._roots[input_var] = [(other, 1)]
+            new_child._val = self._val + other._val
+            new_child._children = ((self, 1), (other, 1))
         except AttributeError:
-            new_child._val += other
-            new_child._roots = {input_var: [(self, 1)]
-                                for input_var in self._roots.keys()}
+            new_child._val = self._val + other
+            new_child._children = ((self, 1),)
         return new_child
 
     def __radd__(self, other):
@@ -173,28 +167,22 @@ class rScalar():
         ======
         The rScalar object that is returned by this method is assigned as the
         parent of the rScalar self (and of other if other is an rScalar
-        instance).  Specifically, this relationship is stored as a tuple
-        (par, val) where par is the new_parent rScalar instance and val is
-        the derivative of new_parent with respect to its child rScalar object.
+        instance).  Specifically, this relationship is stored in the _children
+        attribute of the new parent as a tuple (child, val) where val is the
+        derivative of the new parent with respect to its child rScalar object.
         Storing relationships in this way facilitates the computation of
         gradients through reverse automatic differentiation.
         """
+        if isinstance(other, rTensor):
+            # Let rTensor reduce the derivative over the broadcast axes
+            return NotImplemented
         new_child = rScalar(self._val)
         try:
-            new_child._val *= other._val
-            # For each input variable on which self is defined
-            new_child._roots = {input_var: [(self, other._val)]
-                                for input_var in self._roots.keys()}
-
-            for input_var in other._roots.keys():
-                try:
-                    new_child._roots[input_var] += [(other, self._val)]
-                except KeyError:
-                    new_child._roots[input_var] = [(other, self._val)]
+            new_child._val = self._val * other._val
+            new_child._children = ((self, other._val), (other, self._val))
         except AttributeError:
-            new_child._val *= other
-            new_child._roots = {input_var: [(self, other)]
-                                for input_var in self._roots.keys()}
+            new_child._val = self._val * other
+            new_child._children = ((self, other),)
         return new_child
 
     def __rmul__(self, other):
@@ -219,30 +207,23 @@ class rScalar():
         ======
         The rScalar object that is returned by this method is assigned as the
         parent of the rScalar self (and of other if other is an rScalar
-        instance).  Specifically, this relationship is stored as a tuple
-        (par, val) where par is the new_parent rScalar instance and val is
-        the derivative of new_parent with respect to its child rScalar object.
+        instance).  Specifically, this relationship is stored in the _children
+        attribute of the new parent as a tuple (child, val) where val is the
+        derivative of the new parent with respect to its child rScalar object.
         Storing relationships in this way facilitates the computation of
         gradients through reverse automatic differentiation.
         """
+        if isinstance(other, rTensor):
+            # Let rTensor reduce the derivative over the broadcast axes
+            return NotImplemented
         new_child = rScalar(self._val)
         try:
-            new_child._val /= other._val
-            # For each input variable on which self is defined
-            new_child._roots = {input_var: [(self, 1 / other._val)]
-                                for input_var in self._roots.keys()}
-
-            for input_var in other._roots.keys():
-                try:
-                    new_child._roots[input_var] += \
-                        [(other, -self._val / (other._val ** 2))]
-                except KeyError:
-                    new_child._roots[input_var] = \
-                        [(other, -self._val / (other._val ** 2))]
+            new_child._val = self._val / other._val
+            new_child._children = ((self, 1 / other._val),
+                                  (other, -self._val / (other._val ** 2)))
         except AttributeError:
-            new_child._val /= other
-            new_child._roots = {input_var: [(self, 1 / other)]
-                                for input_var in self._roots.keys()}
+            new_child._val = self._val / other
+            new_child._children = ((self, 1 / other),)
         return new_child
 
     def __rtruediv__(self, other):
@@ -263,18 +244,17 @@ class rScalar():
         ======
         The rScalar object that is returned by this method is assigned as the
         parent of the rScalar self (and of other if other is an rScalar
-        instance).  Specifically, this relationship is stored as a tuple
-        (par, val) where par is the new_parent rScalar instance and val is
-        the derivative of new_parent with respect to its child rScalar object.
+        instance).  Specifically, this relationship is stored in the _children
+        attribute of the new parent as a tuple (child, val) where val is the
+        derivative of the new parent with respect to its child rScalar object.
         Storing relationships in this way facilitates the computation of
-        gradients through reverse automatic differentiation.   Additionally,
+        gradients through reverse automatic differentiation.  Additionally,
         this method can assume that other is not an instance of rScalar because
         otherwise the division of other and self would be handled by the
         overloading of __truediv__ for the other object.
         """
         new_child = rScalar(other / self._val)
-        new_child._roots = {input_var: [(self, -other / (self._val ** 2))]
-                            for input_var in self._roots.keys()}
+        new_child._children = ((self, -other / (self._val ** 2)),)
         return new_child
 
 
@@ -296,32 +276,24 @@ class rScalar():
         ======
         The rScalar object that is returned by this method is assigned as the
         parent of the rScalar self (and of other if other is an rScalar
-        instance).  Specifically, this relationship is stored as a tuple
-        (par, val) where par is the new_parent rScalar instance and val is
-        the derivative of new_parent with respect to its child rScalar object.
+        instance).  Specifically, this relationship is stored in the _children
+        attribute of the new parent as a tuple (child, val) where val is the
+        derivative of the new parent with respect to its child rScalar object.
         Storing relationships in this way facilitates the computation of
         gradients through reverse automatic differentiation.
         """
+        if isinstance(other, rTensor):
+            # Let rTensor reduce the derivative over the broadcast axes
+            return NotImplemented
         new_child = rScalar(self._val)
         try:
-            new_child._val **= other._val
-            # For each input variable on which self is defined
-            new_child._roots = {input_var: [(self, other._val *
-                                self._val ** (other._val - 1))]
-                                for input_var in self._roots.keys()}
-
-            for input_var in other._roots.keys():
-                try:
-                    new_child._roots[input_var] += \
-                        [(other, self._val ** other._val * np.log(self._val))]
-                except KeyError:
-                    new_child._roots[input_var] = \
-                        [(other, self._val ** other._val * np.log(self._val))]
+            new_child._val = self._val ** other._val
+            new_child._children = \
+                ((self, other._val * self._val ** (other._val - 1)),
+                 (other, self._val ** other._val * np.log(self._val)))
         except AttributeError:
-            new_child._val **= other
-            new_child._roots = {input_var: [(self, other *
-                                self._val ** (other - 1))]
-                                for input_var in self._roots.keys()}
+            new_child._val = self._val ** other
+            new_child._children = ((self, other * self._val ** (other - 1)),)
         return new_child
 
     def __rpow__(self, other):
@@ -342,9 +314,9 @@ class rScalar():
         ======
         The rScalar object that is returned by this method is assigned as the
         parent of the rScalar self (and of other if other is an rScalar
-        instance).  Specifically, this relationship is stored as a tuple
-        (par, val) where par is the new_parent rScalar instance and val is
-        the derivative of new_parent with respect to its child rScalar object.
+        instance).  Specifically, this relationship is stored in the _children
+        attribute of the new parent as a tuple (child, val) where val is the
+        derivative of the new parent with respect to its child rScalar object.
         Storing relationships in this way facilitates the computation of
         gradients through reverse automatic differentiation.  Additionally,
         this method can assume that other is not an instance of rScalar because
@@ -352,9 +324,7 @@ class rScalar():
         overloading of __pow__ for the other object.
         """
         new_child = rScalar(other ** self._val)
-        new_child._roots = {input_var:
-                            [(self, other ** self._val * np.log(other))]
-                            for input_var in self._roots.keys()}
+        new_child._children = ((self, other ** self._val * np.log(other)),)
         return new_child
 
     def __neg__(self):
@@ -374,12 +344,11 @@ class rScalar():
         ======
         The rScalar object that is returned by this method is assigned as the
         parent of the rScalar self.  Specifically, this relationship is stored
-        as a tuple (par, val) where par is the new_parent rScalar instance and
-        val is the derivative of new_parent with respect to its child rScalar
-        object.  Storing relationships in this way facilitates the computation
-        of gradients through reverse automatic differentiation.
+        in the _children attribute of the new parent as a tuple (child, val)
+        where val is the derivative of the new parent with respect to its child
+        rScalar object.  Storing relationships in this way facilitates the
+        computation of gradients through reverse automatic differentiation.
         """
         new_child = rScalar(-self._val)
-        new_child._roots = {input_var: [(self, -1)]
-                            for input_var in self._roots.keys()}
+        new_child._children = ((self, -1),)
         return new_child
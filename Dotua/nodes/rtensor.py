@@ -0,0 +1,371 @@
+import numpy as np
+from Dotua.tape import Tape
+
+
+class _VJP():
+    """
+    Local derivative of a tensor operation, applied to the adjoint of its
+    result as a vector-Jacobian product.
+
+    The Tape multiplies the adjoint of each node by the local derivatives
+    recorded in its _children.  Operations whose derivative is not a plain
+    elementwise factor (matrix products, reductions, reshapes and
+    broadcasting) record a _VJP instead, whose reflected multiplication
+    applies the backward rule of the operation to the adjoint.  NumPy defers
+    to the reflected operator because __array_ufunc__ is None.
+    """
+
+    __slots__ = ('_fn',)
+
+    __array_ufunc__ = None
+
+    def __init__(self, fn):
+        self._fn = fn
+
+    def __rmul__(self, adjoint):
+        return self._fn(adjoint)
+
+
+def _unbroadcast(grad, shape):
+    """Return grad summed over the axes along which shape was broadcast."""
+    grad = np.asarray(grad)
+    if grad.shape == shape:
+        return grad
+    grad = grad.sum(axis=tuple(range(grad.ndim - len(shape))))
+    axes = tuple(i for i, d in enumerate(shape)
+                 if d == 1 and grad.shape[i] != 1)
+    return grad.sum(axis=axes, keepdims=True).reshape(shape)
+
+
+def _local(child, local, shape):
+    """
+    Return the recorded derivative of a result of the given shape with
+    respect to child, whose elementwise local derivative is local.
+    """
+    child_shape = np.shape(child._val)
+    if child_shape == shape:
+        return local
+    return _VJP(lambda g: _unbroadcast(
+        np.broadcast_to(g, shape) * local, child_shape))
+
+
+def _elementwise(value, pairs):
+    """
+    Return an rTensor with value value whose children are the nodes of
+    pairs, each paired with its elementwise local derivative.
+    """
+    new_child = rTensor(value)
+    shape = new_child._val.shape
+    new_child._children = tuple((child, _local(child, local, shape))
+                                for child, local in pairs)
+    return new_child
+
+
+class rTensor():
+    """
+    Allow user defined tensor variables capable of reverse automatic
+    differentiation.
+
+    rTensor objects hold a NumPy array of any shape and record the rTensor
+    (or rScalar and rVector) objects used to compute them in _children, like
+    rVector.  Besides broadcasting elementwise arithmetic and the functions of
+    rOperator, rTensor supports matrix products (@), sum, mean, transpose
+    and reshape, each recorded as a single graph node whose backward rule is
+    applied to the whole adjoint array at once.  A dense layer x @ W + b
+    followed by an activation is therefore three graph nodes regardless of
+    the layer sizes.
+    """
+
+    __slots__ = ('_val', '_children', '_grad_val', '_gen')
+
+    # Make NumPy defer to the reflected operators of rTensor
+    __array_ufunc__ = None
+
+    def __init__(self, vals):
+        """
+        Return an rTensor object with user specified value.
+
+        INPUTS
+        =======
+        vals: array-like of real numbers, of any shape
+
+        RETURNS
+        =======
+        rTensor class instance
+
+        NOTES
+        ======
+        The _children and _grad_val class variables are meant to be 'private'
+        and should never be accessed or modified directly by users.  As for
+        rScalar and rVector, _children is a tuple of pairs (child, der) where
+        der is either the elementwise derivative of self with respect to
+        child or a vector-Jacobian product applied to the adjoint of self.
+        """
+        self._val = np.asarray(vals, dtype=float)
+        self._children = ()
+        self._grad_val = 0  # allocated by the first backward pass reaching self
+        self._gen = 0
+
+    def _init_roots(self):
+        """Mark self as an input variable (a root of the graph)."""
+        self._children = ()
+
+    @property
+    def shape(self):
+        """Return the shape of the value of self."""
+        return self._val.shape
+
+    def eval(self):
+        """Return the value of self rTensor object."""
+        return self._val
+
+    def gradient(self, input_var):
+        """
+        Return the derivative of the function self with respect to input_var.
+
+        INPUTS
+        =======
+        self: rTensor class instance, the function being differentiated
+        input_var: rTensor (or rScalar, rVector) instance on which self is
+                   defined
+
+        RETURNS
+        =======
+        input_var._grad_val: array of the shape of input_var holding the
+                             derivative of the sum of the entries of self
+                             weighted by its seed with respect to input_var
+
+        NOTES
+        ======
+        The _grad_val of self must be seeded before calling this method.  A
+        single reverse sweep over the Tape of self sets the _grad_val of every
+        node in the graph.
+        """
+        tape = Tape(self)
+        if input_var not in tape:
+            raise ValueError("User attempted to differentiate a function " +
+                             "respect to a variable on which it is not " +
+                             "defined.")
+        # Broadcast a constant seed to the shape of self
+        self._grad_val = self._grad_val + np.zeros(self._val.shape)
+        tape.backward()
+        return input_var._grad_val
+
+    def __add__(self, other):
+        """Return an rTensor object with value self + other."""
+        try:
+            return _elementwise(self._val + other._val,
+                                ((self, 1), (other, 1)))
+        except AttributeError:
+            return _elementwise(self._val + other, ((self, 1),))
+
+    def __radd__(self, other):
+        """Return an rTensor object with value other + self."""
+        return self + other
+
+    def __sub__(self, other):
+        """Return an rTensor object with value self - other."""
+        return self + (-other)
+
+    def __rsub__(self, other):
+        """Return an rTensor object with value other - self."""
+        return -self + other
+
+    def __mul__(self, other):
+        """Return an rTensor object with value self * other."""
+        try:
+            return _elementwise(self._val * other._val,
+                                ((self, other._val), (other, self._val)))
+        except AttributeError:
+            return _elementwise(self._val * other, ((self, other),))
+
+    def __rmul__(self, other):
+        """Return an rTensor object with value other * self."""
+        return self * other
+
+    def __truediv__(self, other):
+        """Return an rTensor object with value self / other."""
+        try:
+            return _elementwise(self._val / other._val,
+                                ((self, 1 / other._val),
+                                 (other, -self._val / other._val ** 2)))
+        except AttributeError:
+            return _elementwise(self._val / other, ((self, 1 / other),))
+
+    def __rtruediv__(self, other):
+        """Return an rTensor object with value other / self."""
+        try:
+            other_val = other._val
+        except AttributeError:
+            return _elementwise(other / self._val,
+                                ((self, -other / self._val ** 2),))
+        return _elementwise(other_val / self._val,
+                            ((other, 1 / self._val),
+                             (self, -other_val / self._val ** 2)))
+
+    def __pow__(self, other):
+        """Return an rTensor object with value self ** other."""
+        try:
+            value = self._val ** other._val
+            return _elementwise(value,
+                                ((self, other._val *
+                                  self._val ** (other._val - 1)),
+                                 (other, value * np.log(self._val))))
+        except AttributeError:
+            return _elementwise(self._val ** other,
+                                ((self, other * self._val ** (other - 1)),))
+
+    def __rpow__(self, other):
+        """Return an rTensor object with value other ** self."""
+        try:
+            other_val = other._val
+        except AttributeError:
+            value = other ** self._val
+            return _elementwise(value, ((self, value * np.log(other)),))
+        value = other_val ** self._val
+        return _elementwise(value,
+                            ((other, self._val *
+                              other_val ** (self._val - 1)),
+                             (self, value * np.log(other_val))))
+
+    def __neg__(self):
+        """Return an rTensor object with value -self."""
+        return _elementwise(-self._val, ((self, -1),))
+
+    def __matmul__(self, other):
+        """
+        Return an rTensor object whose value is the matrix product of self
+        and other.
+
+        INPUTS
+        =======
+        self: rTensor class instance
+        other: rTensor instance or array-like constant
+
+        RETURNS
+        =======
+        new_child: rTensor whose value is self._val @ other._val
+
+        NOTES
+        ======
+        The semantics of numpy.matmul apply, including one dimensional
+        operands and broadcasting of stacked matrices.  The backward rules
+        are the matrix products g @ other.T and self.T @ g of the adjoint g
+        of the result, summed over any broadcast batch axes.
+        """
+        try:
+            other_val = other._val
+        except AttributeError:
+            return _matmul(self, self._val, None, np.asarray(other))
+        return _matmul(self, self._val, other, np.asarray(other_val))
+
+    def __rmatmul__(self, other):
+        """Return an rTensor object with value other @ self."""
+        return _matmul(None, np.asarray(other), self, self._val)
+
+    def sum(self, axis=None, keepdims=False):
+        """
+        Return an rTensor object whose value is the sum of the entries of
+        self along axis, as numpy.sum.
+        """
+        value = self._val.sum(axis=axis, keepdims=keepdims)
+        shape = self._val.shape
+        axes = _axes(axis, len(shape))
+
+        def vjp(g):
+            if not keepdims:
+                g = np.expand_dims(g, axes)
+            return np.broadcast_to(g, shape).copy()
+
+        new_child = rTensor(value)
+        new_child._children = ((self, _VJP(vjp)),)
+        return new_child
+
+    def mean(self, axis=None, keepdims=False):
+        """
+        Return an rTensor object whose value is the mean of the entries of
+        self along axis, as numpy.mean.
+        """
+        axes = _axes(axis, self._val.ndim)
+        count = int(np.prod([self._val.shape[a] for a in axes]))
+        return self.sum(axis, keepdims) / count
+
+    def transpose(self, axes=None):
+        """
+        Return an rTensor object whose value is the transpose of self, with
+        its axes permuted as numpy.transpose.
+        """
+        if axes is None:
+            axes = tuple(range(self._val.ndim))[::-1]
+        inverse = tuple(np.argsort(axes))
+        new_child = rTensor(self._val.transpose(axes))
+        new_child._children = \
+            ((self, _VJP(lambda g: np.transpose(g, inverse))),)
+        return new_child
+
+    @property
+    def T(self):
+        """Return the transpose of self."""
+        return self.transpose()
+
+    def reshape(self, *shape):
+        """
+        Return an rTensor object whose value is the value of self with the
+        given shape, as numpy.reshape.
+        """
+        if len(shape) == 1 and isinstance(shape[0], (tuple, list)):
+            shape = tuple(shape[0])
+        original = self._val.shape
+        new_child = rTensor(self._val.reshape(shape))
+        new_child._children = \
+            ((self, _VJP(lambda g: np.reshape(g, original))),)
+        return new_child
+
+
+def _axes(axis, ndim):
+    """Return the tuple of nonnegative axes described by axis."""
+    if axis is None:
+        return tuple(range(ndim))
+    if isinstance(axis, int):
+        axis = (axis,)
+    return tuple(a % ndim for a in axis)
+
+
+def _matmul(a_node, a, b_node, b):
+    """
+    Return the rTensor a @ b, recording the nodes a_node and b_node (None
+    for constant operands) with their vector-Jacobian products.
+    """
+    value = a @ b
+    # Promote one dimensional operands to matrices, as numpy.matmul does
+    a2 = a[np.newaxis, :] if a.ndim == 1 else a
+    b2 = b[:, np.newaxis] if b.ndim == 1 else b
+
+    def promote(g):
+        g = np.broadcast_to(g, np.shape(value))
+        if b.ndim == 1:
+            g = g[..., np.newaxis]
+        if a.ndim == 1:
+            g = np.expand_dims(g, -2)
+        return g
+
+    def vjp_a(g):
+        grad = promote(g) @ np.swapaxes(b2, -1, -2)
+        if a.ndim == 1:
+            grad = np.squeeze(grad, -2)
+        return _unbroadcast(grad, a.shape)
+
+    def vjp_b(g):
+        grad = np.swapaxes(a2, -1, -2) @ promote(g)
+        if b.ndim == 1:
+            grad = np.squeeze(grad, -1)
+        return _unbroadcast(grad, b.shape)
+
+    new_child = rTensor(value)
+    children = []
+    if a_node is not None:
+        children.append((a_node, _VJP(vjp_a)))
+    if b_node is not None:
+        children.append((b_node, _VJP(vjp_b)))
+    new_child._children = tuple(children)
+    return new_child
@@ -1,4 +1,6 @@
 import numpy as np
+from Dotua.tape import Tape
+from Dotua.nodes.rtensor import rTensor
 from Dotua.nodes.rscalar import rScalar
 
 
@@ -7,14 +9,16 @@ class rVector():
     Allow user defined variables capable of reverse automatic differentiation.
 
     rVector objects have a single user defined value and 'private' class
-    variables parents and grad_val corresponding to functions defined using
-    the given rVector and the current gradient value of the rVector
-    respectively.  The parents of rVector are defined via operator
+    variables _children and _grad_val corresponding to the rVector objects
+    used to compute the given rVector and the current gradient value of the
+    rVector respectively.  The children of rVector are defined via operator
     overloading.  Each time the user creates functions using rVector
     variables, at least one new rVector object is created and assigned as the
     parent of the rVector objects used to create it.
     """
 
+    __slots__ = ('_val', '_children', '_grad_val', '_gen', '_rscalars')
+
     def __init__(self, vals):
         """
         Return an rVector object with user specified value.
@@ -30,23 +34,39 @@ class rVector():
         NOTES
         ======
         The val class variable is user defined during initialization.  It can
-        be accessed directly but it should never be modified.  The parents and
-        grad_val class variables are meant to be 'private' and should never be
-        accessed or modified directly by users.  Additionally, note that
-        parents is a list of tuples (par, val) where par is an rVector
-        instance and val is the derivative of the rVector par with respect
-        to the rVector self.
+        be accessed directly but it should never be modified.  The _children
+        and _grad_val class variables are meant to be 'private' and should
+        never be accessed or modified directly by users.  Additionally, note
+        that _children is a tuple of pairs (child, val) where child is an
+        rVector instance used to compute self and val is the derivative of
+        self with respect to child.
         """
-        self._val = np.array(vals)
-        self._roots = {}
-        self._grad_val = np.zeros(len(vals))
-        self._rscalars = [rScalar(val) for val in vals]
+        self._val = np.asarray(vals)
+        if self._val.ndim == 0:
+            raise TypeError("rVector values must be array-like.")
+        self._children = ()
+        self._grad_val = 0  # allocated by the first backward pass reaching self
+        self._gen = 0
+        self._rscalars = None  # element rScalars, created on first indexing
 
     def __getitem__(self, idx):
+        """
+        Return the rScalar element(s) of self at idx.
+
+        NOTES
+        ======
+        The element rScalars are only created the first time self is
+        indexed, so that intermediate rVectors produced by arithmetic remain
+        plain NumPy backed nodes.  The elements of a batched rVector, whose
+        value has a leading batch axis, are batched rScalars.
+        """
+        if self._rscalars is None:
+            self._rscalars = [rScalar(val) for val in self._val.T]
         return self._rscalars[idx]
 
     def _init_roots(self):
-        self._roots[self] = [(None, 1)]
+        """Mark self as an input variable (a root of the graph)."""
+        self._children = ()
 
     def eval(self):
         """
@@ -72,38 +92,35 @@ class rVector():
 
     def gradient(self, input_var):
         """
-        Return the derivative of some function with respect to this rVector.
+        Return the derivative of the function self with respect to input_var.
 
         INPUTS
         =======
-        self: rVector class instance
+        self: rVector class instance, the function being differentiated
+        input_var: rVector class instance on which self is defined
 
         RETURNS
         =======
-        self._grad_val: numeric type value repesenting the derivative of a
-                       function with respect to this rVector variable
+        input_var._grad_val: numeric type value repesenting the derivative of
+                             the function self with respect to input_var
 
         NOTES
         ======
-        This function is called by rAutoDiff.partial which dictates which
-        function's derivative is being calculated with respect to the
-        variable represented by the rVector self.  This method calculates the
-        necessary derivative using reverse automatic differentiation by
-        recursively finding the derivative of the specified function with
-        respect to the given rVector by defining this derivative in terms of
-        the rVector objects that represent 'intermediary functions' in the
-        implicit computational graph that are defined using the rVector self.
+        The _grad_val of self must be seeded before calling this method.  The
+        computational graph on which self depends is recorded on a Tape and a
+        single reverse sweep over the tape sets the _grad_val of every node in
+        the graph, including input_var, to the derivative of self with
+        respect to that node.
         """
-        try:
-            for child, val in self._roots[input_var]:
-                if child is not None:
-                    if child._grad_val.any() == 0:
-                        child._grad_val += self._grad_val * val
-                    child.gradient(input_var)
-        except KeyError:
+        tape = Tape(self)
+        if input_var not in tape:
             raise ValueError("User attempted to differentiate a function " +
                              "respect to a variable on which it is not " +
                              "defined.")
+        # Broadcast a constant seed to the shape of self
+        self._grad_val = self._grad_val + np.zeros(self._val.shape)
+        tape.backward()
+        return input_var._grad_val
 
     def __add__(self, other):
         """
@@ -123,28 +140,22 @@ class rVector():
         ======
         The rVector object that is returned by this method is assigned as the
         parent of the rVector self (and of other if other is an rVector
-        instance).  Specifically, this relationship is stored as a tuple
-        (par, val) where par is the new_parent rVector instance and val is
-        the derivative of new_parent with respect to its child rVector object.
+        instance).  Specifically, this relationship is stored in the _children
+        attribute of the new parent as a tuple (child, val) where val is the
+        derivative of the new parent with respect to its child rVector object.
         Storing relationships in this way facilitates the computation of
         gradients through reverse automatic differentiation.
         """
+        if isinstance(other, rTensor):
+            # Let rTensor reduce the derivative over the broadcast axes
+            return NotImplemented
         new_child = rVector(self._val)
         try:
             new_child._val = self._val + other._val
-            # For each input variable on which self is defined
-            new_child._roots = {input_var: [(self, 1)]
-                                for input_var in self._roots.keys()}
-
-            for input_var in other._roots.keys():
-                try:
-                    new_child._roots[input_var] += [(other, 1)]
-                except KeyError:
-                    new_child._roots[input_var] = [(other, 1)]
+            new_child._children = ((self, 1), (other, 1))
         except AttributeError:
             new_child._val = self._val + other
-            new_child._roots = {input_var: [(self, 1)]
-                                for input_var in self._roots.keys()}
+            new_child._children = ((self, 1),)
         return new_child
 
     def __radd__(self, other):
@@ -177,28 +188,22 @@ class rVector():
         ======
         The rVector object that is returned by this method is assigned as the
         parent of the rVector self (and of other if other is an rVector
-        instance).  Specifically, this relationship is stored as a tuple
-        (par, val) where par is the new_parent rVector instance and val is
-        the derivative of new_parent with respect to its child rVector object.
+        instance).  Specifically, this relationship is stored in the _children
+        attribute of the new parent as a tuple (child, val) where val is the
+        derivative of the new parent with respect to its child rVector object.
         Storing relationships in this way facilitates the computation of
         gradients through reverse automatic differentiation.
         """
+        if isinstance(other, rTensor):
+            # Let rTensor reduce the derivative over the broadcast axes
+            return NotImplemented
         new_child = rVector(self._val)
         try:
             new_child._val = self._val * other._val
-            # For each input variable on which self is defined
-            new_child._roots = {input_var: [(self, other._val)]
-                                for input_var in self._roots.keys()}
-
-            for input_var in other._roots.keys():
-                try:
-                    new_child._roots[input_var] += [(other, self._val)]
-                except KeyError:
-                    new_child._roots[input_var] = [(other, self._val)]
+            new_child._children = ((self, other._val), (other, self._val))
         except AttributeError:
             new_child._val = self._val * other
-            new_child._roots = {input_var: [(self, other)]
-                                for input_var in self._roots.keys()}
+            new_child._children = ((self, other),)
         return new_child
 
     def __rmul__(self, other):
@@ -223,30 +228,23 @@ class rVector():
         ======
         The rVector object that is returned by this method is assigned as the
         parent of the rVector self (and of other if other is an rVector
-        instance).  Specifically, this relationship is stored as a tuple
-        (par, val) where par is the new_parent rVector instance and val is
-        the derivative of new_parent with respect to its child rVector object.
+        instance).  Specifically, this relationship is stored in the _children
+        attribute of the new parent as a tuple (child, val) where val is the
+        derivative of the new parent with respect to its child rVector object.
         Storing relationships in this way facilitates the computation of
         gradients through reverse automatic differentiation.
         """
+        if isinstance(other, rTensor):
+            # Let rTensor reduce the derivative over the broadcast axes
+            return NotImplemented
         new_child = rVector(self._val)
         try:
             new_child._val = self._val / other._val
-            # For each input variable on which self is defined
-            new_child._roots = {input_var: [(self, 1 / other._val)]
-                                for input_var in self._roots.keys()}
-
-            for input_var in other._roots.keys():
-                try:
-                    new_child._roots[input_var] += \
-                        [(other, -self._val / (other._val ** 2))]
-                except KeyError:
-                    new_child._roots[input_var] = \
-                        [(other, -self._val / (other._val ** 2))]
+            new_child._children = ((self, 1 / other._val),
+                                  (other, -self._val / (other._val ** 2)))
         except AttributeError:
             new_child._val = self._val / other
-            new_child._roots = {input_var: [(self, 1 / other)]
-                                for input_var in self._roots.keys()}
+            new_child._children = ((self, 1 / other),)
         return new_child
 
     def __rtruediv__(self, other):
@@ -267,18 +265,17 @@ class rVector():
         ======
         The rVector object that is returned by this method is assigned as the
         parent of the rVector self (and of other if other is an rVector
-        instance).  Specifically, this relationship is stored as a tuple
-        (par, val) where par is the new_parent rVector instance and val is
-        the derivative of new_parent with respect to its child rVector object.
+        instance).  Specifically, this relationship is stored in the _children
+        attribute of the new parent as a tuple (child, val) where val is the
+        derivative of the new parent with respect to its child rVector object.
         Storing relationships in this way facilitates the computation of
-        gradients through reverse automatic differentiation.   Additionally,
+        gradients through reverse automatic differentiation.  Additionally,
         this method can assume that other is not an instance of rVector because
         otherwise the division of other and self would be handled by the
         overloading of __truediv__ for the other object.
         """
         new_child = rVector(other / self._val)
-        new_child._roots = {input_var: [(self, -other / (self._val ** 2))]
-                            for input_var in self._roots.keys()}
+        new_child._children = ((self, -other / (self._val ** 2)),)
         return new_child
 
     def __pow__(self, other):
@@ -299,32 +296,24 @@ class rVector():
         ======
         The rVector object that is returned by this method is assigned as the
         parent of the rVector self (and of other if other is an rVector
-        instance).  Specifically, this relationship is stored as a tuple
-        (par, val) where par is the new_parent rVector instance and val is
-        the derivative of new_parent with respect to its child rVector object.
+        instance).  Specifically, this relationship is stored in the _children
+        attribute of the new parent as a tuple (child, val) where val is the
+        derivative of the new parent with respect to its child rVector object.
         Storing relationships in this way facilitates the computation of
         gradients through reverse automatic differentiation.
         """
+        if isinstance(other, rTensor):
+            # Let rTensor reduce the derivative over the broadcast axes
+            return NotImplemented
         new_child = rVector(self._val)
         try:
             new_child._val = self._val ** other._val
-            # For each input variable on which self is defined
-            new_child._roots = {input_var: [(self, other._val *
-                                self._val ** (other._val - 1))]
-                                for input_var in self._roots.keys()}
-
-            for input_var in other._roots.keys():
-                try:
-                    new_child._roots[input_var] += \
-                        [(other, self._val ** other._val * np.log(self._val))]
-                except KeyError:
-                    new_child._roots[input_var] = \
-                        [(other, self._val ** other._val * np.log(self._val))]
+            new_child._children = \
+                ((self, other._val * self._val ** (other._val - 1)),
+                 (other, self._val ** other._val * np.log(self._val)))
         except AttributeError:
             new_child._val = self._val ** other
-            new_child._roots = {input_var: [(self, other *
-                                self._val ** (other - 1))]
-                                for input_var in self._roots.keys()}
+            new_child._children = ((self, other * self._val ** (other - 1)),)
         return new_child
 
     def __rpow__(self, other):
@@ -345,9 +334,9 @@ class rVector():
         ======
         The rVector object that is returned by this method is assigned as the
         parent of the rVector self (and of other if other is an rVector
-        instance).  Specifically, this relationship is stored as a tuple
-        (par, val) where par is the new_parent rVector instance and val is
-        the derivative of new_parent with respect to its child rVector object.
+        instance).  Specifically, this relationship is stored in the _children
+        attribute of the new parent as a tuple (child, val) where val is the
+        derivative of the new parent with respect to its child rVector object.
         Storing relationships in this way facilitates the computation of
         gradients through reverse automatic differentiation.  Additionally,
         this method can assume that other is not an instance of rVector because
@@ -355,9 +344,7 @@ class rVector():
         overloading of __pow__ for the other object.
         """
         new_child = rVector(other ** self._val)
-        new_child._roots = {input_var:
-                            [(self, other ** self._val * np.log(other))]
-                            for input_var in self._roots.keys()}
+        new_child._children = ((self, other ** self._val * np.log(other)),)
         return new_child
 
     def __neg__(self):
@@ -377,12 +364,11 @@ class rVector():
         ======
         The rVector object that is returned by this method is assigned as the
         parent of the rVector self.  Specifically, this relationship is stored
-        as a tuple (par, val) where par is the new_parent rVector instance and
-        val is the derivative of new_parent with respect to its child rVector
-        object.  Storing relationships in this way facilitates the computation
-        of gradients through reverse automatic differentiation.
+        in the _children attribute of the new parent as a tuple (child, val)
+        where val is the derivative of the new parent with respect to its child
+        rVector object.  Storing relationships in this way facilitates the
+        computation of gradients through reverse automatic differentiation.
         """
         new_child = rVector(-self._val)
-        new_child._roots = {input_var: [(self, -1)]
-                            for input_var in self._roots.keys()}
+        new_child._children = ((self, -1),)
         return new_child
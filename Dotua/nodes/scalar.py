@@ -1,4 +1,5 @@
 from Dotua.nodes.node import Node
+from Dotua.nodes.jacobian import DictJacobian, DenseJacobian, SparseJacobian
 import numpy as np
 
 
@@ -8,13 +9,21 @@ class Scalar(Node):
 
     Scalar objects have a single user defined value (either defined by user
     initialization or function composition) and a jacobian.  For
-    each @Scalar object, the jacobian is a dictionary representation of the
-    derivative of the function represented by the @Scalar object with respect
-    to all user initialized Scalar objects defined by the same call to
+    each @Scalar object, the jacobian is a dictionary-like representation of
+    the derivative of the function represented by the @Scalar object with
+    respect to all user initialized Scalar objects defined by the same call to
     AutoDiff.create_scalar() that created the Scalar obect(s) used to define
-    the function represented by this Scalar object.
+    the function represented by this Scalar object.  The jacobian is either a
+    DictJacobian, a DenseJacobian or a SparseJacobian (see
+    Dotua.nodes.jacobian); all of them expose scale and combine methods
+    through which the operators propagate derivatives.  In batched mode the
+    value of a Scalar and every entry of its jacobian are NumPy arrays over
+    a batch of input points, so one pass through the operators evaluates a
+    function and its derivatives at all of the points at once.
     """
 
+    __slots__ = ('_val', '_jacobian')
+
     def __init__(self, val, der=None):
         """
         Return a Scalar object with user specified value and derivative.
@@ -22,7 +31,7 @@ class Scalar(Node):
         INPUTS
         =======
         val: real valued numeric type
-        der: dictionary representation of a jacobian
+        der: jacobian object (see Dotua.nodes.jacobian)
 
         RETURNS
         =======
@@ -38,7 +47,7 @@ class Scalar(Node):
         self._val = val
         self._jacobian = der
 
-    def init_jacobian(self, nodes):
+    def init_jacobian(self, nodes, shape=()):
         """
         Initialize the jacobian class variable with appropriate seed values.
 
@@ -47,6 +56,9 @@ class Scalar(Node):
         self: Scalar class instance
         nodes: list of Scalar objects, created by the same call to
                AutoDiff.create_scalar as the self Scalar object
+        shape: tuple, optional, default value is ()
+               Batch shape of the value of self; when not empty each seed
+               value is an array of this shape
 
         RETURNS
         =======
@@ -60,7 +72,58 @@ class Scalar(Node):
         functions has a derivative that is well defined with respect to all
         variables in the 'universe'.
         """
-        self._jacobian = {node: int(id(self) == id(node)) for node in nodes}
+        if shape:
+            self._jacobian = DictJacobian(
+                {node: np.full(shape, float(id(self) == id(node)))
+                 for node in nodes})
+        else:
+            self._jacobian = DictJacobian({node: int(id(self) == id(node))
+                                           for node in nodes})
+
+    def init_dense_jacobian(self, universe):
+        """
+        Initialize the jacobian class variable as an array backed jacobian.
+
+        INPUTS
+        =======
+        self: Scalar class instance
+        universe: Universe instance holding the slots of all Scalar objects
+                  created by the same call to AutoDiff.create_scalar as the
+                  self Scalar object
+
+        RETURNS
+        =======
+        Nothing is returned by this method.
+
+        NOTES
+        ======
+        The seeded jacobian is a DenseJacobian whose gradient array holds a 1
+        at the slot of self and a 0 at the slot of every other variable.
+        """
+        self._jacobian = DenseJacobian.seed(universe, self)
+
+    def init_sparse_jacobian(self, universe):
+        """
+        Initialize the jacobian class variable as a sparse jacobian.
+
+        INPUTS
+        =======
+        self: Scalar class instance
+        universe: Universe instance holding the slots of all Scalar objects
+                  created by the same call to AutoDiff.create_scalar as the
+                  self Scalar object
+
+        RETURNS
+        =======
+        Nothing is returned by this method.
+
+        NOTES
+        ======
+        The seeded jacobian is a SparseJacobian storing the single entry 1 at
+        the slot of self.  Partial derivatives with respect to every other
+        variable in the universe are implicitly 0.
+        """
+        self._jacobian = SparseJacobian.seed(universe, self)
 
     def eval(self):
         """
@@ -113,11 +176,11 @@ class Scalar(Node):
         """
         new_node = Scalar(self._val, self._jacobian)
         try:
-            new_node._val += other._val
-            new_node._jacobian = {k: (v + other.partial(k))
-                                  for k, v in self._jacobian.items()}
+            new_node._val = self._val + other._val
+            new_node._jacobian = \
+                self._jacobian.combine(1, other._jacobian, 1)
         except AttributeError:
-            new_node._val += other
+            new_node._val = self._val + other
         return new_node
 
     def __radd__(self, other):
@@ -154,14 +217,12 @@ class Scalar(Node):
         """
         new_node = Scalar(self._val, self._jacobian)
         try:
-            new_node._val *= other._val
-            new_node._jacobian = {k: self._val * other.partial(k)
-                                  + v * other._val
-                                  for k, v in self._jacobian.items()}
-        except:
-            new_node._val *= other
+            new_node._val = self._val * other._val
             new_node._jacobian = \
-                {k: v * other for k, v in self._jacobian.items()}
+                self._jacobian.combine(other._val, other._jacobian, self._val)
+        except AttributeError:
+            new_node._val = self._val * other
+            new_node._jacobian = self._jacobian.scale(other)
         return new_node
 
     def __rmul__(self, other):
@@ -190,14 +251,13 @@ class Scalar(Node):
         """
         new_node = Scalar(self._val, self._jacobian)
         try:
-            new_node._val /= other._val
+            new_node._val = self._val / other._val
             new_node._jacobian = \
-                {k: (v * other._val - self._val * other.partial(k))
-                 / (other._val ** 2) for k, v in self._jacobian.items()}
+                self._jacobian.combine(1 / other._val, other._jacobian,
+                                       -self._val / (other._val ** 2))
         except AttributeError:
-            new_node._val /= other
-            new_node._jacobian = \
-                {k: v / other for k, v in self._jacobian.items()}
+            new_node._val = self._val / other
+            new_node._jacobian = self._jacobian.scale(1 / other)
         return new_node
 
     def __rtruediv__(self, other):
@@ -225,9 +285,7 @@ class Scalar(Node):
         """
         new_node = Scalar(self._val, self._jacobian)
         new_node._val = other / self._val
-        new_node._jacobian = \
-            {k: other * (-v) / (self._val ** 2)
-             for k, v in self._jacobian.items()}
+        new_node._jacobian = self._jacobian.scale(-other / (self._val ** 2))
         return new_node
 
     def __pow__(self, other):
@@ -252,17 +310,17 @@ class Scalar(Node):
         """
         new_node = Scalar(self._val, self._jacobian)
         try:
-            new_node._val **= other._val
+            new_node._val = self._val ** other._val
             new_node._jacobian = \
-                {k: (other._val * v / self._val
-                 + np.log(self._val) * other.partial(k))
-                 * (self._val ** other._val)
-                 for k, v in self._jacobian.items()}
+                self._jacobian.combine(other._val
+                                       * (self._val ** (other._val - 1)),
+                                       other._jacobian,
+                                       np.log(self._val)
+                                       * (self._val ** other._val))
         except AttributeError:
-            new_node._val **= other
+            new_node._val = self._val ** other
             new_node._jacobian = \
-                {k: other * (self._val ** (other - 1)) * v
-                 for k, v in self._jacobian.items()}
+                self._jacobian.scale(other * (self._val ** (other - 1)))
         return new_node
 
     def __rpow__(self, other):
@@ -291,8 +349,7 @@ class Scalar(Node):
         new_node = Scalar(self._val, self._jacobian)
         new_node._val = other ** self._val
         new_node._jacobian = \
-            {k: (other ** self._val) * np.log(other) * v
-             for k, v in self._jacobian.items()}
+            self._jacobian.scale((other ** self._val) * np.log(other))
         return new_node
 
     def __neg__(self):
@@ -313,5 +370,4 @@ class Scalar(Node):
         jacobian with respect to all variables in the 'universe' of the Scalar
         object that was used to create this function.
         """
-        jacobian = {k: -1 * v for k, v in self._jacobian.items()}
-        return Scalar(-1 * self._val, jacobian)
+        return Scalar(-1 * self._val, self._jacobian.scale(-1))
@@ -1,9 +1,17 @@
 import numpy as np
+import scipy.sparse as sp
 from Dotua.nodes.node import Node
 from Dotua.nodes.scalar import Scalar
+from Dotua.nodes.jacobian import DiagonalJacobian
 
 
 class Vector(Node):
+    __slots__ = ('_val', '_jacobian', '_scalars', '_dict')
+
+    # Make NumPy defer to the reflected operators of Vector, so that A @ x
+    # with a numpy array A calls __rmatmul__
+    __array_ufunc__ = None
+
     def __init__(self, val, der = 1):
         """
         Returns a Vector variable with user defined value and derivative
@@ -12,8 +20,9 @@ class Vector(Node):
         =======
         val: list of floats, compulsory
             Value of the Vector variable
-        der: float, optional, default value is 1
-            Derivative of the Vector variable/function of a variable
+        der: float or list of floats, optional, default value is 1
+            Derivative of each element of the Vector variable with respect to
+            itself
 
         RETURNS
         ========
@@ -26,23 +35,145 @@ class Vector(Node):
             - two or fewer inputs
         POST:
             returns a Vector class instance with value = val and derivative = der
+
+        The jacobian of the Vector variable is stored as a DiagonalJacobian,
+        so it takes O(n) memory rather than the O(n^2) of a dense identity
+        matrix.  Elementwise operations keep the jacobians of the resulting
+        Vectors diagonal as well.
         """
         self._val = np.array(val)
-        self._jacobian = der * np.eye(len(val))
-        scalars = [None] * len(val)
-        for i in range(len(val)):
-            scalars[i] = Scalar(val[i])
-
-            # Initialize the jacobians
-        for var in scalars:
-            var.init_jacobian(scalars)
-        self._scalars = scalars
+        self._jacobian = DiagonalJacobian(der * np.ones(len(self._val)))
+        self._scalars = None # Element Scalars are created on first indexing
+        self._dict = None # Jacobians keyed by input Vector, None for user defined variables
 
     def __getitem__(self, idx):
-        #return Element(self._val[idx], self._jacobian[idx], self)
+        """
+        Returns the Scalar element(s) of self at idx
+
+        INPUTS
+        =======
+        self: this Vector class instance, compulsory
+        idx: integer or slice, compulsory
+
+        RETURNS
+        ========
+        Scalar class instance or list of Scalar class instances
+
+        NOTES
+        =====
+        The element Scalars form a variable universe of their own and are only
+        created the first time self is indexed, so intermediate Vectors
+        produced by arithmetic never pay for them.  They are seeded like the
+        Scalars returned by AutoDiff.create_scalar in 'auto' mode, so large
+        Vectors use sparse jacobians and seeding costs O(n) rather than O(n^2).
+        """
+        if self._scalars is None:
+            from Dotua.autodiff import AutoDiff
+            scalars = [Scalar(val) for val in self._val]
+            AutoDiff._init_universe(scalars, 'auto')
+            self._scalars = scalars
         return self._scalars[idx]
 
 
+    def _derivatives(self):
+        """
+        Returns the jacobians of self keyed by the input Vectors it depends on
+
+        INPUTS
+        =======
+        self: this Vector class instance, compulsory
+
+        RETURNS
+        ========
+        dictionary mapping input Vector variables to jacobian objects
+        """
+        if self._dict is None: # If self is a user defined variable
+            return {self: self._jacobian}
+        return self._dict
+
+    def _chain(self, value, a, other=None, b=None):
+        """
+        Returns a Vector with value value whose jacobians are the chain rule
+        combination a * d(self) + b * d(other)
+
+        INPUTS
+        =======
+        self: this Vector class instance, compulsory
+        value: numpy array, compulsory
+            Value of the new Vector variable
+        a: constant or numpy array, compulsory
+            Elementwise derivative of the new Vector with respect to self
+        other: Vector class instance, optional
+            Second operand of the operation creating the new Vector
+        b: constant or numpy array, optional
+            Elementwise derivative of the new Vector with respect to other
+
+        RETURNS
+        ========
+        Vector class instance
+
+        NOTES
+        =====
+        The jacobians of self and other are never modified, so Vectors that
+        share subexpressions do not affect each other.
+        """
+        derivative = Counter()
+        dict_self = self._derivatives()
+        for key, jacobian in dict_self.items():
+            derivative[key] = jacobian.scale(a)
+        if other is not None:
+            for key, jacobian in other._derivatives().items():
+                if key in dict_self:
+                    derivative[key] = dict_self[key].combine(a, jacobian, b)
+                else:
+                    derivative[key] = jacobian.scale(b)
+        new = Vector(value)
+        new._dict = derivative
+        return new
+
+    def _product(self, value, a, other=None, b=None):
+        """
+        Returns a Vector with value value whose jacobians are the chain rule
+        combination a @ d(self) + b @ d(other)
+
+        INPUTS
+        =======
+        self: this Vector class instance, compulsory
+        value: numpy array, compulsory
+            Value of the new Vector variable
+        a: two dimensional numpy array or scipy.sparse matrix, compulsory
+            Jacobian of the new Vector with respect to self
+        other: Vector class instance, optional
+            Second operand of the operation creating the new Vector
+        b: two dimensional numpy array or scipy.sparse matrix, optional
+            Jacobian of the new Vector with respect to other
+
+        RETURNS
+        ========
+        Vector class instance
+
+        NOTES
+        =====
+        This is the counterpart of _chain for operations whose local
+        derivative is a matrix rather than elementwise.  Each jacobian is
+        multiplied by a (or b) in a single matrix product.  The result is a
+        CSRJacobian when a sparse matrix multiplies a diagonal or sparse
+        jacobian, and a MatrixJacobian otherwise.
+        """
+        derivative = Counter()
+        dict_self = self._derivatives()
+        for key, jacobian in dict_self.items():
+            derivative[key] = jacobian.premultiply(a)
+        if other is not None:
+            for key, jacobian in other._derivatives().items():
+                term = jacobian.premultiply(b)
+                if key in dict_self:
+                    term = derivative[key].combine(1, term, 1)
+                derivative[key] = term
+        new = Vector(np.atleast_1d(value))
+        new._dict = derivative
+        return new
+
     def __add__(self, other):
         """
         Returns the sum of self and other
@@ -57,68 +188,9 @@ class Vector(Node):
         Vector class instance
         """
         try:
-            value = self._val + other._val # If other is a constant, then there will be an attribute error
+            return self._chain(self._val + other._val, 1, other, 1)
         except AttributeError:
-            value = self._val + other
-            try:
-                dict_self = self._dict # If self is a user defined variable, then there will be an attribute error
-                new = Vector(value, self._jacobian)
-                new._dict = dict_self # When self is a complex function and other is a constant, the derivatives of the sum is just the derivatives of self
-                return new
-            except AttributeError:
-                derivative = Counter() # If self is a user defined variable, then we add a dictionary of derivatives of user defined variables to the result Vector variable
-                derivative[self] = self._jacobian
-                new = Vector(value, self._jacobian)
-                new._dict = derivative
-                return new
-        else:
-            try:
-                dict_self = self._dict
-            except AttributeError:
-                dict_self = Counter()
-                dict_self[self] = self._jacobian
-                try:
-                    dict_other = other._dict # If other is a user defined variable, then there will be an attribute error
-                except AttributeError:
-                    dict_other = Counter()
-                    dict_other[other] = other._jacobian  # If other is a user defined variable, then we initiate a Counter dictionary for it
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = dict_self[key] + dict_other[key] # Then the derivatives of result Vector variable are sums of derivatives of self and derivatives of other
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
-                else:
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = dict_self[key] + dict_other[key] # If self and other are both complex functions, then the derivatives of result Vector variable are sums of derivatives of self and derivatives of other
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
-            else:
-                try:
-                    dict_other = other._dict
-                except AttributeError:
-                    dict_other = Counter()
-                    dict_other[other] = other._jacobian
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = dict_self[key] + dict_other[key]
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
-                else:
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = dict_self[key] + dict_other[key]
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
-
+            return self._chain(self._val + other, 1)
 
     def __radd__(self, other):
         """
@@ -149,67 +221,9 @@ class Vector(Node):
         Vector class instance
         """
         try:
-            value = self._val - other._val # If other is a constant, then there will be an attribute error
+            return self._chain(self._val - other._val, 1, other, -1)
         except AttributeError:
-            value = self._val - other
-            try:
-                dict_self = self._dict # If self is a user defined variable, then there will be an attribute
-                new = Vector(value, self._jacobian)
-                new._dict = dict_self
-                return new
-            except AttributeError:
-                derivative = Counter()
-                derivative[self] = self._jacobian
-                new = Vector(value, self._jacobian)
-                new._dict = derivative # When self is a complex function and other is a constant, the derivatives of the result variable is just the derivatives of self
-                return new
-        else:
-            try:
-                dict_self = self._dict
-            except AttributeError:
-                dict_self = Counter() # If self is a user defined variable, then we add a dictionary of derivatives of user defined variables to the result Vector variable
-                dict_self[self] = self._jacobian
-                try:
-                    dict_other = other._dict # If other is a user defined variable, then there will be an attribute error
-                except AttributeError:
-                    dict_other = Counter()
-                    dict_other[other] = other._jacobian # If other is a user defined variable, then we initiate a Counter dictionary for it
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = dict_self[key] - dict_other[key] # Then the derivatives of result Vector variable are differences of derivatives of self and derivatives of other
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
-                else:
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = dict_self[key] - dict_other[key] # If self and other are both complex functions, then the derivatives of result Vector variable are differences of derivatives of self and derivatives of other
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
-            else:
-                try:
-                    dict_other = other._dict
-                except AttributeError:
-                    dict_other = Counter()
-                    dict_other[other] = other._jacobian
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = dict_self[key] - dict_other[key]
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
-                else:
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = dict_self[key] - dict_other[key]
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
+            return self._chain(self._val - other, 1)
 
     def __rsub__(self, other):
         """
@@ -240,71 +254,10 @@ class Vector(Node):
         Vector class instance
         """
         try:
-            val_other = other._val # If other is a constant, then there will be an attribute error
-            value = self._val * other._val
+            return self._chain(self._val * other._val, other._val,
+                               other, self._val)
         except AttributeError:
-            val_other = other
-            value = self._val * other
-            try:
-                dict_self = self._dict # If self is a user defined variable, then there will be an attribute
-                for key in dict_self.keys():
-                    dict_self[key] = dict_self[key] * val_other
-                new = Vector(value, self._jacobian)
-                new._dict = dict_self # When self is a complex function and other is a constant, the derivatives of the result variable is just the derivatives of self
-                return new
-            except AttributeError:
-                derivative = Counter() # If self is a user defined variable, then we add a dictionary of derivatives of user defined variables to the result Vector variable
-                derivative[self] = self._jacobian * val_other
-                new = Vector(value, self._jacobian)
-                new._dict = derivative
-                return new
-        else:
-            try:
-                dict_self = self._dict
-            except AttributeError:
-                dict_self = Counter()
-                dict_self[self] = self._jacobian
-                try:
-                    dict_other = other._dict # If other is a user defined variable, then there will be an attribute error
-                except AttributeError:
-                    dict_other = Counter()
-                    dict_other[other] = other._jacobian # If other is a user defined variable, then we initiate a Counter dictionary for it
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = dict_self[key] * val_other + dict_other[key] * self._val # Then the derivatives of result Vector variable are sum of products of derivatives and values
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
-                else:
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = dict_self[key] * val_other + dict_other[key] * self._val # If self and other are both complex functions,then the derivatives of result Vector variable are sum of products of derivatives and values
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
-            else:
-                try:
-                    dict_other = other._dict
-                except AttributeError:
-                    dict_other = Counter()
-                    dict_other[other] = other._jacobian
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = dict_self[key] * val_other + dict_other[key] * self._val
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
-                else:
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = dict_self[key] * val_other + dict_other[key] * self._val
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
+            return self._chain(self._val * other, other)
 
     def __rmul__(self, other):
         """
@@ -336,71 +289,10 @@ class Vector(Node):
         """
         try:
             val_other = other._val
-            value = self._val / val_other
         except AttributeError:
-            val_other = other
-            value = self._val / val_other
-            try:
-                dict_self = self._dict
-                for key in dict_self.keys():
-                    dict_self[key] = dict_self[key] / val_other
-                new = Vector(value, self._jacobian)
-                new._dict = dict_self
-                return new
-            except AttributeError:
-                derivative = Counter()
-                derivative[self] = self._jacobian / val_other
-                new = Vector(value, self._jacobian)
-                new._dict = derivative
-                return new
-        else:
-            value = self._val / other._val
-            try:
-                dict_self = self._dict
-            except AttributeError:
-                dict_self = Counter()
-                dict_self[self] = self._jacobian
-                try:
-                    dict_other = other._dict
-                except AttributeError:
-                    dict_other = Counter()
-                    dict_other[other] = other._jacobian
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = dict_self[key] / val_other - dict_other[key] * self._val / (val_other * val_other)
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
-                else:
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = dict_self[key] / val_other - dict_other[key] * self._val / (val_other * val_other)
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
-            else:
-                try:
-                    dict_other = other._dict
-                except AttributeError:
-                    dict_other = Counter()
-                    dict_other[other] = other._jacobian
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = dict_self[key] / val_other - dict_other[key] * self._val / (val_other * val_other)
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
-                else:
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = dict_self[key] / val_other - dict_other[key] * self._val / (val_other * val_other)
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
+            return self._chain(self._val / other, 1 / other)
+        return self._chain(self._val / val_other, 1 / val_other,
+                           other, -self._val / (val_other * val_other))
 
     def __rtruediv__(self, other):
         """
@@ -421,21 +313,8 @@ class Vector(Node):
         otherwise the division of other and self would be handled by the
         overloading of __truediv__ for the other object.
         """
-        val_other = other
-        value = val_other / self._val
-        try:
-            dict_self = self._dict
-            for key in dict_self.keys():
-                dict_self[key] = - val_other * dict_self[key] / (self._val * self._val)
-            new = Vector(value, self._jacobian)
-            new._dict = dict_self
-            return new
-        except AttributeError:
-            derivative = Counter()
-            derivative[self] = - val_other * self._jacobian / (self._val * self._val)
-            new = Vector(value, self._jacobian)
-            new._dict = derivative
-            return new
+        return self._chain(other / self._val,
+                           -other / (self._val * self._val))
 
     def __pow__(self, other):
         """
@@ -452,70 +331,12 @@ class Vector(Node):
         """
         try:
             val_other = other._val
-            value = np.power(self._val, val_other)
         except AttributeError:
-            val_other  = other
-            value = np.power(self._val, val_other)
-            try:
-                dict_self = self._dict
-                for key in dict_self.keys():
-                    dict_self[key] = dict_self[key] * val_other * self._val ** (val_other - 1)
-                new = Vector(value, self._jacobian)
-                new._dict = dict_self
-                return new
-            except AttributeError:
-                derivative = Counter()
-                derivative[self] = self._jacobian * val_other * self._val ** (val_other - 1)
-                new = Vector(value, self._jacobian)
-                new._dict = derivative
-                return new
-        else:
-            try:
-                dict_self = self._dict
-            except AttributeError:
-                dict_self = Counter()
-                dict_self[self] = self._jacobian
-                try:
-                    dict_other = other._dict
-                except AttributeError:
-                    dict_other = Counter()
-                    dict_other[other] = other._jacobian
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = self._val ** val_other * (val_other / self._val * dict_self[key] + np.log(self._val) * dict_other[key])
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
-                else:
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = self._val ** val_other * (val_other / self._val * dict_self[key] + np.log(self._val) * dict_other[key])
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
-            else:
-                try:
-                    dict_other = other._dict
-                except AttributeError:
-                    dict_other = Counter()
-                    dict_other[other] = other._jacobian
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = self._val ** val_other * (val_other / self._val * dict_self[key] + np.log(self._val) * dict_other[key])
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
-                else:
-                    derivative = Counter()
-                    lst = list(dict_self.keys()) + list(dict_other.keys())
-                    for key in lst:
-                        derivative[key] = self._val ** val_other * (val_other / self._val * dict_self[key] + np.log(self._val) * dict_other[key])
-                    new = Vector(value, self._jacobian)
-                    new._dict = derivative
-                    return new
+            return self._chain(np.power(self._val, other),
+                               other * self._val ** (other - 1))
+        value = np.power(self._val, val_other)
+        return self._chain(value, value * val_other / self._val,
+                           other, value * np.log(self._val))
 
     def __rpow__(self, other):
         """
@@ -536,21 +357,8 @@ class Vector(Node):
         otherwise the exponentiation of other and self would be handled by the
         overloading of __pow__ for the other object.
         """
-        val_other  = other
-        value = np.power(val_other, self._val)
-        try:
-            dict_self = self._dict
-            for key in dict_self.keys():
-                dict_self[key] = val_other ** self._val * np.log(val_other) * dict_self[key]
-            new = Vector(value, self._jacobian)
-            new._dict = dict_self
-            return new
-        except AttributeError:
-            derivative = Counter()
-            derivative[self] = val_other ** self._val * np.log(val_other) * self._jacobian
-            new = Vector(value, self._jacobian)
-            new._dict = derivative
-            return new
+        value = np.power(other, self._val)
+        return self._chain(value, value * np.log(other))
 
     def __neg__(self):
         """
@@ -564,21 +372,127 @@ class Vector(Node):
         ========
         Vector class instance
         """
-        value = - self._val
-        derivative = - self._jacobian
-        new = Vector(value, derivative)
+        return self._chain(- self._val, -1)
+
+    def dot(self, other):
+        """
+        Returns the dot product of self and other
+
+        INPUTS
+        =======
+        self: this Vector class instance, compulsory
+        other: one dimensional array-like constant or Vector class instance,
+            compulsory
+
+        RETURNS
+        ========
+        Vector class instance of length 1
+
+        NOTES
+        =====
+        The jacobian of the result with respect to self is the row vector
+        other (and that with respect to other is the row vector self), so its
+        jacobians are a single matrix-vector product each.
+        """
         try:
-            dict_self = self._dict
+            val_other = other._val
         except AttributeError:
-            dict_self = Counter()
-            dict_self[self] = derivative
-            new._dict = dict_self
-            return new
-        else:
-            for key in dict_self.keys():
-                dict_self[key] = - dict_self[key]
-            new._dict = dict_self
-            return new
+            val_other = np.asarray(other)
+            return self._product(self._val @ val_other, val_other[np.newaxis])
+        return self._product(self._val @ val_other, val_other[np.newaxis],
+                             other, self._val[np.newaxis])
+
+    def sum(self):
+        """
+        Returns the sum of the elements of self
+
+        INPUTS
+        =======
+        self: this Vector class instance, compulsory
+
+        RETURNS
+        ========
+        Vector class instance of length 1
+        """
+        return self._product(self._val.sum(), np.ones((1, len(self._val))))
+
+    def norm(self):
+        """
+        Returns the Euclidean norm of self
+
+        INPUTS
+        =======
+        self: this Vector class instance, compulsory
+
+        RETURNS
+        ========
+        Vector class instance of length 1
+
+        NOTES
+        =====
+        The derivative of the norm is undefined at zero, where the result has
+        nan derivatives.
+        """
+        value = np.sqrt(self._val @ self._val)
+        return self._product(value, (self._val / value)[np.newaxis])
+
+    def __matmul__(self, other):
+        """
+        Returns the matrix product of self and other
+
+        INPUTS
+        =======
+        self: this Vector class instance, compulsory
+        other: Vector class instance, one or two dimensional array-like
+            constant, or scipy.sparse matrix, compulsory
+
+        RETURNS
+        ========
+        Vector class instance
+
+        NOTES
+        =====
+        As for numpy.matmul, the product of two one dimensional operands is
+        their dot product, which is returned as a Vector of length 1.
+        """
+        if sp.issparse(other):
+            return self._product(other.T @ self._val, other.T)
+        try:
+            other._val
+        except AttributeError:
+            other = np.asarray(other)
+            if other.ndim == 2:
+                return self._product(self._val @ other, other.T)
+        return self.dot(other)
+
+    def __rmatmul__(self, other):
+        """
+        Returns the matrix product of other and self
+
+        INPUTS
+        =======
+        self: this Vector class instance, compulsory
+        other: one or two dimensional array-like constant, or scipy.sparse
+            matrix, compulsory
+
+        RETURNS
+        ========
+        Vector class instance
+
+        NOTES
+        =====
+        This method can assume that other is not an instance of Vector because
+        otherwise the product of other and self would be handled by the
+        overloading of __matmul__ for the other object.  The jacobians of the
+        result are other @ d(self), a single matrix product each, and stay
+        sparse (CSRJacobian) when other is a scipy.sparse matrix.
+        """
+        if sp.issparse(other):
+            return self._product(other @ self._val, other)
+        other = np.asarray(other)
+        if other.ndim == 1:
+            return self.dot(other)
+        return self._product(other @ self._val, other)
 
     def __repr__(self):
         """
@@ -614,15 +528,10 @@ class Vector(Node):
         POST:
             - returns a float derivative
         """
-        try:
-            d = sum(self._dict[x])
-        except Exception:
-            if self == x:
-                return sum(self._jacobian)
-            else:
-                return 0
-        else:
-            return d
+        derivatives = self._derivatives()
+        if x in derivatives:
+            return derivatives[x].sum(axis=0)
+        return 0
 
     def eval(self):
         return list(self._val)
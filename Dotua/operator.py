@@ -1,9 +1,57 @@
-import math
 import numpy as np
+from Dotua.elementary import ELEMENTARY, _logsumexp, _softmax
+from Dotua.trace import Tracer, trace_elementary
 from Dotua.nodes.scalar import Scalar
 from Dotua.nodes.vector import Vector
 
 
+def _constant(x, value, derivative, *args):
+    """Return value applied to the constant x."""
+    return value(x, *args)
+
+
+def _scalar(x, value, derivative, *args):
+    """Return the Scalar value(x), its jacobian scaled by derivative(x)."""
+    return Scalar(value(x._val, *args),
+                  x._jacobian.scale(derivative(x._val, *args)))
+
+
+def _vector(x, value, derivative, *args):
+    """Return the Vector value(x), its jacobians scaled by derivative(x)."""
+    return x._chain(value(x._val, *args), derivative(x._val, *args))
+
+
+# Implementation of the elementary functions for each forward mode node
+# type (and for the Tracer used by AutoDiff.compile); any other type is
+# treated as a constant.
+_registry = {Scalar: _scalar, Vector: _vector,
+             Tracer: trace_elementary}
+
+
+def _apply(x, value, derivative, *args):
+    """
+    Apply the elementary function (value, derivative) to x.
+
+    INPUTS
+    =======
+    x: constant, Scalar or Vector class instance
+    value: function returning the value of the elementary function
+    derivative: function returning the derivative of the elementary function
+    args: extra arguments passed to both value and derivative
+
+    RETURNS
+    =======
+    constant, Scalar or Vector class instance
+
+    NOTES
+    ======
+    The implementation is selected with a single lookup of the type of x in
+    _registry rather than by probing attributes of x and catching the
+    resulting exceptions.
+    """
+    return _registry.get(type(x), _constant)(x, value, derivative, *args)
+
+
 class Operator:
     """Returns a new scalar object subject to the operator and propagates the
     value and derivative according to forward mode autodifferentiation
@@ -18,6 +66,9 @@ class Operator:
         $ from autodiff.operator import Operator as op
         $ y = op.sin(x)
 
+    Every elementary function is declared once, as a (value, derivative)
+    pair in Dotua.elementary.ELEMENTARY, and dispatched on the type of its
+    argument through a registry mapping node types to implementations.
     """
     @staticmethod
     def sin(x):
@@ -40,30 +91,7 @@ class Operator:
         input value is a vector, the operator method updates the value of the element, and the jacobian of the vector,
         returning a new vector object with these properties.
         """
-        try:
-            j = x._jacobian # To tell whether x is a constant or variable
-        except AttributeError:
-            return np.sin(x) # If x is a constant
-        else:
-            try:
-                k = j.keys() # To tell whether x is a scalar or vector
-            except AttributeError:
-                new = Vector(np.sin(x._val), x._jacobian) # If x is a vector variable
-                try:
-                    dict_self = x._dict.copy() # If x is a complex vector variable, it will update the original dictionary
-                    for key in dict_self.keys():
-                        dict_self[key] = dict_self[key] * np.cos(x._val)
-                    new._dict = dict_self
-                    return new
-                except AttributeError:
-                    derivative = Counter()
-                    derivative[x] = x._jacobian * np.cos(x._val) 
-                    new._dict = derivative # If x is not a complex vector variable, it will add an attribute to the new variable
-                    return new
-            else:
-                jacobian = {k: x.partial(k) * np.cos(x._val)
-                        for k in x._jacobian.keys()} # If x is a scalar variable
-                return Scalar(np.sin(x._val), jacobian)
+        return _apply(x, *ELEMENTARY['sin'])
 
     @staticmethod
     def cos(x):
@@ -86,31 +114,7 @@ class Operator:
         input value is a vector, the operator method updates the value of the element, and the jacobian of the vector,
         returning a new vector object with these properties.
         """
-        try:
-            j = x._jacobian
-        except AttributeError:
-            return np.cos(x) # If x is a constant
-        else:
-            try:
-                k = j.keys() # To tell whether x is a scalar or vector
-            except AttributeError:
-                new = Vector(np.cos(x._val), x._jacobian) # If x is a vector variable
-                try:
-                    dict_self = x._dict.copy() # If x is a complex vector variable, it will update the original dictionary
-                    for key in dict_self.keys():
-                        dict_self[key] = dict_self[key] * -np.sin(x._val)
-                    new._dict = dict_self
-                    return new
-                except AttributeError:
-                    derivative = Counter()
-                    derivative[x] = x._jacobian * -np.sin(x._val)
-                    new._dict = derivative # If x is not a complex vector variable, it will add an attribute to the new variable
-                    return new
-            else:
-                jacobian = {k: x.partial(k) * -np.sin(x._val)
-                            for k in x._jacobian.keys()}
-                return Scalar(np.cos(x._val), jacobian)
-
+        return _apply(x, *ELEMENTARY['cos'])
 
     @staticmethod
     def tan(x):
@@ -133,30 +137,7 @@ class Operator:
         input value is a vector, the operator method updates the value of the element, and the jacobian of the vector,
         returning a new vector object with these properties.
         """
-        try:
-            j = x._jacobian
-        except AttributeError:
-            return np.tan(x) # If x is a constant
-        else:
-            try:
-                k = j.keys() # To tell whether x is a scalar or vector
-            except AttributeError:
-                new = Vector(np.tan(x._val), x._jacobian) # If x is a vector variable
-                try:
-                    dict_self = x._dict.copy() # If x is a complex vector variable, it will update the original dictionary
-                    for key in dict_self.keys():
-                        dict_self[key] = dict_self[key] * np.arccos(x._val)**2
-                    new._dict = dict_self
-                    return new
-                except AttributeError:
-                    derivative = Counter()
-                    derivative[x] = x._jacobian * np.arccos(x._val)**2
-                    new._dict = derivative # If x is not a complex vector variable, it will add an attribute to the new variable
-                    return new
-            else:
-                jacobian = {k: x.partial(k) * np.arccos(x._val)**2
-                            for k in x._jacobian.keys()}
-                return Scalar(np.tan(x._val), jacobian)
+        return _apply(x, *ELEMENTARY['tan'])
 
     @staticmethod
     def arcsin(x):
@@ -179,31 +160,7 @@ class Operator:
         input value is a vector, the operator method updates the value of the element, and the jacobian of the vector,
         returning a new vector object with these properties.
         """
-        try:
-            j = x._jacobian
-        except AttributeError:
-            return np.arcsin(x) # If x is a constant
-        else:
-            try:
-                k = j.keys() # To tell whether x is a scalar or vector
-            except AttributeError:
-                new = Vector(np.arcsin(x._val), x._jacobian) # If x is a vector variable
-                try:
-                    dict_self = x._dict.copy() # If x is a complex vector variable, it will update the original dictionary
-                    for key in dict_self.keys():
-                        dict_self[key] = dict_self[key] * -np.arcsin(x._val)*np.arctan(x._val)
-                    new._dict = dict_self
-                    return new
-                except AttributeError:
-                    derivative = Counter()
-                    derivative[x] = x._jacobian * -np.arcsin(x._val)*np.arctan(x._val)
-                    new._dict = derivative # If x is not a complex vector variable, it will add an attribute to the new variable
-                    return new
-            else:
-                jacobian = {k: x.partial(k) * -np.arcsin(x._val)*np.arctan(
-                    x._val) for k in x._jacobian.keys()}
-                return Scalar(np.arcsin(x._val), jacobian)
-
+        return _apply(x, *ELEMENTARY['arcsin'])
 
     @staticmethod
     def arccos(x):
@@ -226,30 +183,7 @@ class Operator:
         input value is a vector, the operator method updates the value of the element, and the jacobian of the vector,
         returning a new vector object with these properties.
         """
-        try:
-            j = x._jacobian
-        except AttributeError:
-            return np.arccos(x) # If x is a constant
-        else:
-            try:
-                k = j.keys() # To tell whether x is a scalar or vector
-            except AttributeError:
-                new = Vector(np.arccos(x._val), x._jacobian) # If x is a vector variable
-                try:
-                    dict_self = x._dict.copy() # If x is a complex vector variable, it will update the original dictionary
-                    for key in dict_self.keys():
-                        dict_self[key] = dict_self[key] * np.arccos(x._val)*np.tan(x._val)
-                    new._dict = dict_self
-                    return new
-                except AttributeError:
-                    derivative = Counter()
-                    derivative[x] = x._jacobian * np.arccos(x._val)*np.tan(x._val)
-                    new._dict = derivative # If x is not a complex vector variable, it will add an attribute to the new variable
-                    return new
-            else:
-                jacobian = {k: x.partial(k) * np.arccos(x._val)*np.tan(
-                    x._val) for k in x._jacobian.keys()}
-                return Scalar(np.arccos(x._val), jacobian)
+        return _apply(x, *ELEMENTARY['arccos'])
 
     @staticmethod
     def arctan(x):
@@ -272,30 +206,7 @@ class Operator:
         input value is a vector, the operator method updates the value of the element, and the jacobian of the vector,
         returning a new vector object with these properties.
         """
-        try:
-            j = x._jacobian
-        except AttributeError:
-            return np.arctan(x) # If x is a constant
-        else:
-            try:
-                k = j.keys() # To tell whether x is a scalar or vector
-            except AttributeError:
-                new = Vector(np.arctan(x._val), x._jacobian) # If x is a vector variable
-                try:
-                    dict_self = x._dict.copy() # If x is a complex vector variable, it will update the original dictionary
-                    for key in dict_self.keys():
-                        dict_self[key] = dict_self[key] * -np.arcsin(x._val)**2
-                    new._dict = dict_self
-                    return new
-                except AttributeError:
-                    derivative = Counter()
-                    derivative[x] = x._jacobian * -np.arcsin(x._val)**2
-                    new._dict = derivative # If x is not a complex vector variable, it will add an attribute to the new variable
-                    return new
-            else:
-                jacobian = {k: x.partial(k) * -np.arcsin(x._val)**2
-                            for k in x._jacobian.keys()}
-                return Scalar(np.arctan(x._val), jacobian)
+        return _apply(x, *ELEMENTARY['arctan'])
 
     @staticmethod
     def sinh(x):
@@ -318,30 +229,7 @@ class Operator:
         input value is a vector, the operator method updates the value of the element, and the jacobian of the vector,
         returning a new vector object with these properties.
         """
-        try:
-            j = x._jacobian
-        except AttributeError:
-            return np.sinh(x) # If x is a constant
-        else:
-            try:
-                k = j.keys() # To tell whether x is a scalar or vector
-            except AttributeError:
-                new = Vector(np.sinh(x._val), x._jacobian) # If x is a vector variable
-                try:
-                    dict_self = x._dict.copy() # If x is a complex vector variable, it will update the original dictionary
-                    for key in dict_self.keys():
-                        dict_self[key] = dict_self[key] * np.cosh(x._val)
-                    new._dict = dict_self
-                    return new
-                except AttributeError:
-                    derivative = Counter()
-                    derivative[x] = x._jacobian * np.cosh(x._val)
-                    new._dict = derivative # If x is not a complex vector variable, it will add an attribute to the new variable
-                    return new
-            else:
-                jacobian = {k: x.partial(k) * np.cosh(x._val)
-                            for k in x._jacobian.keys()}
-                return Scalar(np.sinh(x._val), jacobian)
+        return _apply(x, *ELEMENTARY['sinh'])
 
     @staticmethod
     def cosh(x):
@@ -364,30 +252,7 @@ class Operator:
         input value is a vector, the operator method updates the value of the element, and the jacobian of the vector,
         returning a new vector object with these properties.
         """
-        try:
-            j = x._jacobian
-        except AttributeError:
-            return np.cosh(x) # If x is a constant
-        else:
-            try:
-                k = j.keys() # To tell whether x is a scalar or vector
-            except AttributeError:
-                new = Vector(np.cosh(x._val), x._jacobian) # If x is a vector variable
-                try:
-                    dict_self = x._dict.copy() # If x is a complex vector variable, it will update the original dictionary
-                    for key in dict_self.keys():
-                        dict_self[key] = dict_self[key] * np.sinh(x._val)
-                    new._dict = dict_self
-                    return new
-                except AttributeError:
-                    derivative = Counter()
-                    derivative[x] = x._jacobian * np.sinh(x._val)
-                    new._dict = derivative # If x is not a complex vector variable, it will add an attribute to the new variable
-                    return new
-            else:
-                jacobian = {k: x.partial(k) * np.sinh(x._val)
-                            for k in x._jacobian.keys()}
-                return Scalar(np.cosh(x._val), jacobian)
+        return _apply(x, *ELEMENTARY['cosh'])
 
     @staticmethod
     def tanh(x):
@@ -410,30 +275,7 @@ class Operator:
         input value is a vector, the operator method updates the value of the element, and the jacobian of the vector,
         returning a new vector object with these properties.
         """
-        try:
-            j = x._jacobian
-        except AttributeError:
-            return np.tanh(x) # If x is a constant
-        else:
-            try:
-                k = j.keys() # To tell whether x is a scalar or vector
-            except AttributeError:
-                new = Vector(np.tanh(x._val), x._jacobian) # If x is a vector variable
-                try:
-                    dict_self = x._dict.copy() # If x is a complex vector variable, it will update the original dictionary
-                    for key in dict_self.keys():
-                        dict_self[key] = dict_self[key] * (1-np.tanh(x._val)**2)
-                    new._dict = dict_self
-                    return new
-                except AttributeError:
-                    derivative = Counter()
-                    derivative[x] = x._jacobian * (1-np.tanh(x._val)**2)
-                    new._dict = derivative # If x is not a complex vector variable, it will add an attribute to the new variable
-                    return new
-            else:
-                jacobian = {k: x.partial(k) * (1-np.tanh(x._val)**2)
-                            for k in x._jacobian.keys()}
-                return Scalar(np.tanh(x._val), jacobian)
+        return _apply(x, *ELEMENTARY['tanh'])
 
     @staticmethod
     def arcsinh(x):
@@ -456,30 +298,7 @@ class Operator:
         input value is a vector, the operator method updates the value of the element, and the jacobian of the vector,
         returning a new vector object with these properties.
         """
-        try:
-            j = x._jacobian
-        except AttributeError:
-            return np.arcsinh(x) # If x is a constant
-        else:
-            try:
-                k = j.keys() # To tell whether x is a scalar or vector
-            except AttributeError:
-                new = Vector(np.arcsinh(x._val), x._jacobian) # If x is a vector variable
-                try:
-                    dict_self = x._dict.copy() # If x is a complex vector variable, it will update the original dictionary
-                    for key in dict_self.keys():
-                        dict_self[key] = dict_self[key] * -np.arcsinh(x._val)*np.arctanh(x._val)
-                    new._dict = dict_self
-                    return new
-                except AttributeError:
-                    derivative = Counter()
-                    derivative[x] = x._jacobian * -np.arcsinh(x._val)*np.arctanh(x._val)
-                    new._dict = derivative # If x is not a complex vector variable, it will add an attribute to the new variable
-                    return new
-            else:
-                jacobian = {k: x.partial(k) * -np.arcsinh(x._val)*np.arctanh(
-                    x._val) for k in x._jacobian.keys()}
-                return Scalar(np.arcsinh(x._val), jacobian)
+        return _apply(x, *ELEMENTARY['arcsinh'])
 
     @staticmethod
     def arccosh(x):
@@ -502,30 +321,7 @@ class Operator:
         input value is a vector, the operator method updates the value of the element, and the jacobian of the vector,
         returning a new vector object with these properties.
         """
-        try:
-            j = x._jacobian
-        except AttributeError:
-            return np.arccosh(x) # If x is a constant
-        else:
-            try:
-                k = j.keys() # To tell whether x is a scalar or vector
-            except AttributeError:
-                new = Vector(np.arccosh(x._val), x._jacobian) # If x is a vector variable
-                try:
-                    dict_self = x._dict.copy() # If x is a complex vector variable, it will update the original dictionary
-                    for key in dict_self.keys():
-                        dict_self[key] = dict_self[key] * -np.arccosh(x._val)*np.tanh(x._val)
-                    new._dict = dict_self
-                    return new
-                except AttributeError:
-                    derivative = Counter()
-                    derivative[x] = x._jacobian * -np.arccosh(x._val)*np.tanh(x._val)
-                    new._dict = derivative # If x is not a complex vector variable, it will add an attribute to the new variable
-                    return new
-            else:
-                jacobian = {k: x.partial(k) * -np.arccosh(x._val)*np.tanh(
-                    x._val) for k in x._jacobian.keys()}
-                return Scalar(np.arccosh(x._val), jacobian)
+        return _apply(x, *ELEMENTARY['arccosh'])
 
     @staticmethod
     def arctanh(x):
@@ -548,30 +344,7 @@ class Operator:
         input value is a vector, the operator method updates the value of the element, and the jacobian of the vector,
         returning a new vector object with these properties.
         """
-        try:
-            j = x._jacobian
-        except AttributeError:
-            return np.arctanh(x) # If x is a constant
-        else:
-            try:
-                k = j.keys() # To tell whether x is a scalar or vector
-            except AttributeError:
-                new = Vector(np.arctanh(x._val), x._jacobian) # If x is a vector variable
-                try:
-                    dict_self = x._dict.copy() # If x is a complex vector variable, it will update the original dictionary
-                    for key in dict_self.keys():
-                        dict_self[key] = dict_self[key] * (1-np.arctanh(x._val)**2)
-                    new._dict = dict_self
-                    return new
-                except AttributeError:
-                    derivative = Counter()
-                    derivative[x] = x._jacobian * (1-np.arctanh(x._val)**2)
-                    new._dict = derivative # If x is not a complex vector variable, it will add an attribute to the new variable
-                    return new
-            else:
-                jacobian = {k: x.partial(k) * (1-np.arctanh(x._val)**2)
-                            for k in x._jacobian.keys()}
-                return Scalar(np.arctanh(x._val), jacobian)
+        return _apply(x, *ELEMENTARY['arctanh'])
 
     @staticmethod
     def exp(x):
@@ -594,30 +367,7 @@ class Operator:
         input value is a vector, the operator method updates the value of the element, and the jacobian of the vector,
         returning a new vector object with these properties.
         """
-        try:
-            j = x._jacobian
-        except AttributeError:
-            return np.exp(x) # If x is a constant
-        else:
-            try:
-                k = j.keys() # To tell whether x is a scalar or vector
-            except AttributeError:
-                new = Vector(np.exp(x._val), x._jacobian) # If x is a vector variable
-                try:
-                    dict_self = x._dict.copy() # If x is a complex vector variable, it will update the original dictionary
-                    for key in dict_self.keys():
-                        dict_self[key] = dict_self[key] * np.exp(x._val)
-                    new._dict = dict_self
-                    return new
-                except AttributeError:
-                    derivative = Counter()
-                    derivative[x] = x._jacobian * np.exp(x._val)
-                    new._dict = derivative # If x is not a complex vector variable, it will add an attribute to the new variable
-                    return new
-            else:
-                jacobian = {k: x.partial(k) * np.exp(x._val)
-                            for k in x._jacobian.keys()}
-                return Scalar(np.exp(x._val), jacobian)
+        return _apply(x, *ELEMENTARY['exp'])
 
     @staticmethod
     def log(x, base=np.exp(1)):
@@ -640,37 +390,74 @@ class Operator:
         input value is a vector, the operator method updates the value of the element, and the jacobian of the vector,
         returning a new vector object with these properties.
         """
-        try:
-            j = x._jacobian
-        except AttributeError:
-            return math.log(x, base) # If x is a constant
-        else:
-            try:
-                k = j.keys() # To tell whether x is a scalar or vector
-            except AttributeError:
-                new = Vector([math.log(i, base) for i in x._val], x._jacobian) # If x is a vector variable
-                try:
-                    dict_self = x._dict.copy() # If x is a complex vector variable, it will update the original dictionary
-                    for key in dict_self.keys():
-                        dict_self[key] = dict_self[key] / (x._val * math.log(base))
-                    new._dict = dict_self
-                    return new
-                except AttributeError:
-                    derivative = Counter()
-                    derivative[x] = x._jacobian / (x._val * math.log(base))
-                    new._dict = derivative # If x is not a complex vector variable, it will add an attribute to the new variable
-                    return new
-            else:
-                jacobian = {k: x.partial(k) / (x._val * math.log(base))
-                            for k in x._jacobian.keys()}
-                return Scalar(math.log(x._val, base), jacobian)
-
-class Counter(dict):
-    """ Data structure for storing derivatives of a function, which is a subclass of dict
-    """
-    def __getitem__(self, idx):
-        """ It will give 0 if the key is not in the key list of the dictionary.
-            So it will give 0 if the called variable is not in the function.
+        return _apply(x, *ELEMENTARY['log'], base)
+
+    @staticmethod
+    def sigmoid(x):
+        """
+        Returns a constant, Scalar, or Vector object that is the logistic sigmoid 1 / (1 + exp(-x)) of the
+        user specified value.
+
+        INPUTS
+        =======
+        val: real valued numeric type
+
+        RETURNS
+        =======
+        Scalar or Vector class instance
+
+        NOTES
+        ======
+        The sigmoid is a single elementary function rather than a composition of exp, addition and division.
+        Its value is computed by scipy.special.expit, which never overflows, and its derivative is
+        sigmoid(x) * (1 - sigmoid(x)).
+        """
+        return _apply(x, *ELEMENTARY['sigmoid'])
+
+    @staticmethod
+    def softplus(x):
+        """
+        Returns a constant, Scalar, or Vector object that is the softplus log(1 + exp(x)) of the user
+        specified value.
+
+        INPUTS
+        =======
+        val: real valued numeric type
+
+        RETURNS
+        =======
+        Scalar or Vector class instance
+
+        NOTES
+        ======
+        The softplus is computed by numpy.logaddexp(0, x), which is exact for large x where exp(x) would
+        overflow, and its derivative is the sigmoid of x.
+        """
+        return _apply(x, *ELEMENTARY['softplus'])
+
+    @staticmethod
+    def logsumexp(x):
+        """
+        Returns a constant, Scalar, or Vector object that is the log of the sum of the exponentials of the
+        elements of the user specified value.
+
+        INPUTS
+        =======
+        val: real valued numeric type or array
+
+        RETURNS
+        =======
+        constant, Scalar or Vector class instance
+
+        NOTES
+        ======
+        The exponentials are shifted by the largest element, so the result does not overflow.  For a Vector
+        the result is a Vector of length 1, whose jacobians are the softmax of the elements times the
+        jacobians of the input, computed with one matrix product each.  The logsumexp of a Scalar is the
+        Scalar itself.
         """
-        self.setdefault(idx, 0)
-        return dict.__getitem__(self, idx)
+        if isinstance(x, Vector):
+            return x._product(_logsumexp(x._val), _softmax(x._val)[np.newaxis])
+        if type(x) in _registry:
+            return x
+        return _logsumexp(x)
@@ -1,13 +1,20 @@
 import numpy as np
 from Dotua.nodes.rscalar import rScalar
 from Dotua.nodes.rvector import rVector
+from Dotua.nodes.rtensor import rTensor
+from Dotua.tape import Tape
+from Dotua.dual import Dual, tangent
+from Dotua import derivatives, checkpointing
+from Dotua.trace import trace, optimize, CompiledFunction
 
 
 class rAutoDiff():
     def __init__(self):
-        self._func = None
+        # Keyed by id(func): the function, its Tape and the generation of
+        # the last backward pass run on that Tape
+        self._tapes = {}
 
-    def create_rscalar(self, vals):
+    def create_rscalar(self, vals, batched=False):
         '''
         Return rScalar object(s) with user defined value(s).
 
@@ -15,6 +22,10 @@ class rAutoDiff():
         ======
         vals: list of lists of floats, compulsory
             Value of the list of Vector variables
+        batched: boolean, optional, default value is False
+            If True, vals holds a batch of samples for each variable: a one
+            dimensional array for a single rScalar or a two dimensional
+            array with one row of samples per rScalar
 
         RETURNS
         ========
@@ -26,6 +37,8 @@ class rAutoDiff():
         POST:
             returns a list of vector variables with value defined in vals
         '''
+        if batched:
+            return self._create_batched(rScalar, vals, 1)
         try:
             rscalars = [None] * len(vals)
             for i in range(len(vals)):
@@ -37,7 +50,7 @@ class rAutoDiff():
             rscalar._init_roots()
             return rscalar
 
-    def create_rvector(self, vals):
+    def create_rvector(self, vals, batched=False):
         '''
         Return rScalar object(s) with user defined value(s).
 
@@ -45,6 +58,10 @@ class rAutoDiff():
         ======
         vals: list of lists of floats, compulsory
             Value of the list of Vector variables
+        batched: boolean, optional, default value is False
+            If True, vals holds a batch of samples for each variable: a two
+            dimensional array with one row per sample for a single rVector
+            or a three dimensional array of such batches
 
         RETURNS
         ========
@@ -56,6 +73,8 @@ class rAutoDiff():
         POST:
             returns a list of vector variables with value defined in vals
         '''
+        if batched:
+            return self._create_batched(rVector, vals, 2)
         try:
             rvectors = [None] * len(vals)
             for i in range(len(vals)):
@@ -67,7 +86,60 @@ class rAutoDiff():
             rvector._init_roots()
             return rvector
 
-    def partial(self, func, var):
+    def create_rtensor(self, vals):
+        '''
+        Return an rTensor object with user defined value.
+
+        INPUTS
+        ======
+        vals: array-like of floats of any shape, compulsory
+            Value of the rTensor variable, for instance a weight matrix
+
+        RETURNS
+        ========
+        A single rTensor variable
+
+        NOTES
+        =====
+        Unlike create_rscalar and create_rvector, the leading axis of vals is
+        never interpreted as a list of variables: vals is always the value of
+        one rTensor.
+        '''
+        rtensor = rTensor(vals)
+        rtensor._init_roots()
+        return rtensor
+
+    def _create_batched(self, node_type, vals, ndim):
+        '''
+        Return batched node(s) of node_type as requested by create_rscalar or
+        create_rvector.
+
+        INPUTS
+        =====
+        node_type: rScalar or rVector
+        vals: array-like of floats whose leading axis (after the variable
+            axis, if any) is the batch axis
+        ndim: number of dimensions of the value of a single batched node
+
+        RETURNS
+        =======
+        A node of node_type if vals has ndim dimensions, otherwise a list of
+        nodes, one for each entry of the leading axis of vals
+        '''
+        vals = np.asarray(vals, dtype=float)
+        if vals.ndim == ndim:
+            node = node_type(vals)
+            node._init_roots()
+            return node
+        if vals.ndim != ndim + 1:
+            raise ValueError("Batched values must have {} or {} "
+                             "dimensions.".format(ndim, ndim + 1))
+        nodes = [node_type(val) for val in vals]
+        for node in nodes:
+            node._init_roots()
+        return nodes
+
+    def partial(self, func, var, summed=False):
         '''
         Returns derivative of the function with regard to the given variable
 
@@ -75,35 +147,215 @@ class rAutoDiff():
         =====
         func: a function of rScalar variables
         var: an rScalar variable
+        summed: boolean, optional, default value is False
+            For a batched func, whether to sum the per-sample derivatives
+            over the leading batch axis
+
+        RETURNS
+        =======
+        A constant, which is the gradient of func with regarding to var.  If
+        func is batched the derivative of every sample is returned along a
+        leading batch axis, or their sum if summed is True.
+
+        NOTES
+        =====
+        The first call to partial (or gradient) for a given func records the
+        computational graph of func on a Tape and computes the derivatives of
+        func with respect to every variable in one reverse sweep.  The Tape
+        of every func is kept, so subsequent calls for the same func, even
+        when alternating with other functions, never walk its graph again.
+        They only look up the requested derivative, unless a backward pass
+        for another function has since overwritten it, in which case the
+        cached Tape is swept once more.
+        Because operations broadcast over the batch axis, a single traced
+        graph of a batched func yields the derivatives of all samples from
+        one reverse sweep, including for variables shared by every sample.
+        '''
+        # The cached entry holds func itself, so its id cannot be reused
+        entry = self._tapes.get(id(func))
+        if entry is None:
+            entry = self._tapes[id(func)] = [func, Tape(func), None]
+        _, tape, gen = entry
+        if var not in tape:
+            raise ValueError("User attempted to differentiate a function " +
+                             "respect to a variable on which it is not " +
+                             "defined.")
+        if var._gen != gen:
+            if np.ndim(func._val):
+                func._grad_val = np.ones(np.shape(func._val))
+            else:
+                func._grad_val = 1
+            entry[2] = tape.backward()
+        if summed:
+            return np.sum(var._grad_val, axis=0)
+        return var._grad_val
+
+    def gradient(self, func, vars, summed=False):
+        '''
+        Returns derivatives of the function with regard to all given variables
+
+        INPUTS
+        =====
+        func: a function of rScalar or rVector variables
+        vars: a list of rScalar or rVector variables, or a single variable
+        summed: boolean, optional, default value is False
+            For a batched func, whether to sum the per-sample derivatives
+            over the leading batch axis
 
         RETURNS
         =======
-        A constant, which is the gradient of func with regarding to var
+        A list with the derivative of func with regard to each variable in
+        vars, or a single derivative if vars is a single variable
+
+        NOTES
+        =====
+        All derivatives are obtained from a single backward traversal of the
+        computational graph of func, so the cost of this method scales with
+        the size of the graph rather than with the number of variables.
         '''
-        if (self._func != func):
-            if self._func is not None:
-                self._reset_universe(func)
-            self._func = func
         try:
-            func._grad_val = np.zeros(len(var._grad_val)) + 1
+            n = len(vars)
         except TypeError:
-            func._grad_val = 1
-        func.gradient(var)
-        return var._grad_val
+            return self.partial(func, vars, summed)
+        return [self.partial(func, vars[i], summed) for i in range(n)]
 
-    def _reset_universe(self, func):
+    def hvp(self, func, vars, v):
         '''
-        Reset gradients of nodes in computational graph before next computation
+        Returns the product of the Hessian of func with the vector v
 
         INPUTS
         =====
-        var: user defined input variable (rScalar)
+        func: a function of len(vars) rScalar arguments composed of
+            arithmetic operators and rOperator functions
+        vars: a list of rScalar variables, or a single rScalar variable, at
+            whose values the Hessian is evaluated
+        v: a list with one direction component per variable in vars, or a
+            single component if vars is a single variable
+
+        RETURNS
+        =======
+        A list with the entry of H·v corresponding to each variable in vars,
+        or a single entry if vars is a single variable
+
+        NOTES
+        =====
+        func is evaluated once on fresh rScalar variables whose values are
+        Dual numbers carrying the direction v as their tangent, and the
+        gradient is then obtained from a single reverse sweep.  Because the
+        local derivatives recorded on the graph are Dual numbers too, the
+        tangent of the gradient of each variable is the corresponding entry
+        of H·v (forward-over-reverse).  This costs roughly two gradient
+        evaluations and never forms the Hessian.  Batched rScalars are
+        supported, giving one Hessian-vector product per sample.
         '''
         try:
-            func._grad_val = np.zeros(len(func._grad_val))
+            n = len(vars)
+            single = False
         except TypeError:
-            func._grad_val = 0
-        for val in func._roots.values():
-            for child, _ in val:
-                if child is not None:
-                    self._reset_universe(child)
+            vars, v, n, single = [vars], [v], 1, True
+        if len(v) != n:
+            raise ValueError("hvp needs one direction component per " +
+                             "variable, got {} for {} variables."
+                             .format(len(v), n))
+        nodes = [rScalar(Dual(vars[i]._val, v[i])) for i in range(n)]
+        for node in nodes:
+            node._init_roots()
+        out = func(*nodes)
+        if isinstance(out, rScalar):
+            out._grad_val = 1
+            Tape(out).backward()
+        products = [np.zeros(np.shape(vars[i]._val)) +
+                    tangent(nodes[i]._grad_val) for i in range(n)]
+        return products[0] if single else products
+
+    def jacobian(self, func, vars, sparse=False):
+        '''
+        Returns the Jacobian of func at the values of vars in reverse mode
+
+        INPUTS
+        =====
+        func: a function of len(vars) scalar arguments composed of
+            arithmetic operators and rOperator functions, returning a list of
+            m values (or a single value)
+        vars: a list of rScalar variables (or numbers) at whose values the
+            Jacobian is evaluated
+        sparse: boolean, optional, default value is False
+            Whether to return a scipy.sparse CSR matrix instead of a dense
+            NumPy array
+
+        RETURNS
+        =======
+        A NumPy array or scipy.sparse CSR matrix of shape (m, len(vars))
+
+        NOTES
+        =====
+        func is traced once (see Dotua.trace) and the sparsity pattern of its
+        Jacobian is read from the traced program.  The rows are colored so
+        that rows sharing a color never have a nonzero in the same column
+        (see Dotua.coloring), and a single reverse sweep whose adjoints hold
+        one component per color yields all the compressed rows at once.
+        This suits functions with few or structurally independent outputs.
+        '''
+        return derivatives.jacobian(func, vars, 'reverse', sparse)
+
+    def compile(self, fn, n_inputs):
+        '''
+        Returns a callable evaluating fn and its gradient in reverse mode
+
+        INPUTS
+        =====
+        fn: a function of n_inputs scalar arguments composed of arithmetic
+            operators and rOperator functions, returning a single value
+        n_inputs: the number of arguments of fn
+
+        RETURNS
+        =======
+        A CompiledFunction; calling it with n_inputs numbers returns the value
+        of fn and a NumPy array of the derivatives of fn with respect to each
+        input
+
+        NOTES
+        =====
+        fn is traced once into a flat instruction list (see Dotua.trace),
+        from which repeated subexpressions, constant subexpressions and
+        additions of 0 or multiplications by 1 are removed.  Each call of the
+        compiled function replays the instructions on plain numbers and then
+        obtains every derivative in a single reverse sweep over the list,
+        without building rScalar objects or a Tape.  Inputs may also be NumPy
+        arrays of points, which are evaluated as a batch.  fn cannot branch
+        on the values of its arguments, since the placeholders it is traced
+        with define no comparison operators: a comparison such as x > 0
+        raises a TypeError.  A ValueError is raised if fn returns a list or
+        tuple.
+        '''
+        return CompiledFunction(optimize(trace(fn, n_inputs)), 'reverse')
+
+    def checkpoint(self, fn, *args):
+        '''
+        Returns fn(*args), recomputing the intermediate nodes of fn during
+        the backward pass instead of storing them
+
+        INPUTS
+        =====
+        fn: a function of the arguments args composed of arithmetic
+            operators and rOperator functions, returning an rScalar, rVector
+            or rTensor, or a list or tuple of them
+        args: rScalar, rVector or rTensor variables (or constants) on which
+            fn is evaluated
+
+        RETURNS
+        =======
+        The value of fn(*args), as nodes that can be used like any other
+        rScalar, rVector or rTensor
+
+        NOTES
+        =====
+        Only the arguments and the values of the outputs of fn remain on the
+        computational graph; fn is evaluated a second time when partial or
+        gradient reaches it (see Dotua.checkpointing).  Splitting a long
+        recurrence into checkpointed segments of k steps therefore keeps
+        about one node per segment alive plus the k steps of one segment
+        during the backward pass, at the cost of evaluating every step twice.
+        fn must receive every variable it depends on through args.
+        '''
+        return checkpointing.checkpoint(fn, *args)
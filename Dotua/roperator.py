@@ -1,7 +1,55 @@
-import math
 import numpy as np
+from Dotua.elementary import ELEMENTARY, _logsumexp, _softmax
+from Dotua.trace import Tracer, trace_elementary
 from Dotua.nodes.rscalar import rScalar
 from Dotua.nodes.rvector import rVector
+from Dotua.nodes.rtensor import rTensor, _VJP, _axes, _unbroadcast
+
+
+def _constant(x, value, derivative, *args):
+    """Return value applied to the constant x."""
+    return value(x, *args)
+
+
+def _node(x, value, derivative, *args):
+    """
+    Return a new node of the type of x with value value(x), recording x as
+    its child with local derivative derivative(x).
+    """
+    new_child = type(x)(value(x._val, *args))
+    new_child._children = ((x, derivative(x._val, *args)),)
+    return new_child
+
+
+# Implementation of the elementary functions for each reverse mode node
+# type (and for the Tracer used by rAutoDiff.compile); any other type is
+# treated as a constant.
+_registry = {rScalar: _node, rVector: _node, rTensor: _node,
+             Tracer: trace_elementary}
+
+
+def _apply(x, value, derivative, *args):
+    """
+    Apply the elementary function (value, derivative) to x.
+
+    INPUTS
+    =======
+    x: constant, rScalar or rVector class instance
+    value: function returning the value of the elementary function
+    derivative: function returning the derivative of the elementary function
+    args: extra arguments passed to both value and derivative
+
+    RETURNS
+    =======
+    constant, rScalar or rVector class instance
+
+    NOTES
+    ======
+    The implementation is selected with a single lookup of the type of x in
+    _registry rather than by probing attributes of x and catching the
+    resulting exceptions.
+    """
+    return _registry.get(type(x), _constant)(x, value, derivative, *args)
 
 
 class rOperator:
@@ -18,6 +66,9 @@ class rOperator:
         $ from rautodiff.roperator import rOperator as rop
         $ y = rop.sin(x)
 
+    Every elementary function is declared once, as a (value, derivative)
+    pair in Dotua.elementary.ELEMENTARY, and dispatched on the type of its
+    argument through a registry mapping node types to implementations.
     """
     @staticmethod
     def sin(x):
@@ -39,20 +90,7 @@ class rOperator:
         operator function, in this case the sine function. The parent is then linked to the child
         for later backpropagation and the parent is returned as a new rScalar object.
         """
-        try:
-            x._rscalars
-            new_child = rVector(np.sin(x._val))
-            for input_var in x._roots.keys():
-                new_child._roots[input_var] = [(x, np.cos(x._val))]
-            return new_child
-        except AttributeError:
-            try:
-                new_child = rScalar(np.sin(x._val))
-                for input_var in x._roots.keys():
-                    new_child._roots[input_var] = [(x, np.cos(x._val))]
-                return new_child
-            except AttributeError:
-                return np.sin(x)
+        return _apply(x, *ELEMENTARY['sin'])
 
     @staticmethod
     def cos(x):
@@ -74,20 +112,7 @@ class rOperator:
         operator function, in this case the cosine function. The parent is then linked to the child
         for later backpropagation and the parent is returned as a new rScalar object.
         """
-        try:
-            x._rscalars
-            new_child = rVector(np.cos(x._val))
-            for input_var in x._roots.keys():
-                new_child._roots[input_var] = [(x, -np.sin(x._val))]
-            return new_child
-        except AttributeError:
-            try:
-                new_child = rScalar(np.cos(x._val))
-                for input_var in x._roots.keys():
-                    new_child._roots[input_var] = [(x, -np.sin(x._val))]
-                return new_child
-            except AttributeError:
-                return np.cos(x)
+        return _apply(x, *ELEMENTARY['cos'])
 
     @staticmethod
     def tan(x):
@@ -109,21 +134,7 @@ class rOperator:
         operator function, in this case the tangent function. The parent is then linked to the child
         for later backpropagation and the parent is returned as a new rScalar object.
         """
-        try:
-            x._rscalars
-            new_child = rVector(np.tan(x._val))
-            for input_var in x._roots.keys():
-                new_child._roots[input_var] = [(x, np.arccos(x._val)**2)]
-            return new_child
-        except AttributeError:
-            try:
-                new_child = rScalar(np.tan(x._val))
-                for input_var in x._roots.keys():
-                    new_child._roots[input_var] = [(x, np.arccos(x._val)**2)]
-                return new_child
-
-            except AttributeError:
-                return np.tan(x)
+        return _apply(x, *ELEMENTARY['tan'])
 
     @staticmethod
     def arcsin(x):
@@ -145,21 +156,7 @@ class rOperator:
         operator function, in this case the arcsine function. The parent is then linked to the child
         for later backpropagation and the parent is returned as a new rScalar object.
         """
-        try:
-            x._rscalars
-            new_child = rVector(np.arcsin(x._val))
-            for input_var in x._roots.keys():
-                new_child._roots[input_var] = [(x, -np.arcsin(x._val)*np.arctan(x._val))]
-            return new_child
-        except AttributeError:
-            try:
-                new_child = rScalar(np.arcsin(x._val))
-                for input_var in x._roots.keys():
-                    new_child._roots[input_var] = [(x, -np.arcsin(x._val)*np.arctan(x._val))]
-                return new_child
-
-            except AttributeError:
-                return np.arcsin(x)
+        return _apply(x, *ELEMENTARY['arcsin'])
 
     @staticmethod
     def arccos(x):
@@ -181,21 +178,7 @@ class rOperator:
         operator function, in this case the arccosine function. The parent is then linked to the child
         for later backpropagation and the parent is returned as a new rScalar object.
         """
-        try:
-            x._rscalars
-            new_child = rVector(np.arccos(x._val))
-            for input_var in x._roots.keys():
-                new_child._roots[input_var] = [(x, np.arccos(x._val)*np.tan(x._val))]
-            return new_child
-        except AttributeError:
-            try:
-                new_child = rScalar(np.arccos(x._val))
-                for input_var in x._roots.keys():
-                    new_child._roots[input_var] = [(x, np.arccos(x._val)*np.tan(x._val))]
-                return new_child
-
-            except AttributeError:
-                return np.arccos(x)
+        return _apply(x, *ELEMENTARY['arccos'])
 
     @staticmethod
     def arctan(x):
@@ -217,21 +200,7 @@ class rOperator:
         operator function, in this case the arctan function. The parent is then linked to the child
         for later backpropagation and the parent is returned as a new rScalar object.
         """
-        try:
-            x._rscalars
-            new_child = rVector(np.arctan(x._val))
-            for input_var in x._roots.keys():
-                new_child._roots[input_var] = [(x, -np.arcsin(x._val)**2)]
-            return new_child
-        except AttributeError:
-            try:
-                new_child = rScalar(np.arctan(x._val))
-                for input_var in x._roots.keys():
-                    new_child._roots[input_var] = [(x, -np.arcsin(x._val)**2)]
-                return new_child
-
-            except AttributeError:
-                return np.arctan(x)
+        return _apply(x, *ELEMENTARY['arctan'])
 
     @staticmethod
     def sinh(x):
@@ -253,21 +222,7 @@ class rOperator:
         operator function, in this case the sinh function. The parent is then linked to the child
         for later backpropagation and the parent is returned as a new rScalar object.
         """
-        try:
-            x._rscalars
-            new_child = rVector(np.sinh(x._val))
-            for input_var in x._roots.keys():
-                new_child._roots[input_var] = [(x, np.cosh(x._val))]
-            return new_child
-        except AttributeError:
-            try:
-                new_child = rScalar(np.sinh(x._val))
-                for input_var in x._roots.keys():
-                    new_child._roots[input_var] = [(x, np.cosh(x._val))]
-                return new_child
-
-            except AttributeError:
-                return np.sinh(x)
+        return _apply(x, *ELEMENTARY['sinh'])
 
     @staticmethod
     def cosh(x):
@@ -289,21 +244,7 @@ class rOperator:
         operator function, in this case the cosh function. The parent is then linked to the child
         for later backpropagation and the parent is returned as a new rScalar object.
         """
-        try:
-            x._rscalars
-            new_child = rVector(np.cosh(x._val))
-            for input_var in x._roots.keys():
-                new_child._roots[input_var] = [(x, np.sinh(x._val))]
-            return new_child
-        except AttributeError:
-            try:
-                new_child = rScalar(np.cosh(x._val))
-                for input_var in x._roots.keys():
-                    new_child._roots[input_var] = [(x, np.sinh(x._val))]
-                return new_child
-
-            except AttributeError:
-                return np.cosh(x)
+        return _apply(x, *ELEMENTARY['cosh'])
 
     @staticmethod
     def tanh(x):
@@ -325,21 +266,7 @@ class rOperator:
         operator function, in this case the tanh function. The parent is then linked to the child
         for later backpropagation and the parent is returned as a new rScalar object.
         """
-        try:
-            x._rscalars
-            new_child = rVector(np.tanh(x._val))
-            for input_var in x._roots.keys():
-                new_child._roots[input_var] = [(x, (1-np.tanh(x._val)**2))]
-            return new_child
-        except AttributeError:
-            try:
-                new_child = rScalar(np.tanh(x._val))
-                for input_var in x._roots.keys():
-                    new_child._roots[input_var] = [(x, (1-np.tanh(x._val)**2))]
-                return new_child
-
-            except AttributeError:
-                return np.tanh(x)
+        return _apply(x, *ELEMENTARY['tanh'])
 
     @staticmethod
     def arcsinh(x):
@@ -361,21 +288,7 @@ class rOperator:
         operator function, in this case the arcsinh function. The parent is then linked to the child
         for later backpropagation and the parent is returned as a new rScalar object.
         """
-        try:
-            x._rscalars
-            new_child = rVector(np.arcsinh(x._val))
-            for input_var in x._roots.keys():
-                new_child._roots[input_var] = [(x, -np.arcsinh(x._val)*np.arctanh(x._val))]
-            return new_child
-        except AttributeError:
-            try:
-                new_child = rScalar(np.arcsinh(x._val))
-                for input_var in x._roots.keys():
-                    new_child._roots[input_var] = [(x, -np.arcsinh(x._val)*np.arctanh(x._val))]
-                return new_child
-
-            except AttributeError:
-                return np.arcsinh(x)
+        return _apply(x, *ELEMENTARY['arcsinh'])
 
     @staticmethod
     def arccosh(x):
@@ -397,21 +310,7 @@ class rOperator:
         operator function, in this case the arccosh function. The parent is then linked to the child
         for later backpropagation and the parent is returned as a new rScalar object.
         """
-        try:
-            x._rscalars
-            new_child = rVector(np.arccosh(x._val))
-            for input_var in x._roots.keys():
-                new_child._roots[input_var] = [(x, -np.arccosh(x._val)*np.tanh(x._val))]
-            return new_child
-        except AttributeError:
-            try:
-                new_child = rScalar(np.arccosh(x._val))
-                for input_var in x._roots.keys():
-                    new_child._roots[input_var] = [(x, -np.arccosh(x._val)*np.tanh(x._val))]
-                return new_child
-
-            except AttributeError:
-                return np.arccosh(x)
+        return _apply(x, *ELEMENTARY['arccosh'])
 
     @staticmethod
     def arctanh(x):
@@ -433,21 +332,7 @@ class rOperator:
         operator function, in this case the arctanh function. The parent is then linked to the child
         for later backpropagation and the parent is returned as a new rScalar object.
         """
-        try:
-            x._rscalars
-            new_child = rVector(np.arctanh(x._val))
-            for input_var in x._roots.keys():
-                new_child._roots[input_var] = [(x, (1-np.arctanh(x._val)**2))]
-            return new_child
-        except AttributeError:
-            try:
-                new_child = rScalar(np.arctanh(x._val))
-                for input_var in x._roots.keys():
-                    new_child._roots[input_var] = [(x, (1-np.arctanh(x._val)**2))]
-                return new_child
-
-            except AttributeError:
-                return np.arctanh(x)
+        return _apply(x, *ELEMENTARY['arctanh'])
 
     @staticmethod
     def exp(x):
@@ -469,21 +354,7 @@ class rOperator:
         operator function, in this case the exponential function. The parent is then linked to the child
         for later backpropagation and the parent is returned as a new rScalar object.
         """
-        try:
-            x._rscalars
-            new_child = rVector(np.exp(x._val))
-            for input_var in x._roots.keys():
-                new_child._roots[input_var] = [(x, np.exp(x._val))]
-            return new_child
-        except AttributeError:
-            try:
-                new_child = rScalar(np.exp(x._val))
-                for input_var in x._roots.keys():
-                    new_child._roots[input_var] = [(x, np.exp(x._val))]
-                return new_child
-
-            except AttributeError:
-                return np.exp(x)
+        return _apply(x, *ELEMENTARY['exp'])
 
     @staticmethod
     def log(x, base=np.exp(1)):
@@ -505,18 +376,94 @@ class rOperator:
         operator function, in this case the log function. The parent is then linked to the child
         for later backpropagation and the parent is returned as a new rScalar object.
         """
-        try:
-            x._rscalars
-            new_child = rVector(np.log(x._val) / np.log(base))
-            for input_var in x._roots.keys():
-                new_child._roots[input_var] = [(x, 1 / (x._val * math.log(base)))]
+        return _apply(x, *ELEMENTARY['log'], base)
+
+    @staticmethod
+    def sigmoid(x):
+        """
+        Returns a constant/rScalar/rVector object that is the logistic sigmoid 1 / (1 + exp(-x)) of the
+        user specified value.
+
+        INPUTS
+        =======
+        val: real valued numeric type
+
+        RETURNS
+        =======
+        constant or rScalar class instance
+
+        NOTES
+        ======
+        The sigmoid records a single parent node instead of the four nodes of 1 / (1 + exp(-x)).  Its
+        value is computed by scipy.special.expit, which never overflows, and its local derivative is
+        sigmoid(x) * (1 - sigmoid(x)).
+        """
+        return _apply(x, *ELEMENTARY['sigmoid'])
+
+    @staticmethod
+    def softplus(x):
+        """
+        Returns a constant/rScalar/rVector object that is the softplus log(1 + exp(x)) of the user
+        specified value.
+
+        INPUTS
+        =======
+        val: real valued numeric type
+
+        RETURNS
+        =======
+        constant or rScalar class instance
+
+        NOTES
+        ======
+        The softplus records a single parent node.  Its value is computed by numpy.logaddexp(0, x), which
+        is exact for large x where exp(x) would overflow, and its local derivative is the sigmoid of x.
+        """
+        return _apply(x, *ELEMENTARY['softplus'])
+
+    @staticmethod
+    def logsumexp(x, axis=None):
+        """
+        Returns a constant/rScalar/rVector object that is the log of the sum of the exponentials of the
+        entries of the user specified value.
+
+        INPUTS
+        =======
+        val: real valued numeric type or array
+        axis: int or tuple of ints, optional, default value is None
+            Axes reduced for rTensor and constant inputs, as numpy.sum; every axis by default
+
+        RETURNS
+        =======
+        constant, rScalar, rVector or rTensor class instance
+
+        NOTES
+        ======
+        The exponentials are shifted by the largest entry, so the result does not overflow.  An rVector is
+        reduced over its trailing axis, keeping it with length 1, so an rVector of length n gives an
+        rVector of length 1 and a batched rVector gives one logsumexp per sample.  The result is a single
+        parent node whose local derivative is the softmax of the reduced entries, applied to the adjoint
+        of the result summed over the axes along which it was broadcast, so that expressions such as the
+        log-softmax x - logsumexp(x) are differentiated correctly.  The logsumexp of an rScalar is the
+        rScalar itself.
+        """
+        if isinstance(x, rVector):
+            softmax = _softmax(x._val, axis=-1)
+            new_child = rVector(_logsumexp(x._val, axis=-1, keepdims=True))
+            shape = new_child._val.shape
+            # rVector arithmetic broadcasts the result without reducing its
+            # adjoint, so sum the adjoint back to the shape of the result
+            new_child._children = \
+                ((x, _VJP(lambda g: _unbroadcast(g + np.zeros(shape), shape) *
+                          softmax)),)
+            return new_child
+        if isinstance(x, rTensor):
+            softmax = _softmax(x._val, axis)
+            axes = _axes(axis, x._val.ndim)
+            new_child = rTensor(_logsumexp(x._val, axis))
+            new_child._children = \
+                ((x, _VJP(lambda g: np.expand_dims(g, axes) * softmax)),)
             return new_child
-        except AttributeError:
-            try:
-                new_child = rScalar(math.log(x._val, base))
-                for input_var in x._roots.keys():
-                    new_child._roots[input_var] = [(x, 1 / (x._val * math.log(base)))]
-                return new_child
-
-            except AttributeError:
-                return math.log(x, base)
+        if type(x) in _registry:
+            return x
+        return _logsumexp(x, axis)
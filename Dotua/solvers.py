@@ -0,0 +1,141 @@
+import numpy as np
+import scipy.linalg
+from Dotua.autodiff import AutoDiff
+from Dotua.nodes.vector import Vector
+
+
+class NewtonResult():
+    """
+    Outcome of a call to newton.
+
+    A NewtonResult holds the last iterate x, the value f of the function at
+    x, whether the iteration converged, the number of Newton steps taken
+    (iterations), the number of evaluations of the function (evaluations),
+    each evaluation returning both its value and its jacobian, and the list
+    steps of (x, f) pairs visited before the last iterate.
+    """
+
+    def __init__(self, x, f, converged, iterations, evaluations, steps):
+        self.x = x
+        self.f = f
+        self.converged = converged
+        self.iterations = iterations
+        self.evaluations = evaluations
+        self.steps = steps
+
+    def __repr__(self):
+        return ('NewtonResult(x={}, converged={}, iterations={}, '
+                'evaluations={})'.format(self.x, self.converged,
+                                         self.iterations, self.evaluations))
+
+
+def _evaluate(func, x):
+    """
+    Return the value and jacobian of func at x from a single evaluation.
+
+    INPUTS
+    =======
+    func: function of a Scalar (if x is a number) or of a Vector (if x is an
+          array), returning a Scalar, a Vector, a list of Scalars built from
+          the elements of its argument, or constants
+    x: float or one dimensional numpy array
+
+    RETURNS
+    =======
+    (f, J): value of func at x and its jacobian, as floats if x is a number
+            and as a numpy array and a two dimensional numpy array otherwise
+    """
+    if np.ndim(x) == 0:
+        var = AutoDiff.create_scalar(x)
+        out = func(var)
+        try:
+            return out.eval(), out.partial(var)
+        except AttributeError:
+            return out, 0.0
+    var = AutoDiff.create_vector([x])[0]
+    out = func(var)
+    if isinstance(out, Vector):
+        derivatives = out._derivatives()
+        if var in derivatives:
+            jacobian = np.asarray(derivatives[var], dtype=float)
+        else:
+            jacobian = np.zeros((len(out._val), len(x)))
+        return np.asarray(out._val, dtype=float), jacobian
+    f = np.zeros(len(out))
+    jacobian = np.zeros((len(out), len(x)))
+    for i, out_i in enumerate(out):
+        try:
+            f[i] = out_i.eval()
+            jacobian[i] = [out_i.partial(var[j]) for j in range(len(x))]
+        except AttributeError:
+            f[i] = out_i
+    return f, jacobian
+
+
+def newton(func, x0, tol=1e-12, maxiters=100, damping=1.0,
+           line_search=False, max_backtracks=30):
+    """
+    Return a root of func found by Newton's method.
+
+    INPUTS
+    =======
+    func: function composed of arithmetic operators and Operator functions.
+          For a scalar x0, func takes a Scalar and returns a Scalar.  For an
+          array x0, func takes a Vector x and returns either a Vector
+          (elementwise systems) or a list of Scalars built from the elements
+          x[i] of its argument (coupled systems), one per equation.
+    x0: float or list of floats, the initial guess
+    tol: float, optional, default value is 1e-12
+         The iteration stops once every entry of func is at most tol in
+         absolute value
+    maxiters: int, optional, default value is 100
+              Maximum number of Newton steps
+    damping: float, optional, default value is 1.0
+             Fraction of the Newton step taken at each iteration
+    line_search: bool, optional, default value is False
+                 Whether to halve the (damped) step until the norm of func
+                 decreases sufficiently
+    max_backtracks: int, optional, default value is 30
+                    Maximum number of halvings per line search
+
+    RETURNS
+    =======
+    NewtonResult instance
+
+    NOTES
+    ======
+    Every evaluation of func runs in forward mode and yields the value and
+    the jacobian of func together, so each Newton step costs a single
+    evaluation (plus one per rejected line search trial).  Systems are
+    solved with a dense LAPACK solve of the jacobian.  A singular jacobian
+    raises a numpy.linalg.LinAlgError in the multivariate case and a
+    ZeroDivisionError in the scalar case.
+    """
+    scalar = np.ndim(x0) == 0
+    x = float(x0) if scalar else np.array(x0, dtype=float)
+    f, jacobian = _evaluate(func, x)
+    evaluations = 1
+    steps = []
+    for iteration in range(maxiters):
+        if np.max(np.abs(f)) <= tol:
+            return NewtonResult(x, f, True, iteration, evaluations, steps)
+        steps.append((x, f))
+        if scalar:
+            if jacobian == 0:
+                raise ZeroDivisionError("Newton step with zero derivative.")
+            step = f / jacobian
+        else:
+            step = scipy.linalg.solve(jacobian, f)
+        norm = np.linalg.norm(f)
+        alpha = damping
+        for _ in range(max_backtracks + 1):
+            x_new = x - alpha * step
+            f_new, jacobian_new = _evaluate(func, x_new)
+            evaluations += 1
+            if (not line_search or
+                    np.linalg.norm(f_new) <= (1 - 1e-4 * alpha) * norm):
+                break
+            alpha = alpha / 2
+        x, f, jacobian = x_new, f_new, jacobian_new
+    converged = bool(np.max(np.abs(f)) <= tol)
+    return NewtonResult(x, f, converged, maxiters, evaluations, steps)
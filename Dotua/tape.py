@@ -0,0 +1,176 @@
+import itertools
+from numbers import Number
+import numpy as np
+
+
+# Source of the stamps identifying backward passes; 0 is never issued so
+# that freshly created nodes are always stale.
+_generations = itertools.count(1)
+
+
+class Tape():
+    """
+    Flat record of the computational graph underlying a reverse mode function.
+
+    Every rScalar and rVector operation records its operands (children) and
+    the local derivatives of the result with respect to them in the
+    _children attribute of the node it creates.  A Tape linearizes the graph
+    reachable from one output node into flat lists: the nodes in topological
+    order (inputs first, output last), and for each node the tape indices of
+    its children and the matching local derivatives.  A single reverse sweep
+    over these lists accumulates the adjoint of the output with respect to
+    every node of the graph at once, so obtaining the full gradient of a
+    function costs O(graph size) regardless of how many input variables it
+    has.
+
+    Array adjoints that receive several contributions are accumulated in
+    place.  The Tape keeps a scratch array per adjoint shape (its arena),
+    reused by every backward pass over the same Tape, so adding a
+    contribution allocates no temporaries.
+    """
+
+    def __init__(self, output):
+        """
+        Return a Tape recording the graph on which output depends.
+
+        INPUTS
+        =======
+        output: rScalar or rVector instance, the function to differentiate
+
+        RETURNS
+        =======
+        Tape class instance
+
+        NOTES
+        ======
+        The graph is traversed depth first with an explicit stack, so the
+        depth of the graph is not limited by the Python recursion limit, and
+        each node is recorded exactly once no matter how many paths lead to
+        it.
+        """
+        nodes = []
+        index = {}
+        visited = set()
+        stack = [output]
+        while stack:
+            node = stack[-1]
+            if node in index:
+                stack.pop()
+            elif node in visited:
+                # All children of node have been recorded
+                stack.pop()
+                index[node] = len(nodes)
+                nodes.append(node)
+            else:
+                visited.add(node)
+                for child, _ in node._children:
+                    if child not in visited:
+                        stack.append(child)
+        self._nodes = nodes
+        self._index = index
+        self._children = [tuple(index[child] for child, _ in node._children)
+                          for node in nodes]
+        self._ders = [tuple(der for _, der in node._children)
+                      for node in nodes]
+        self._arena = {}  # scratch arrays keyed by shape, created on demand
+
+    def __contains__(self, node):
+        """Return whether node is part of the recorded graph."""
+        return node in self._index
+
+    def __len__(self):
+        """Return the number of nodes in the recorded graph."""
+        return len(self._nodes)
+
+    def backward(self):
+        """
+        Accumulate the adjoints of all recorded nodes in one reverse sweep.
+
+        INPUTS
+        =======
+        self: Tape class instance
+
+        RETURNS
+        =======
+        generation: integer stamp identifying this backward pass
+
+        NOTES
+        ======
+        The caller seeds the _grad_val of the output node (the last node of
+        the tape) before calling this method.  Every recorded node is then
+        left with its _grad_val set to the derivative of the output with
+        respect to that node and its _gen attribute set to the returned
+        generation.  Instead of zeroing the graph before the sweep, a node
+        whose _gen differs from the current generation is treated as having
+        an adjoint of zero: its first contribution overwrites the stale
+        _grad_val and stamps the node, and later contributions accumulate.
+        Nodes therefore need no zeroed adjoint array until a backward pass
+        reaches them.  Later contributions are added in place (see
+        _accumulate) when the first one produced a new float array, which
+        is then owned by this pass; adjoints that may alias other arrays are
+        never modified.
+        """
+        generation = next(_generations)
+        nodes = self._nodes
+        nodes[-1]._gen = generation
+        owned = set()  # tape indices of the adjoints this pass may overwrite
+        for i in range(len(nodes) - 1, -1, -1):
+            adjoint = nodes[i]._grad_val
+            for index, der in zip(self._children[i], self._ders[i]):
+                child = nodes[index]
+                if child._gen != generation:
+                    grad = adjoint * der
+                    child._gen = generation
+                elif index in owned:
+                    grad = self._accumulate(child._grad_val, adjoint, der)
+                else:
+                    grad = child._grad_val + adjoint * der
+                child._grad_val = grad
+                if _fresh(grad):
+                    owned.add(index)
+        return generation
+
+    def _accumulate(self, grad, adjoint, der):
+        """
+        Return grad + adjoint * der, computed in place in grad if possible.
+
+        INPUTS
+        =======
+        grad: numpy array allocated by the current backward pass
+        adjoint: adjoint of the parent node
+        der: local derivative of the parent node with respect to the child
+
+        RETURNS
+        =======
+        grad, or a new object if the sum cannot be stored in grad (because
+        it broadcasts to a larger shape or is not a float array, as for Dual
+        adjoints)
+
+        NOTES
+        ======
+        Elementwise derivatives are multiplied into the scratch array of the
+        arena matching the shape of grad; other derivatives (the
+        vector-Jacobian products of rTensor) compute their own product.
+        """
+        try:
+            if isinstance(der, (np.ndarray, Number)):
+                contribution = self._arena.get(grad.shape)
+                if contribution is None:
+                    contribution = np.empty(grad.shape)
+                    self._arena[grad.shape] = contribution
+                np.multiply(adjoint, der, out=contribution)
+            else:
+                contribution = adjoint * der
+            return np.add(grad, contribution, out=grad)
+        except (TypeError, ValueError):
+            return grad + adjoint * der
+
+
+def _fresh(grad):
+    """
+    Return whether grad is a float array that owns its memory, and so was
+    just allocated by an arithmetic operation rather than being a view of
+    another adjoint (as returned by the transpose and reshape of rTensor).
+    """
+    return (type(grad) is np.ndarray and grad.base is None and
+            grad.dtype == float)
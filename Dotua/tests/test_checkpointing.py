@@ -0,0 +1,105 @@
+'''
+This file tests checkpointed segments of reverse mode computations.
+'''
+from Dotua.rautodiff import rAutoDiff
+from Dotua.roperator import rOperator as rop
+from Dotua.checkpointing import checkpoint
+from Dotua.nodes.rscalar import rScalar
+from Dotua.nodes.rvector import rVector
+from Dotua.tape import Tape
+import numpy as np
+
+
+def step(x, a):
+    return rop.sin(x) * a + x * 0.5
+
+
+def segment(x, a):
+    for _ in range(10):
+        x = step(x, a)
+    return x
+
+
+def test_recurrence():
+    rad = rAutoDiff()
+    x0, a = rad.create_rscalar([0.3, 1.2])
+    x = x0
+    for _ in range(5):
+        x = segment(x, a)
+    expected = rad.gradient(x, [x0, a])
+
+    y = x0
+    for _ in range(5):
+        y = rad.checkpoint(segment, y, a)
+    assert y.eval() == x.eval()
+    # Only the segment outputs remain between the inputs and the result
+    assert len(Tape(y)) == 2 + 5 * 2
+    assert np.allclose(rad.gradient(y, [x0, a]), expected)
+    # A later backward pass recomputes the segments again
+    rad.partial(x, a)
+    assert np.allclose(rad.gradient(y, [x0, a]), expected)
+
+
+def test_vectors():
+    rad = rAutoDiff()
+    x, = rad.create_rvector([[0.5, 1.0, 1.5]])
+
+    def pair(x, c):
+        return (rop.exp(x) * c, x * x, 2.0)
+
+    u, v, c = checkpoint(pair, x, 3.0)
+    assert c == 2.0
+    assert np.allclose(u.eval(), 3 * np.exp(x._val))
+    # v is never used, so its adjoint is not seeded
+    f = u * 2
+    f._grad_val = 1
+    assert np.allclose(f.gradient(x), 6 * np.exp(x._val))
+    g = u + v
+    g._grad_val = 1
+    assert np.allclose(g.gradient(x), 3 * np.exp(x._val) + 2 * x._val)
+
+
+def test_tensors():
+    rad = rAutoDiff()
+    W = rad.create_rtensor([[1., 2.], [3., 4.]])
+    b = rad.create_rtensor([0.5, -0.5])
+
+    def layer(W, b):
+        return rop.tanh(W @ np.ones(2) + b)
+
+    f = rad.checkpoint(layer, W, b).sum()
+    expected = rad.gradient(layer(W, b).sum(), [W, b])
+    assert np.allclose(rad.gradient(f, [W, b])[0], expected[0])
+    assert np.allclose(rad.gradient(f, [W, b])[1], expected[1])
+
+
+def test_nested_and_repeated_arguments():
+    x = rScalar(0.7)
+    x._init_roots()
+
+    def outer(x, y):
+        return checkpoint(lambda u, w: u * w + rop.sin(u), x, y) * y
+
+    # Identity segments and arguments passed twice
+    f = checkpoint(lambda u: u, checkpoint(outer, x, x))
+    f._grad_val = 1
+    assert np.isclose(f.gradient(x),
+                      3 * x._val ** 2 + np.sin(x._val) +
+                      x._val * np.cos(x._val))
+    # A segment that ignores one of its arguments
+    g = checkpoint(lambda u, w: u * 2, x, rScalar(1.0)) + x
+    g._grad_val = 1
+    assert g.gradient(x) == 3
+
+
+def test_closure():
+    a = rScalar(2.0)
+    a._init_roots()
+    x = rVector([1.0, 2.0])
+    x._init_roots()
+    exception_raised = False
+    try:
+        checkpoint(lambda u: u * rop.sin(a), x)
+    except ValueError:
+        exception_raised = True
+    assert exception_raised
@@ -0,0 +1,77 @@
+'''
+This file tests the graph colorings used to compress sparse derivatives.
+'''
+from Dotua.coloring import star_coloring, column_coloring, transpose
+import itertools
+import numpy as np
+
+
+def random_pattern(n, density, rng):
+    pattern = [set([i]) for i in range(n)]
+    for i, j in itertools.combinations(range(n), 2):
+        if rng.random() < density:
+            pattern[i].add(j)
+            pattern[j].add(i)
+    return pattern
+
+
+def is_star_coloring(pattern, colors):
+    n = len(pattern)
+    adjacency = [[w for w in pattern[v] if w != v] for v in range(n)]
+    for v in range(n):
+        for w in adjacency[v]:
+            if colors[v] == colors[w]:
+                return False
+    # No path on four vertices may use only two colors
+    for a in range(n):
+        for b in adjacency[a]:
+            for c in adjacency[b]:
+                if c == a:
+                    continue
+                for d in adjacency[c]:
+                    if d in (a, b):
+                        continue
+                    if colors[a] == colors[c] and colors[b] == colors[d]:
+                        return False
+    return True
+
+
+def test_star_coloring():
+    rng = np.random.default_rng(0)
+    for n, density in [(1, 0), (10, 0.2), (30, 0.1), (30, 0.5)]:
+        pattern = random_pattern(n, density, rng)
+        colors = star_coloring(pattern)
+        assert len(colors) == n
+        assert is_star_coloring(pattern, colors)
+
+    # Diagonal and tridiagonal patterns need one and three colors
+    assert star_coloring([set([i]) for i in range(5)]).max() == 0
+    tridiagonal = [set([i - 1, i, i + 1]) & set(range(20)) for i in range(20)]
+    assert star_coloring(tridiagonal).max() == 2
+    # An arrowhead pattern needs only two colors
+    arrow = [set(range(10))] + [set([0, i]) for i in range(1, 10)]
+    assert star_coloring(arrow).max() == 1
+    assert not is_star_coloring(tridiagonal, [0, 1] * 10)
+    assert not is_star_coloring(tridiagonal, [0] * 20)
+
+
+def test_column_coloring():
+    rng = np.random.default_rng(1)
+    for m, n, density in [(1, 1, 1), (20, 10, 0.2), (10, 30, 0.3)]:
+        rows = [set(j for j in range(n) if rng.random() < density)
+                for i in range(m)]
+        colors = column_coloring(rows, n)
+        assert len(colors) == n
+        # Columns sharing a row have different colors
+        for row in rows:
+            assert len(set(colors[j] for j in row)) == len(row)
+        columns = transpose(rows, n)
+        assert all(i in columns[j] for i, row in enumerate(rows)
+                   for j in row)
+        assert sum(len(c) for c in columns) == sum(len(r) for r in rows)
+
+    # A tridiagonal matrix needs three colors, a diagonal matrix one
+    n = 100
+    tridiagonal = [set([i - 1, i, i + 1]) & set(range(n)) for i in range(n)]
+    assert column_coloring(tridiagonal, n).max() == 2
+    assert column_coloring([set([i]) for i in range(n)], n).max() == 0
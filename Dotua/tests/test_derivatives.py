@@ -0,0 +1,77 @@
+'''
+This file tests the mode independent derivative drivers.
+'''
+import Dotua
+from Dotua.derivatives import jacobian, select_mode
+from Dotua.operator import Operator as op
+from Dotua.trace import trace, optimize, jacobian_sparsity
+import numpy as np
+
+
+def pattern(fn, n):
+    return jacobian_sparsity(optimize(trace(fn, n)))
+
+
+def test_select_mode():
+    n = 20
+
+    # Gradients of scalar functions use reverse mode
+    def norm(*x):
+        return sum(xi * xi for xi in x)
+
+    mode, colors = select_mode(pattern(norm, n), n)
+    assert mode == 'reverse'
+    assert len(colors) == 1
+
+    # Functions of a single input use forward mode
+    def curve(t):
+        return [t ** k for k in range(n)]
+
+    mode, colors = select_mode(pattern(curve, 1), 1)
+    assert mode == 'forward'
+    assert len(colors) == 1
+
+    # A sum coupled with elementwise terms only compresses by rows
+    def coupled(*x):
+        return [op.sin(xi) for xi in x] + [norm(*x)]
+
+    mode, colors = select_mode(pattern(coupled, n), n)
+    assert mode == 'reverse'
+    assert colors.max() == 1
+
+    # Ties in the number of colors go to the mode seeding fewer components
+    mode, colors = select_mode(pattern(lambda x, y, z: [x + y, y + z], 3), 3)
+    assert mode == 'reverse'
+    assert colors.max() == 1
+    mode, colors = select_mode(pattern(lambda x, y: [x, x + y, y], 2), 2)
+    assert mode == 'forward'
+    assert colors.max() == 1
+
+    def banded(*u):
+        return [u[i - 1] - 2 * u[i] + u[(i + 1) % n] for i in range(n)]
+
+    mode, colors = select_mode(pattern(banded, n), n)
+    assert mode == 'forward'
+
+
+def test_jacobian():
+    n = 10
+    vals = np.linspace(0.5, 1.5, n)
+
+    def f(*x):
+        return [op.sin(xi) for xi in x] + [sum(xi * xi for xi in x)]
+
+    expected = np.zeros((n + 1, n))
+    expected[range(n), range(n)] = np.cos(vals)
+    expected[n] = 2 * vals
+    for mode in ('auto', 'forward', 'reverse'):
+        assert np.allclose(jacobian(f, vals, mode), expected)
+    assert np.allclose(Dotua.jacobian(f, vals, sparse=True).toarray(),
+                       expected)
+
+    exception_raised = False
+    try:
+        jacobian(f, vals, 'sideways')
+    except ValueError:
+        exception_raised = True
+    assert exception_raised
@@ -0,0 +1,56 @@
+'''
+This file tests the Dual numbers used for forward-over-reverse
+differentiation.
+'''
+from Dotua.dual import Dual, tangent, _UNARY
+from Dotua.elementary import ELEMENTARY
+import numpy as np
+
+
+def test_arithmetic():
+    x, y = Dual(2.0, 1.0), Dual(3.0, 0.5)
+    cases = [(x + y, 5, 1.5), (1 + x, 3, 1), (x - y, -1, 0.5),
+             (1 - x, -1, -1), (x * y, 6, 3 + 1), (2 * x, 4, 2),
+             (x / y, 2 / 3, 1 / 3 - 2 * 0.5 / 9), (1 / x, 0.5, -0.25),
+             (x ** 2, 4, 4), (2 ** x, 4, 4 * np.log(2)),
+             (x ** y, 8, 3 * 4 + 8 * np.log(2) * 0.5), (-x, -2, -1)]
+    for result, real, tan in cases:
+        assert np.isclose(result._real, real)
+        assert np.isclose(tangent(result), tan)
+    assert tangent(3.0) == 0
+    assert repr(x) == 'Dual(2.0, 1.0)'
+
+
+def test_ufuncs():
+    # Tangents follow the derivatives of the table of elementary functions,
+    # which agree with central differences of the ufuncs
+    for name, (value, derivative) in ELEMENTARY.items():
+        ufunc = np.log if name == 'log' else value
+        if ufunc in _UNARY:
+            assert _UNARY[ufunc] is derivative
+    h = 1e-6
+    for ufunc in _UNARY:
+        x = 1.5 if ufunc is np.arccosh else 0.5
+        result = ufunc(Dual(x, 2.0))
+        assert np.isclose(result._real, ufunc(x))
+        difference = (ufunc(x + h) - ufunc(x - h)) / (2 * h)
+        assert np.isclose(tangent(result), 2 * difference)
+    assert tangent(np.negative(Dual(0.5, 2.0))) == -2
+
+    # Binary ufuncs mixing arrays and Duals, including batched Duals
+    x = Dual(np.array([1.0, 2.0]), np.array([1.0, 1.0]))
+    result = np.array([3.0, 4.0]) * x + np.ones(2)
+    assert np.allclose(result._real, [4, 9])
+    assert np.allclose(tangent(result), [3, 4])
+    result = np.logaddexp(0, Dual(0.0, 2.0))
+    assert np.isclose(result._real, np.log(2))
+    assert np.isclose(tangent(result), 1.0)
+
+    # Unsupported ufuncs and methods are left to NumPy, which rejects them
+    for call in (lambda: np.floor(x), lambda: np.add.reduce(x)):
+        exception_raised = False
+        try:
+            call()
+        except TypeError:
+            exception_raised = True
+        assert exception_raised
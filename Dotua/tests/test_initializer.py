@@ -3,6 +3,10 @@ This file tests that the AutoDiff initializer functions defined in autodiff.py
 are correct.
 '''
 from Dotua.autodiff import AutoDiff
+from Dotua.operator import Operator
+from Dotua.rautodiff import rAutoDiff
+from Dotua.elementary import ELEMENTARY
+import numpy as np
 
 
 # Test creating a single variable
@@ -29,3 +33,226 @@ def test_multiple_variables():
     assert z.partial(x) == 0
     assert z.partial(y) == 0
     assert z.partial(z) == 1
+
+
+# Test initializing variables with array backed jacobians
+def test_dense_variables():
+    x = AutoDiff.create_scalar(5, mode='dense')
+    assert x.eval() == 5
+    assert x.partial(x) == 1
+
+    x, y = AutoDiff.create_scalar([1, 2], mode='dense')
+    assert x.partial(x) == 1
+    assert x.partial(y) == 0
+    assert x._jacobian._universe is y._jacobian._universe
+
+    f = x * y + y ** 2 - x / y
+    assert f.eval() == 1 * 2 + 2 ** 2 - 1 / 2
+    assert f.partial(x) == 2 - 1 / 2
+    assert f.partial(y) == 1 + 2 * 2 + 1 / 4
+
+
+# Test that unknown jacobian modes are rejected
+def test_invalid_mode():
+    exception_raised = False
+    try:
+        AutoDiff.create_scalar([1, 2], mode='unknown')
+    except ValueError:
+        exception_raised = True
+    assert exception_raised
+
+
+# Test initializing variables with sparse jacobians
+def test_sparse_variables():
+    x, y, z = AutoDiff.create_scalar([1, 2, 3], mode='sparse')
+    assert x.partial(x) == 1
+    assert x.partial(y) == 0
+    assert len(x._jacobian) == 1
+
+    f = x * y - z
+    assert f.eval() == -1
+    assert f.partial(x) == 2
+    assert f.partial(y) == 1
+    assert f.partial(z) == -1
+    assert (x * y).partial(z) == 0
+
+
+# Test that large universes switch to sparse jacobians automatically
+def test_auto_mode():
+    x, y = AutoDiff.create_scalar([1, 2])
+    assert isinstance(x._jacobian, dict)
+
+    threshold = AutoDiff.sparse_threshold
+    AutoDiff.sparse_threshold = 1
+    try:
+        x, y = AutoDiff.create_scalar([1, 2])
+    finally:
+        AutoDiff.sparse_threshold = threshold
+    assert not isinstance(x._jacobian, dict)
+    assert (x + y).partial(y) == 1
+
+
+# Test evaluating functions at a batch of points in one pass
+def test_batched_variables():
+    xs = np.linspace(0.5, 1, 4)
+    ys = np.linspace(1, 2, 4)
+    for mode in ['dict', 'dense', 'sparse']:
+        x, y = AutoDiff.create_scalar([xs, ys], mode=mode, batched=True)
+        assert (x.partial(x) == 1).all()
+        assert (x.partial(y) == 0).all()
+
+        f = Operator.sin(x * y) + x / y
+        assert np.allclose(f.eval(), np.sin(xs * ys) + xs / ys)
+        assert np.allclose(f.partial(x), np.cos(xs * ys) * ys + 1 / ys)
+        assert np.allclose(f.partial(y), np.cos(xs * ys) * xs - xs / ys ** 2)
+        # Operands are never modified in place
+        assert (x.eval() == xs).all()
+
+    x = AutoDiff.create_scalar(xs, batched=True)
+    f = x ** 3
+    assert f.eval().shape == xs.shape
+    assert np.allclose(f.partial(x), 3 * xs ** 2)
+
+    exception_raised = False
+    try:
+        AutoDiff.create_scalar(np.ones((2, 2, 2)), batched=True)
+    except ValueError:
+        exception_raised = True
+    assert exception_raised
+
+
+# Test the Hessian against analytic second derivatives
+def test_hessian():
+    a, b, c = 0.5, 1.5, 2.0
+    x, y, z = AutoDiff.create_scalar([a, b, c])
+
+    def f(x, y, z):
+        return (x * x * y + Operator.exp(x * y) + y ** 3 / x + 2 ** x +
+                Operator.log(z))
+
+    expected = np.zeros((3, 3))
+    expected[0, 0] = (2 * b + b * b * np.exp(a * b) + 2 * b ** 3 / a ** 3 +
+                      np.log(2) ** 2 * 2 ** a)
+    expected[0, 1] = expected[1, 0] = \
+        2 * a + np.exp(a * b) * (1 + a * b) - 3 * b * b / a ** 2
+    expected[1, 1] = a * a * np.exp(a * b) + 6 * b / a
+    expected[2, 2] = -1 / c ** 2
+    hessian = AutoDiff.hessian(f, [x, y, z])
+    assert isinstance(hessian, np.ndarray)
+    assert np.allclose(hessian, expected)
+
+    sparse = AutoDiff.hessian(f, [a, b, c], sparse=True)
+    assert sparse.nnz == 5
+    assert np.allclose(sparse.toarray(), expected)
+
+    # Chained Rosenbrock function: tridiagonal Hessian
+    n = 30
+    vals = np.linspace(0.5, 1.5, n)
+
+    def rosenbrock(*x):
+        return sum((x[i + 1] - x[i] ** 2) ** 2 + (1 - x[i]) ** 2
+                   for i in range(n - 1))
+
+    hessian = AutoDiff.hessian(rosenbrock, vals)
+    expected = np.zeros((n, n))
+    for i in range(n - 1):
+        expected[i, i] += 12 * vals[i] ** 2 - 4 * vals[i + 1] + 2
+        expected[i + 1, i + 1] += 2
+        expected[i, i + 1] = expected[i + 1, i] = -4 * vals[i]
+    assert np.allclose(hessian, expected)
+
+    # Arrowhead Hessian, recovered by symmetry from two colors
+    def arrow(*x):
+        return sum(x[0] * x[i] ** 2 for i in range(1, n))
+
+    hessian = AutoDiff.hessian(arrow, vals)
+    expected = np.zeros((n, n))
+    expected[0, 1:] = expected[1:, 0] = 2 * vals[1:]
+    expected[range(1, n), range(1, n)] = 2 * vals[0]
+    assert np.allclose(hessian, expected)
+
+    # Linear and constant functions
+    assert np.allclose(AutoDiff.hessian(lambda x, y: x - 2 * y, [a, b]), 0)
+    assert AutoDiff.hessian(lambda: 1, []).shape == (0, 0)
+
+
+# Test the compressed forward mode Jacobian of a vector function
+def test_jacobian():
+    x, y, z = AutoDiff.create_scalar([1.0, 2.0, 0.5])
+
+    def f(x, y, z):
+        return [x * y, Operator.sin(z) + x, 3.0, y]
+
+    expected = np.array([[2.0, 1.0, 0.0],
+                         [1.0, 0.0, np.cos(0.5)],
+                         [0.0, 0.0, 0.0],
+                         [0.0, 1.0, 0.0]])
+    jacobian = AutoDiff.jacobian(f, [x, y, z])
+    assert isinstance(jacobian, np.ndarray)
+    assert np.allclose(jacobian, expected)
+    assert np.allclose(AutoDiff.jacobian(lambda x: Operator.exp(x), [0.0]),
+                       [[1.0]])
+
+    # Banded residual of a discretized boundary value problem
+    n = 50
+    u = np.linspace(0, 1, n)
+
+    def residual(*u):
+        r = [u[0] - 0.0]
+        for i in range(1, n - 1):
+            r.append(u[i - 1] - 2 * u[i] + u[i + 1] + Operator.exp(u[i]))
+        r.append(u[-1] - 1.0)
+        return r
+
+    jacobian = AutoDiff.jacobian(residual, u, sparse=True)
+    expected = np.zeros((n, n))
+    expected[0, 0] = expected[-1, -1] = 1
+    for i in range(1, n - 1):
+        expected[i, i - 1] = expected[i, i + 1] = 1
+        expected[i, i] = -2 + np.exp(u[i])
+    assert jacobian.nnz == 3 * n - 4
+    assert np.allclose(jacobian.toarray(), expected)
+    assert AutoDiff.jacobian(lambda: [1.0], []).shape == (1, 0)
+
+
+def test_jacobian_modes_agree():
+    # Forward (Dual) and reverse sweeps use the same derivative table
+    rad = rAutoDiff()
+    for name in ELEMENTARY:
+        a = 1.5 if name == 'arccosh' else 0.3
+        fn = getattr(Operator, name)
+
+        def f(x, y):
+            return [fn(x) * y, fn(x * y) + y]
+
+        forward = AutoDiff.jacobian(f, [a, 1.2])
+        reverse = rad.jacobian(f, [a, 1.2])
+        assert np.allclose(forward, reverse)
+        x, y = AutoDiff.create_scalar([a, 1.2])
+        assert np.isclose(forward[0][0], f(x, y)[0].partial(x))
+
+
+def test_hessian_elementary():
+    # Hessians of tan, arctan and arcsin agree with central differences of
+    # the gradient computed by partial
+    vals = np.array([0.3, 0.5, 0.7])
+
+    def f(x, y, z):
+        return (Operator.tan(x * y) + Operator.arctan(y * z) +
+                Operator.arcsin(x * z))
+
+    def gradient(vals):
+        x, y, z = AutoDiff.create_scalar(list(vals))
+        out = f(x, y, z)
+        return np.array([out.partial(x), out.partial(y), out.partial(z)])
+
+    h = 1e-6
+    expected = np.zeros((3, 3))
+    for j in range(3):
+        step = np.zeros(3)
+        step[j] = h
+        expected[:, j] = (gradient(vals + step) -
+                          gradient(vals - step)) / (2 * h)
+    assert np.allclose(AutoDiff.hessian(f, vals), expected, rtol=1e-5)
+    sparse = AutoDiff.hessian(f, vals, sparse=True)
+    assert np.allclose(sparse.toarray(), expected, rtol=1e-5)
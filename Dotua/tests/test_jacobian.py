@@ -0,0 +1,186 @@
+'''
+This file tests the jacobian representations defined in jacobian.py.
+'''
+from Dotua.nodes.jacobian import Universe, DictJacobian, DenseJacobian, \
+    SparseJacobian, DiagonalJacobian, CSRJacobian, MatrixJacobian
+from Dotua.nodes.scalar import Scalar
+from Dotua.autodiff import AutoDiff
+import numpy as np
+import scipy.sparse as sp
+
+
+def test_universe():
+    x, y = Scalar(1), Scalar(2)
+    universe = Universe([x, y])
+    assert len(universe) == 2
+    assert universe.slot(x) == 0
+    assert universe.slot(y) == 1
+
+    exception_raised = False
+    try:
+        universe.slot(Scalar(3))
+    except KeyError:
+        exception_raised = True
+    assert exception_raised
+
+
+def test_dict_jacobian():
+    x, y = Scalar(1), Scalar(2)
+    j_1 = DictJacobian({x: 1, y: 0})
+    j_2 = DictJacobian({x: 0, y: 1})
+
+    scaled = j_1.scale(3)
+    assert isinstance(scaled, DictJacobian)
+    assert scaled[x] == 3
+    assert scaled[y] == 0
+
+    combined = j_1.combine(2, j_2, -4)
+    assert combined[x] == 2
+    assert combined[y] == -4
+
+
+def test_dense_jacobian():
+    x, y, z = Scalar(1), Scalar(2), Scalar(3)
+    universe = Universe([x, y, z])
+    j_x = DenseJacobian.seed(universe, x)
+    j_z = DenseJacobian.seed(universe, z)
+
+    assert j_x._grad.dtype == np.float64
+    assert (j_x._grad == np.array([1, 0, 0])).all()
+    assert j_x[x] == 1
+    assert j_x[y] == 0
+    assert len(j_x) == 3
+    assert x in j_x
+    assert Scalar(4) not in j_x
+    assert list(j_x) == [x, y, z]
+    assert j_x.keys() == [x, y, z]
+    assert j_x.values() == [1, 0, 0]
+    assert j_x.items() == [(x, 1), (y, 0), (z, 0)]
+
+    scaled = j_x.scale(5)
+    assert scaled[x] == 5
+    assert scaled._universe is universe
+
+    combined = j_x.combine(2, j_z, 3)
+    assert (combined._grad == np.array([2, 0, 3])).all()
+
+
+def test_sparse_jacobian():
+    x, y, z = Scalar(1), Scalar(2), Scalar(3)
+    universe = Universe([x, y, z])
+    j_x = SparseJacobian.seed(universe, x)
+    j_z = SparseJacobian.seed(universe, z)
+
+    assert (j_x._index == np.array([0])).all()
+    assert j_x[x] == 1
+    assert j_x[y] == 0
+    assert j_z[y] == 0
+    assert len(j_x) == 1
+    assert y in j_x
+    assert list(j_z) == [z]
+    assert j_z.values() == [1]
+    assert j_z.items() == [(z, 1)]
+
+    # Merging keeps slots sorted and only stores touched variables
+    combined = j_z.combine(2, j_x, 3)
+    assert (combined._index == np.array([0, 2])).all()
+    assert combined[x] == 3
+    assert combined[y] == 0
+    assert combined[z] == 2
+
+    # Identical sparsity patterns are combined without merging
+    same = combined.combine(1, combined.scale(2), 1)
+    assert same._index is combined._index
+    assert same[x] == 9
+    assert same[z] == 6
+
+
+def test_separate_universes():
+    # Includes dict Scalars mixed with array backed ones, as created in
+    # 'auto' mode by calls on either side of AutoDiff.sparse_threshold
+    for mode, other in (('dense', 'dense'), ('sparse', 'sparse'),
+                        ('dict', 'sparse'), ('dict', 'dense')):
+        x, = AutoDiff.create_scalar([1], mode=mode)
+        y, = AutoDiff.create_scalar([3], mode=other)
+        for f in (lambda: x * y, lambda: x + y, lambda: y * x,
+                  lambda: y - x, lambda: x / y):
+            exception_raised = False
+            try:
+                f()
+            except ValueError:
+                exception_raised = True
+            assert exception_raised
+
+
+def test_diagonal_jacobian():
+    j_1 = DiagonalJacobian(np.array([1., 2.]))
+    j_2 = DiagonalJacobian(np.array([3., 4.]))
+
+    scaled = j_1.scale(np.array([2., 3.]))
+    assert isinstance(scaled, DiagonalJacobian)
+    assert (scaled.toarray() == np.diag([2., 6.])).all()
+
+    combined = j_1.combine(2, j_2, -1)
+    assert isinstance(combined, DiagonalJacobian)
+    assert (np.asarray(combined) == np.diag([-1., 0.])).all()
+
+    assert (j_1.tocsr().toarray() == j_1.toarray()).all()
+    assert j_1.sum() == 3
+    assert (j_1.sum(axis=0) == [1., 2.]).all()
+
+
+def test_csr_jacobian():
+    matrix = np.array([[1., 2.], [0., 3.]])
+    j_1 = CSRJacobian(sp.csr_matrix(matrix))
+    j_2 = DiagonalJacobian(np.array([1., 1.]))
+
+    assert (j_1.scale(2).toarray() == 2 * matrix).all()
+    assert (j_1.scale(np.array([1., 2.])).toarray() ==
+            [[1., 2.], [0., 6.]]).all()
+
+    combined = j_1.combine(1, j_2, 2)
+    assert isinstance(combined, CSRJacobian)
+    assert (np.asarray(combined) == [[3., 2.], [0., 5.]]).all()
+    combined = j_2.combine(2, j_1, 1)
+    assert isinstance(combined, CSRJacobian)
+    assert (combined.toarray() == [[3., 2.], [0., 5.]]).all()
+
+    assert j_1.tocsr() is j_1._matrix
+    assert j_1.sum() == 6
+    assert (j_1.sum(axis=0) == [1., 5.]).all()
+
+
+def test_matrix_jacobian():
+    matrix = np.array([[1., 2.], [0., 3.]])
+    j_1 = MatrixJacobian(matrix)
+    j_2 = CSRJacobian(sp.eye(2))
+
+    assert (j_1.scale(np.array([1., 2.])).toarray() ==
+            [[1., 2.], [0., 6.]]).all()
+
+    combined = j_2.combine(2, j_1, 1)
+    assert isinstance(combined, MatrixJacobian)
+    assert (np.asarray(combined) == [[3., 2.], [0., 5.]]).all()
+    combined = DiagonalJacobian(np.ones(2)).combine(1, j_1, -1)
+    assert isinstance(combined, MatrixJacobian)
+    assert (combined.toarray() == [[0., -2.], [0., -2.]]).all()
+
+    assert (j_1.tocsr().toarray() == matrix).all()
+    assert j_1.sum() == 6
+    assert (j_1.sum(axis=0) == [1., 5.]).all()
+
+
+def test_premultiply():
+    a = np.array([[1., 1.], [2., 0.]])
+    matrix = np.array([[1., 2.], [0., 3.]])
+    for j in (DiagonalJacobian(np.array([1., 3.])),
+              CSRJacobian(sp.csr_matrix(matrix)), MatrixJacobian(matrix)):
+        product = j.premultiply(a)
+        assert isinstance(product, MatrixJacobian)
+        assert np.allclose(product.toarray(), a @ j.toarray())
+        product = j.premultiply(sp.csr_matrix(a))
+        if isinstance(j, MatrixJacobian):
+            assert isinstance(product, MatrixJacobian)
+        else:
+            assert isinstance(product, CSRJacobian)
+        assert np.allclose(product.toarray(), a @ j.toarray())
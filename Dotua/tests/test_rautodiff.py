@@ -1,6 +1,8 @@
 import numpy as np
 from Dotua.rautodiff import rAutoDiff
+from Dotua.tape import Tape
 from Dotua.roperator import rOperator as op
+from Dotua.elementary import ELEMENTARY
 
 
 def test_create_rscalar():
@@ -10,8 +12,8 @@ def test_create_rscalar():
     x = rad.create_rscalar(10)
     assert x.eval() == 10
 
-    # Ensure that roots have been initialized
-    assert x in x._roots.keys()
+    # Ensure that the variables are roots of the graph
+    assert x._children == ()
 
     # Create multiple rScalars
     x, y, z = rad.create_rscalar([1, 3, 6])
@@ -19,10 +21,10 @@ def test_create_rscalar():
     assert y.eval() == 3
     assert z.eval() == 6
 
-    # Ensure that roots have been initialized
-    assert x in x._roots.keys()
-    assert y in y._roots.keys()
-    assert z in z._roots.keys()
+    # Ensure that the variables are roots of the graph
+    assert x._children == ()
+    assert y._children == ()
+    assert z._children == ()
 
 
 def test_create_rvector():
@@ -32,8 +34,8 @@ def test_create_rvector():
     x = rad.create_rvector([10, 20, 30])
     assert (x.eval() == np.array([10, 20, 30])).all()
 
-    # Ensure that roots have been initialized
-    assert x in x._roots.keys()
+    # Ensure that the variables are roots of the graph
+    assert x._children == ()
 
     # Create multiple rScalars
     x, y, z = rad.create_rvector([[1, 3, 6], [2, 4, 8], [5, 10, 15]])
@@ -41,29 +43,55 @@ def test_create_rvector():
     assert (y.eval() == np.array([2, 4, 8])).all()
     assert (z.eval() == np.array([5, 10, 15])).all()
 
-    # Ensure that roots have been initialized
-    assert x in x._roots.keys()
-    assert y in y._roots.keys()
-    assert z in z._roots.keys()
+    # Ensure that the variables are roots of the graph
+    assert x._children == ()
+    assert y._children == ()
+    assert z._children == ()
 
 
-def test__reset_universe():
-    # Test rScalars
+def test_alternating_partials():
     rad = rAutoDiff()
     x, y, z = rad.create_rscalar([1, 3, 6])
-    f = x + y - z
-    x._grad_val = 1
+    f = x * y
+    g = x + y * z
 
-    rad._reset_universe(f)
-    assert x._grad_val == 0
+    # Alternating between functions needs no reset of the shared graph
+    assert rad.partial(f, x) == 3
+    assert rad.partial(g, x) == 1
+    assert rad.partial(f, x) == 3
+    assert rad.partial(g, y) == 6
+    assert rad.partial(f, y) == 1
 
-    # Test rVectors
-    x, y, z = rad.create_rvector([[1, 3, 6], [2, 4, 8], [5, 10, 15]])
-    f = x + y - z
-    x._grad_val = 1
+    # Each function keeps its own tape, which is not rebuilt on a switch
+    tapes = {id(h): rad._tapes[id(h)][1] for h in (f, g)}
+    built = []
+    original = Tape.__init__
 
-    rad._reset_universe(f)
-    assert x._grad_val == 0
+    def init(self, output):
+        built.append(output)
+        original(self, output)
+
+    Tape.__init__ = init
+    try:
+        for h, expected in ((f, 3), (g, 1), (f, 3), (g, 1)):
+            assert rad.partial(h, x) == expected
+    finally:
+        Tape.__init__ = original
+    assert built == []
+    assert all(rad._tapes[key][1] is tapes[key] for key in tapes)
+
+    # Derivatives left stale by a backward pass of another function are
+    # recomputed
+    f._grad_val = 1
+    g.gradient(x)
+    assert rad.partial(f, x) == 3
+
+    x, y = rad.create_rvector([[1, 3], [2, 4]])
+    f = x * y
+    g = x - y
+    assert (rad.partial(f, x) == np.array([2, 4])).all()
+    assert (rad.partial(g, x) == np.array([1, 1])).all()
+    assert (rad.partial(f, y) == np.array([1, 3])).all()
 
 
 def test_partial():
@@ -118,3 +146,212 @@ def test_multiple_partials():
     assert (rad.partial(g, x) == np.array([2, 4, 8])).all()
     assert (rad.partial(g, y) == np.array([1, 3, 6])).all()
     assert (rad.partial(g, z) == np.array([1, 1, 1])).all()
+
+
+def test_partial_shared_nodes():
+    rad = rAutoDiff()
+
+    x, y = rad.create_rscalar([3, 4])
+    f = x * x + x * y
+    assert rad.partial(f, x) == 2 * 3 + 4
+    assert rad.partial(f, y) == 3
+
+    # Elements of an rVector can be differentiated directly
+    v = rad.create_rvector([1, 2, 4])
+    g = v[0] * v[1] + v[2]
+    assert rad.partial(g, v[0]) == 2
+    assert rad.partial(g, v[1]) == 1
+    assert rad.partial(g, v[2]) == 1
+
+
+def test_partial_undefined_variable():
+    rad = rAutoDiff()
+
+    x, y = rad.create_rscalar([1, 2])
+    f = x * 2
+    exception_raised = False
+    try:
+        rad.partial(f, y)
+    except ValueError:
+        exception_raised = True
+    assert exception_raised
+
+
+def test_gradient():
+    rad = rAutoDiff()
+
+    a, b, c = 2, 3, 5
+    x, y, z = rad.create_rscalar([a, b, c])
+    f = x * y * z + op.exp(x)
+    assert rad.gradient(f, [x, y, z]) == [b * c + np.exp(a), a * c, a * b]
+    assert rad.gradient(f, (z,)) == [a * b]
+    assert rad.gradient(f, y) == a * c
+
+    # The graph is swept once for all variables of the same function
+    tape = rad._tapes[id(f)][1]
+    rad.gradient(f, [x, y])
+    assert rad._tapes[id(f)][1] is tape
+
+    u, v = rad.create_rvector([[1, 2], [3, 4]])
+    g = u * v
+    du, dv = rad.gradient(g, [u, v])
+    assert (du == np.array([3, 4])).all()
+    assert (dv == np.array([1, 2])).all()
+
+
+def test_deep_graph():
+    rad = rAutoDiff()
+
+    # A long recurrence would overflow the recursion limit if traversed
+    # recursively
+    x, y = rad.create_rscalar([1, 0.5])
+    f = x
+    for _ in range(20000):
+        f = f * y + x
+    assert rad.partial(f, x) == 2
+    assert abs(rad.partial(f, y) - 4) < 1e-9
+
+
+def test_fan_in():
+    rad = rAutoDiff()
+
+    # Every step doubles the number of paths from f to x, so the graph must
+    # be traversed once per node rather than once per path
+    x = rad.create_rscalar(1)
+    f = x
+    for _ in range(200):
+        f = f + f
+    assert rad.partial(f, x) == 2 ** 200
+
+
+def test_batched():
+    rad = rAutoDiff()
+    xs = np.array([1., 2., 3., 4.])
+    ys = np.array([2., 3., 5., 9.])
+
+    # One traced graph serves the whole minibatch
+    x = rad.create_rscalar(xs, batched=True)
+    w, b = rad.create_rscalar([2, 1])
+    loss = (w * x + b - ys) ** 2
+    residual = 2 * (2 * xs + 1 - ys)
+    assert (rad.partial(loss, w) == residual * xs).all()
+    assert (rad.partial(loss, b) == residual).all()
+    assert rad.partial(loss, w, summed=True) == np.sum(residual * xs)
+    d_w, d_b = rad.gradient(loss, [w, b], summed=True)
+    assert d_w == np.sum(residual * xs)
+    assert d_b == np.sum(residual)
+
+    # Batched rVectors carry the batch along their leading axis
+    X = rad.create_rvector([[1., 2.], [3., 4.], [5., 6.]], batched=True)
+    W = rad.create_rvector([0.5, -0.5])
+    f = op.exp(X * W)
+    expected = np.exp(X.eval() * W.eval()) * X.eval()
+    assert rad.partial(f, W).shape == (3, 2)
+    assert np.allclose(rad.partial(f, W), expected)
+    assert np.allclose(rad.partial(f, W, summed=True), expected.sum(axis=0))
+    assert (X[1].eval() == [2., 4., 6.]).all()
+
+    X, Y = rad.create_rvector(np.ones((2, 3, 2)), batched=True)
+    assert X.eval().shape == (3, 2)
+
+    exception_raised = False
+    try:
+        rad.create_rscalar(np.ones((2, 2, 2)), batched=True)
+    except ValueError:
+        exception_raised = True
+    assert exception_raised
+
+
+def test_hvp():
+    rad = rAutoDiff()
+    a, b = 0.5, 1.5
+    x, y = rad.create_rscalar([a, b])
+
+    def f(x, y):
+        return x * x * y + op.exp(x * y) + y ** 3 / x + 2 ** x + op.log(y)
+
+    # Analytic Hessian of f at (a, b)
+    hxx = (2 * b + b * b * np.exp(a * b) + 2 * b ** 3 / a ** 3 +
+           np.log(2) ** 2 * 2 ** a)
+    hxy = 2 * a + np.exp(a * b) * (1 + a * b) - 3 * b * b / a ** 2
+    hyy = a * a * np.exp(a * b) + 6 * b / a - 1 / b ** 2
+    assert np.allclose(rad.hvp(f, [x, y], [1, 0]), [hxx, hxy])
+    assert np.allclose(rad.hvp(f, [x, y], [0, 1]), [hxy, hyy])
+    assert np.allclose(rad.hvp(f, [x, y], [2, -1]),
+                       [2 * hxx - hxy, 2 * hxy - hyy])
+
+    # The variables passed in are left untouched
+    assert x.eval() == a
+    assert x._children == ()
+
+    # Single variables, linear functions and constant functions
+    assert np.isclose(rad.hvp(lambda x: op.sin(x), x, 2), -2 * np.sin(a))
+    assert rad.hvp(lambda x, y: x + 2 * y, [x, y], [1, 1]) == [0, 0]
+    assert rad.hvp(lambda x: 3, x, 1) == 0
+
+    # One direction component is needed per variable
+    for v in ([1], [1, 0, 0]):
+        exception_raised = False
+        try:
+            rad.hvp(f, [x, y], v)
+        except ValueError:
+            exception_raised = True
+        assert exception_raised
+
+    # Batched variables give one product per sample
+    x, y = rad.create_rscalar([[0.5, 1.0], [1.5, 2.0]], batched=True)
+    hv = rad.hvp(f, [x, y], [1, 0])
+    assert hv[0].shape == (2,)
+    assert np.isclose(hv[0][0], hxx)
+    assert np.isclose(hv[1][0], hxy)
+
+
+def test_hvp_elementary():
+    # The second derivative of every elementary function agrees with central
+    # differences of its first derivative computed by partial
+    rad = rAutoDiff()
+    h = 1e-6
+    for name in ELEMENTARY:
+        f = getattr(op, name)
+        a = 1.5 if name == 'arccosh' else 0.5
+
+        def first(t):
+            x = rad.create_rscalar(t)
+            return rad.partial(f(x), x)
+
+        difference = (first(a + h) - first(a - h)) / (2 * h)
+        x = rad.create_rscalar(a)
+        assert np.isclose(rad.hvp(f, x, 1), difference, rtol=1e-5)
+
+
+def test_jacobian():
+    rad = rAutoDiff()
+    x, y, z = rad.create_rscalar([1.0, 2.0, 0.5])
+
+    def f(x, y, z):
+        return [x * y, op.sin(z) + x, 3.0, y]
+
+    expected = np.array([[2.0, 1.0, 0.0],
+                         [1.0, 0.0, np.cos(0.5)],
+                         [0.0, 0.0, 0.0],
+                         [0.0, 1.0, 0.0]])
+    jacobian = rad.jacobian(f, [x, y, z])
+    assert isinstance(jacobian, np.ndarray)
+    assert np.allclose(jacobian, expected)
+    assert np.allclose(rad.jacobian(lambda x, y: x * y, [x, y]), [[2, 1]])
+
+    # Rows that share no column are seeded together
+    n = 40
+    vals = np.linspace(1, 2, n)
+
+    def f(*x):
+        return [x[i] * x[i + 1] for i in range(n - 1)] + [x[0] ** 2]
+
+    jacobian = rad.jacobian(f, vals, sparse=True)
+    expected = np.zeros((n, n))
+    for i in range(n - 1):
+        expected[i, i] = vals[i + 1]
+        expected[i, i + 1] = vals[i]
+    expected[n - 1, 0] = 2 * vals[0]
+    assert np.allclose(jacobian.toarray(), expected)
+    assert rad.jacobian(lambda: [], []).shape == (0, 0)
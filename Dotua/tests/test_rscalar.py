@@ -288,3 +288,9 @@ def test_power():
     except ValueError:
         exception_raised = True
     assert exception_raised
+
+
+def test_slots():
+    x = rScalar(1)
+    f = x * x
+    assert not hasattr(f, '__dict__')
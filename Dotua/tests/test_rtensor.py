@@ -0,0 +1,170 @@
+'''
+This file tests the rTensor reverse mode nodes against finite differences.
+'''
+from Dotua.nodes.rscalar import rScalar
+from Dotua.nodes.rvector import rVector
+from Dotua.nodes.rtensor import rTensor
+from Dotua.rautodiff import rAutoDiff
+from Dotua.roperator import rOperator as rop
+import numpy as np
+
+rng = np.random.default_rng(0)
+
+
+def numeric_gradient(f, vals, i, eps=1e-6):
+    '''Return the central difference gradient of f(*vals) in vals[i].'''
+    grad = np.zeros(np.shape(vals[i]))
+    for idx in np.ndindex(grad.shape):
+        up = [np.array(v, dtype=float) for v in vals]
+        down = [np.array(v, dtype=float) for v in vals]
+        up[i][idx] += eps
+        down[i][idx] -= eps
+        grad[idx] = (np.sum(f(*[rTensor(v) for v in up]).eval()) -
+                     np.sum(f(*[rTensor(v) for v in down]).eval())) / (2 * eps)
+    return grad
+
+
+def check(f, *vals):
+    rad = rAutoDiff()
+    nodes = [rad.create_rtensor(v) for v in vals]
+    out = f(*nodes)
+    grads = rad.gradient(out, nodes)
+    for i, grad in enumerate(grads):
+        assert np.shape(grad) == np.shape(vals[i])
+        assert np.allclose(grad, numeric_gradient(f, vals, i), atol=1e-5)
+
+
+def test_create_rtensor():
+    rad = rAutoDiff()
+    W = rad.create_rtensor([[1, 2], [3, 4]])
+    assert isinstance(W, rTensor)
+    assert W.shape == (2, 2)
+    assert (W.eval() == np.array([[1, 2], [3, 4]])).all()
+    assert W._children == ()
+
+
+def test_elementwise():
+    A = rng.uniform(1, 2, size=(3, 4))
+    B = rng.uniform(1, 2, size=(3, 4))
+    row = rng.uniform(1, 2, size=(4,))
+    col = rng.uniform(1, 2, size=(3, 1))
+    check(lambda a, b: a + b - a * b / b ** 0.5, A, B)
+    check(lambda a, b: a ** b + 2 ** a - 3 / b + (-a), A, B)
+    check(lambda a: 1 + a * 2 - 4 + a / 5 + a ** 3 - (2 - a), A)
+    # Broadcasting between tensors and with constants
+    check(lambda a, r, c: a * r + c / a - r * c, A, row, col)
+    check(lambda r: r * np.ones((3, 4)) + col, row)
+    check(lambda c: np.ones((2, 3, 4)) * c, col)
+
+
+def test_operators():
+    A = rng.uniform(0.1, 0.9, size=(2, 3))
+    check(lambda a: rop.sin(a) * rop.exp(a) + rop.log(a, 2), A)
+    check(lambda a: 1 / (1 + rop.exp(-a)), A)
+    check(lambda a: rop.sigmoid(a) + rop.softplus(a) * rop.tanh(a), A)
+    check(lambda a: rop.logsumexp(a @ A.T) * 3, A)
+    check(lambda a: rop.logsumexp(a, axis=1) * np.array([1., 2.]), A)
+    check(lambda a: rop.logsumexp(a * a, axis=(0, 1)), A)
+    assert np.allclose(rop.logsumexp(A, axis=0), np.log(np.exp(A).sum(0)))
+
+
+def test_matmul():
+    M = rng.normal(size=(3, 4))
+    N = rng.normal(size=(4, 2))
+    u = rng.normal(size=(3,))
+    v = rng.normal(size=(4,))
+    S = rng.normal(size=(5, 3, 4))
+    check(lambda m, n: m @ n, M, N)
+    check(lambda u, m: u @ m, u, M)
+    check(lambda m, v: m @ v, M, v)
+    check(lambda v, w: v @ w, v, v * 2)
+    check(lambda s, n: s @ n, S, N)
+    check(lambda m: (m @ N).sum() + u @ m @ v, M)
+    check(lambda n: M @ n, N)
+
+
+def test_reductions():
+    T = rng.normal(size=(2, 3, 4))
+    check(lambda t: t.sum(), T)
+    check(lambda t: t.sum(axis=1) * 2, T)
+    check(lambda t: t.sum(axis=(0, -1), keepdims=True) ** 2, T)
+    check(lambda t: t.mean(), T)
+    check(lambda t: t.mean(axis=-1) ** 2, T)
+    assert rTensor(T).mean(axis=(0, 2)).shape == (3,)
+
+
+def test_shapes():
+    T = rng.normal(size=(2, 3, 4))
+    check(lambda t: t.T * np.arange(24).reshape(4, 3, 2), T)
+    check(lambda t: t.transpose((1, 0, 2)) * np.arange(24).reshape(3, 2, 4),
+          T)
+    check(lambda t: t.reshape(6, 4) @ np.arange(4.0), T)
+    check(lambda t: t.reshape((4, 6)) * np.arange(24).reshape(4, 6), T)
+    assert rTensor(T).reshape(-1).shape == (24,)
+
+
+def test_dense_layer():
+    rad = rAutoDiff()
+    X = rng.normal(size=(8, 5))
+    W = rad.create_rtensor(rng.normal(size=(5, 3)))
+    b = rad.create_rtensor(np.zeros(3))
+    h = rop.tanh(X @ W + b)
+    # The layer is three graph nodes whatever its size
+    assert h._children[0][0]._children[0][0]._children[0][0] is W
+    loss = (h * h).mean()
+    grad_W, grad_b = rad.gradient(loss, [W, b])
+    assert grad_W.shape == (5, 3)
+    assert grad_b.shape == (3,)
+
+    # Mixing rTensor with rScalar nodes
+    s = rScalar(2.0)
+    s._init_roots()
+    f = (W * s).sum()
+    assert np.isclose(rad.partial(f, s), W.eval().sum())
+
+
+def test_mixed_nodes():
+    # rScalar and rVector operands in either order defer to rTensor, which
+    # reduces their derivatives over the broadcast axes
+    W = rng.uniform(1, 2, size=(3, 2))
+    eps = 1e-6
+    ops = [lambda a, b: a + b, lambda a, b: a - b, lambda a, b: a * b,
+           lambda a, b: a / b, lambda a, b: a ** b]
+    for op in ops:
+        for value, node in ((1.5, rScalar), (np.array([1.5, 1.2]), rVector)):
+            for swap in (False, True):
+                def f(a, w):
+                    return op(w, a) if swap else op(a, w)
+
+                rad = rAutoDiff()
+                a = node(value)
+                a._init_roots()
+                w = rad.create_rtensor(W)
+                out = f(a, w)
+                assert isinstance(out, rTensor)
+                grad_a, grad_w = rad.gradient(out.sum(), [a, w])
+                numeric = np.zeros(np.shape(value))
+                for idx in np.ndindex(numeric.shape):
+                    step = np.zeros(np.shape(value))
+                    step[idx] = eps
+                    numeric[idx] = (f(value + step, W).sum() -
+                                    f(value - step, W).sum()) / (2 * eps)
+                assert np.shape(grad_a) == np.shape(value)
+                assert np.allclose(grad_a, numeric, atol=1e-5)
+                assert np.allclose(grad_w, numeric_gradient(
+                    lambda w: f(value, w), [W], 0), atol=1e-5)
+
+
+def test_gradient():
+    x = rTensor([[1.0, 2.0]])
+    y = rTensor([[3.0, 4.0]])
+    f = x * y
+    f._grad_val = 1
+    assert (f.gradient(x) == y.eval()).all()
+
+    exception_raised = False
+    try:
+        f.gradient(rTensor([1.0]))
+    except ValueError:
+        exception_raised = True
+    assert exception_raised
@@ -18,6 +18,12 @@ def test_get_item():
     assert x[0].eval() == 10
     assert x[1].eval() == 20
 
+    # Element rScalars are created once, on first indexing
+    assert x[0] is x[0]
+    y = x * 2 + 1
+    assert y._rscalars is None
+    assert y[1].eval() == 41
+
 
 def test_eval():
     x, y, z = generate()
@@ -294,3 +300,8 @@ def test_power():
     except ValueError:
         exception_raised = True
     assert exception_raised
+
+
+def test_slots():
+    x = rVector([1, 2])
+    assert not hasattr(x * x, '__dict__')
@@ -118,3 +118,8 @@ def test_power():
 def test_other():
     assert g_1.eval() == 10 * a + b / 2 + 1000
     assert g_2.eval() == -2 * (a ** 2) - 1 / b
+
+
+def test_slots():
+    x = Scalar(1)
+    assert not hasattr(x, '__dict__')
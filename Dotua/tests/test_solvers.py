@@ -0,0 +1,69 @@
+import numpy as np
+from Dotua.nodes.vector import Vector
+from Dotua.operator import Operator as op
+from Dotua.solvers import newton, NewtonResult
+
+
+def test_newton_scalar():
+    result = newton(lambda x: x * x - 2, 1.0)
+    assert isinstance(result, NewtonResult)
+    assert result.converged
+    assert np.isclose(result.x, np.sqrt(2))
+    assert abs(result.f) <= 1e-12
+    # One evaluation per step, plus the evaluation at the initial guess
+    assert result.evaluations == result.iterations + 1
+    assert len(result.steps) == result.iterations
+    assert result.steps[0] == (1.0, -1.0)
+    assert 'converged=True' in repr(result)
+
+    result = newton(lambda x: op.exp(x) - 2, 0.0, damping=0.5, tol=1e-8)
+    assert result.converged
+    assert np.isclose(result.x, np.log(2))
+
+    # Newton's method cycles between 0 and 1 on this function without a
+    # line search
+    cubic = lambda x: x ** 3 - 2 * x + 2
+    result = newton(cubic, 0.0, maxiters=20)
+    assert not result.converged
+    assert result.iterations == 20
+    assert result.evaluations == 21
+    result = newton(cubic, 0.0, line_search=True, maxiters=50)
+    assert result.converged
+    assert np.isclose(result.x, -1.76929235423863)
+    assert result.evaluations > result.iterations + 1
+
+    exception_raised = False
+    try:
+        newton(lambda x: 1, 0.0)
+    except ZeroDivisionError:
+        exception_raised = True
+    assert exception_raised
+
+
+def test_newton_system():
+    # Elementwise systems use the jacobian of the returned Vector
+    result = newton(lambda x: x * x - np.array([4.0, 9.0]), [1.0, 1.0])
+    assert result.converged
+    assert np.allclose(result.x, [2, 3])
+
+    # Coupled systems return one Scalar per equation
+    def system(x):
+        return [x[0] + x[1] - 3, x[0] * x[1] - 2, 0]
+
+    result = newton(lambda x: system(x)[:2], [0.0, 5.0])
+    assert result.converged
+    assert np.allclose(result.x, [1, 2])
+    assert result.evaluations == result.iterations + 1
+
+    exception_raised = False
+    try:
+        newton(lambda x: [x[0] - 1, 1], [0.0, 0.0])
+    except np.linalg.LinAlgError:
+        exception_raised = True
+    assert exception_raised
+    exception_raised = False
+    try:
+        newton(lambda x: Vector([1.0, 2.0]), [0.0, 0.0])
+    except np.linalg.LinAlgError:
+        exception_raised = True
+    assert exception_raised
@@ -0,0 +1,144 @@
+'''
+This file tests the Tape used by reverse mode automatic differentiation.
+'''
+from Dotua.nodes.rscalar import rScalar
+from Dotua.nodes.rvector import rVector
+from Dotua.nodes.rtensor import rTensor
+from Dotua.dual import Dual
+from Dotua.tape import Tape
+import numpy as np
+
+
+def generate():
+    vars = rScalar(2), rScalar(3)
+    for var in vars:
+        var._init_roots()
+    return tuple(vars)
+
+
+def test_record():
+    x, y = generate()
+    a = x * y
+    f = a + x
+    tape = Tape(f)
+
+    # Each node is recorded once, children before the nodes using them
+    assert len(tape) == 4
+    assert tape._nodes[-1] is f
+    for i, children in enumerate(tape._children):
+        for child in children:
+            assert child < i
+    assert x in tape
+    assert a in tape
+    assert rScalar(1) not in tape
+
+
+def test_shared_subexpressions():
+    x, y = generate()
+    f = x * x
+    f._grad_val = 1
+    Tape(f).backward()
+    assert x._grad_val == 4
+
+    # Diamond shaped graph: both paths contribute to the derivative
+    a = x * y
+    g = a * a + a
+    tape = Tape(g)
+    assert len(tape) == 5
+    g._grad_val = 1
+    tape.backward()
+    assert a._grad_val == 2 * 6 + 1
+    assert x._grad_val == 13 * 3
+    assert y._grad_val == 13 * 2
+
+
+def test_deep_graph():
+    x, _ = generate()
+    f = x
+    for _ in range(10000):
+        f = f + x
+    f._grad_val = 1
+    Tape(f).backward()
+    assert x._grad_val == 10001
+
+
+def test_repeated_backward():
+    x, y = generate()
+    f = x * y
+    tape = Tape(f)
+    f._grad_val = 1
+    tape.backward()
+    tape.backward()
+    assert x._grad_val == 3
+    assert y._grad_val == 2
+
+
+def test_vector_backward():
+    x = rVector([1, 2, 3])
+    x._init_roots()
+    f = x * x + 1
+    f._grad_val = np.ones(3)
+    Tape(f).backward()
+    assert (x._grad_val == np.array([2, 4, 6])).all()
+
+
+def test_generations():
+    x, y = generate()
+    f = x * y
+    g = x + 1
+    tape_f, tape_g = Tape(f), Tape(g)
+
+    f._grad_val = 1
+    gen_f = tape_f.backward()
+    assert x._gen == y._gen == f._gen == gen_f
+    assert x._grad_val == 3
+
+    # A later pass overwrites stale adjoints instead of accumulating on them
+    g._grad_val = 1
+    gen_g = tape_g.backward()
+    assert gen_g > gen_f
+    assert x._gen == gen_g
+    assert x._grad_val == 1
+    assert y._gen == gen_f
+
+
+def test_in_place_accumulation():
+    x = rVector([1., 2., 3.])
+    x._init_roots()
+    assert x._grad_val == 0  # no adjoint array before a backward pass
+    f = x * x + x * 2 + x
+    tape = Tape(f)
+    for _ in range(2):
+        f._grad_val = np.ones(3)
+        tape.backward()
+        assert (x._grad_val == 2 * x._val + 3).all()
+    # The scratch array is reused by every pass over the tape
+    assert list(tape._arena) == [(3,)]
+    grad = x._grad_val
+    f._grad_val = np.ones(3)
+    tape.backward()
+    assert x._grad_val is not grad
+
+
+def test_aliased_adjoints():
+    # The adjoint that b = a.T passes to a is a view of the adjoint of b,
+    # which must not be modified when the other contributions to a are added
+    for order in (0, 1):
+        a = rTensor([[1., 2.], [3., 4.]])
+        b = a.T
+        g = b * 2 + a * 3 if order else a * 3 + b * 2
+        g._grad_val = np.ones((2, 2))
+        Tape(g).backward()
+        assert (b._grad_val == 2).all()
+        assert (a._grad_val == 5).all()
+
+
+def test_accumulate_fallback():
+    tape = Tape(rScalar(1))
+    grad = np.zeros(2)
+    # Contributions that broadcast to a larger shape, or that are not
+    # arrays, return a new adjoint instead of writing into grad
+    wider = tape._accumulate(grad, np.ones((3, 2)), 1)
+    assert wider.shape == (3, 2) and (grad == 0).all()
+    dual = tape._accumulate(grad, Dual(1.0, 2.0), 3.0)
+    assert isinstance(dual, Dual) and (grad == 0).all()
@@ -0,0 +1,204 @@
+import numpy as np
+from Dotua.autodiff import AutoDiff as ad
+from Dotua.rautodiff import rAutoDiff
+from Dotua.operator import Operator as op
+from Dotua.roperator import rOperator as rop
+from Dotua.trace import (trace, optimize, outputs, evaluate, pullback,
+                         hessian_sparsity, jacobian_sparsity, Program,
+                         CompiledFunction, Tracer)
+
+
+def test_trace():
+    program = trace(lambda x, y: op.sin(x * y) + 2, 2)
+    assert len(program) == 5
+    assert program._output == 4
+    assert [name for name, _, _ in program._instructions] == \
+        ['mul', 'sin', 'add_c']
+
+    # Functions not depending on their inputs trace to a constant
+    program = trace(lambda x: 3, 1)
+    assert program._instructions == [('const', (), (3,))]
+    assert program._output == 1
+
+
+def test_compile():
+    def f(x, y):
+        return (op.sin(x * y) + x ** 2 / y - 3 * op.exp(-x) + 2 ** y -
+                (1 - x) + op.log(y, 2) - x / 4 + 1 / y + y ** x - (y - x))
+
+    def rf(x, y):
+        return (rop.sin(x * y) + x ** 2 / y - 3 * rop.exp(-x) + 2 ** y -
+                (1 - x) + rop.log(y, 2) - x / 4 + 1 / y + y ** x - (y - x))
+
+    rad = rAutoDiff()
+    forward = ad.compile(f, 2)
+    reverse = rad.compile(rf, 2)
+
+    for vals in ([0.5, 1.5], [2.0, 3.0]):
+        x, y = ad.create_scalar(vals)
+        expected = f(x, y)
+        for compiled in (forward, reverse):
+            value, gradient = compiled(*vals)
+            assert np.isclose(value, expected.eval())
+            assert np.allclose(gradient, [expected.partial(x),
+                                          expected.partial(y)])
+        x, y = rad.create_rscalar(vals)
+        assert np.allclose(reverse(*vals)[1], rad.gradient(rf(x, y), [x, y]))
+
+    # Array inputs are evaluated as a batch of points
+    xs, ys = np.array([0.5, 2.0]), np.array([1.5, 3.0])
+    for compiled in (forward, reverse):
+        value, gradient = compiled(xs, ys)
+        assert value.shape == (2,)
+        assert gradient.shape == (2, 2)
+        assert np.allclose(gradient[:, 1], compiled(2.0, 3.0)[1])
+
+    # Inputs the output does not depend on have a zero partial derivative
+    for mode in ('forward', 'reverse'):
+        compiled = CompiledFunction(trace(lambda x, y, z: x * y + 1, 3), mode)
+        value, gradient = compiled(2, 3, 4)
+        assert value == 7
+        assert np.allclose(gradient, [3, 2, 0])
+
+        # Unused intermediate values do not contribute
+        def g(x, y):
+            x - y - 2
+            return 1 + x * y - 0.5
+
+        value, gradient = CompiledFunction(trace(g, 2), mode)(2, 3)
+        assert value == 6.5
+        assert np.allclose(gradient, [3, 2])
+
+        compiled = CompiledFunction(trace(lambda x: 5, 1), mode)
+        value, gradient = compiled(2)
+        assert value == 5
+        assert np.allclose(gradient, [0])
+
+
+def test_compile_ndarray_constants():
+    c = np.array([1.0, 2.0])
+    compiled = ad.compile(lambda x: c * x + c, 1)
+    value, gradient = compiled(3.0)
+    assert np.allclose(value, [4, 8])
+    assert np.allclose(gradient, [[1, 2]])
+    assert isinstance(c * Tracer(trace(lambda x: x, 1), 0), Tracer)
+
+
+def test_compile_errors():
+    compiled = ad.compile(lambda x, y: x * y, 2)
+    exception_raised = False
+    try:
+        compiled(1)
+    except TypeError:
+        exception_raised = True
+    assert exception_raised
+    exception_raised = False
+    try:
+        CompiledFunction(trace(lambda x: x, 1), 'sideways')
+    except ValueError:
+        exception_raised = True
+    assert exception_raised
+
+    # Compiled functions have a single output
+    for compile in (ad.compile, rAutoDiff().compile):
+        exception_raised = False
+        try:
+            compile(lambda x, y: [x * y, x + y], 2)
+        except ValueError:
+            exception_raised = True
+        assert exception_raised
+
+    # Tracers cannot be compared, so fn cannot branch on its arguments
+    exception_raised = False
+    try:
+        ad.compile(lambda x: x if x > 0 else -x, 1)
+    except TypeError:
+        exception_raised = True
+    assert exception_raised
+
+
+def test_optimize():
+    def f(x, y):
+        a = op.exp(-x) * y
+        b = y * op.exp(-x)
+        return (a + b) * 1 + 0 - x / 1 + x ** 1
+
+    program = optimize(trace(f, 2))
+    assert [name for name, _, _ in program._instructions] == \
+        ['neg', 'exp', 'mul', 'add', 'sub', 'add']
+    for mode in ('forward', 'reverse'):
+        compiled = CompiledFunction(program, mode)
+        expected = CompiledFunction(trace(f, 2), mode)
+        for vals in ([0.5, 1.5], [np.array([1.0, 2.0]), np.array([3.0, 4.0])]):
+            value, gradient = compiled(*vals)
+            assert np.allclose(value, expected(*vals)[0])
+            assert np.allclose(gradient, expected(*vals)[1])
+
+    # Unused instructions are removed and identities may reduce the output
+    # to an input
+    program = optimize(trace(lambda x, y: (op.sin(y), x * 1)[1], 2))
+    assert program._instructions == []
+    assert program._output == 0
+    assert np.allclose(CompiledFunction(program, 'reverse')(2, 3)[1], [1, 0])
+
+    # Array constants are only merged when they are the same object and are
+    # never treated as identities
+    c = np.ones(2)
+    program = optimize(trace(lambda x: x * c + x * c + x * np.ones(2), 1))
+    assert [name for name, _, _ in program._instructions] == \
+        ['mul_c', 'add', 'mul_c', 'add']
+
+
+def test_constant_folding():
+    program = Program(2)
+    x, y = Tracer(program, 0), Tracer(program, 1)
+    two = program.record('const', (), (2.0,))
+    three = program.record('const', (), (3.0,))
+    six = two * three
+    out = (x - six) * (six - y) + x / two + two / y + x ** two + two ** y
+    out = out + (-two) * 1
+    program._output = out._index
+
+    optimized = optimize(program)
+    names = [name for name, _, _ in optimized._instructions]
+    assert names.count('const') == 0
+    assert optimized._instructions[0] == ('add_c', (0,), (-6.0,))
+    for mode in ('forward', 'reverse'):
+        value, gradient = CompiledFunction(optimized, mode)(1.5, 2.5)
+        expected = CompiledFunction(program, mode)(1.5, 2.5)
+        assert np.isclose(value, expected[0])
+        assert np.allclose(gradient, expected[1])
+
+
+def test_hessian_sparsity():
+    def f(x, y, z, w):
+        return x * y + op.sin(z) + w / z + 3 * x - w
+
+    pattern = hessian_sparsity(optimize(trace(f, 4)))
+    assert pattern == [{1}, {0}, {2, 3}, {2}]
+
+
+def test_vector_programs():
+    def f(x, y, z):
+        return [x * y, op.sin(z) + x, 2.0, y * 1]
+
+    program = optimize(trace(f, 3))
+    assert len(outputs(program)) == 4
+    assert outputs(program)[3] == 1
+    assert jacobian_sparsity(program) == [{0, 1}, {0, 2}, set(), {1}]
+    assert outputs(optimize(trace(lambda x: x * 4.0, 1))) == [1]
+
+    values = evaluate(program, [2.0, 3.0, 0.5])
+    assert [values[o] for o in outputs(program)] == \
+        [6.0, np.sin(0.5) + 2.0, 2.0, 3.0]
+
+    # Adjoints of the inputs for the seeded outputs; unseeded or constant
+    # outputs contribute nothing
+    adjoints = pullback(program, values, [(outputs(program)[0], 1.0),
+                                          (outputs(program)[1], 2.0),
+                                          (outputs(program)[3], 1.0),
+                                          (outputs(program)[3], 1.0)])
+    assert np.allclose(adjoints, [3.0 + 2.0, 2.0 + 2.0, 2 * np.cos(0.5)])
+    adjoints = pullback(program, values, [(outputs(program)[2], 1.0)])
+    assert adjoints == [None, None, None]
+
@@ -1,5 +1,7 @@
 import numpy as np
+import scipy.sparse as sp
 from Dotua.nodes.vector import Vector
+from Dotua.nodes.jacobian import CSRJacobian, MatrixJacobian
 
 '''
 Test for vector variable basic functions and the jacobian of vector function to vector
@@ -113,6 +115,15 @@ def test_neg():
 def test_repr():
 	print(x)
 
+def test_lazy_scalars():
+	v = Vector([1, 2, 3])
+	w = v * 2 + 1
+	assert(w._scalars is None)
+	assert(v[0] is v[0])
+	f = v[0] * v[2]
+	assert(f.partial(v[0]) == 3)
+	assert(f.partial(v[1]) == 0)
+
 # Define a vector function and get a jacobian of the vector function to vector
 
 #f = [f_1, f_2, f_3, f_4, f_5]
@@ -124,3 +135,77 @@ def test_repr():
 #def test_jacobian():
 	#assert(jacobian == [[1,1], [1,-2], [-3,0], [-2,-3.5], [1,1]])
 
+
+def test_diagonal_jacobian():
+	v = Vector(np.linspace(1, 2, 10 ** 5))
+	w = Vector(np.linspace(2, 3, 10 ** 5))
+	f = v * w + v / 2
+	assert(np.allclose(f.getDerivative(v), w._val + 0.5))
+	assert(np.allclose(f.getDerivative(w), v._val))
+
+def test_shared_subexpression():
+	v = Vector([1, 2])
+	f = v * v
+	g = f * 3
+	h = -f
+	assert(f.getDerivative(v).tolist() == [2, 4])
+	assert(g.getDerivative(v).tolist() == [6, 12])
+	assert(h.getDerivative(v).tolist() == [-2, -4])
+
+def test_slots():
+	v = Vector([1, 2])
+	assert(not hasattr(v + v, '__dict__'))
+	assert(v._dict is None)
+
+def test_reductions():
+	v = Vector([1., 2., 3.])
+	w = Vector([4., 5., 6.])
+	f = v.dot(w)
+	assert(f.eval() == [32.])
+	assert(f.getDerivative(v).tolist() == [4., 5., 6.])
+	assert(f.getDerivative(w).tolist() == [1., 2., 3.])
+	g = (v * v).dot(v)
+	assert(g.getDerivative(v).tolist() == [3., 12., 27.])
+	h = v.dot([1., 0., 2.])
+	assert(h.eval() == [7.] and h.getDerivative(v).tolist() == [1., 0., 2.])
+	s = (v * w).sum()
+	assert(s.eval() == [32.] and s.getDerivative(w).tolist() == [1., 2., 3.])
+	n = v.norm()
+	assert(np.allclose(n.eval(), np.sqrt(14)))
+	assert(np.allclose(n.getDerivative(v), v._val / np.sqrt(14)))
+
+def test_matmul():
+	v = Vector([1., 2., 3.])
+	w = Vector([4., 5., 6.])
+	A = np.arange(6.).reshape(2, 3)
+	f = A @ (v * v)
+	assert(f.eval() == [22., 64.])
+	assert(np.allclose(f._derivatives()[v], A * 2 * v._val))
+	g = v @ A.T + [[1., 0.], [0., 1.]] @ (A @ w)
+	assert(np.allclose(g._derivatives()[v], A))
+	assert(np.allclose(g._derivatives()[w], A))
+	assert((v @ w).eval() == [32.])
+	assert((v @ [1., 1., 1.]).eval() == [6.])
+	assert(([1., 1., 1.] @ v).eval() == [6.])
+	assert((np.ones(3) @ v).getDerivative(v).tolist() == [1., 1., 1.])
+
+
+def test_sparse_matmul():
+	v = Vector([1., 2., 3.])
+	w = Vector([4., 5., 6.])
+	A = np.arange(6.).reshape(2, 3)
+	for S in (sp.csr_matrix(A), sp.csr_array(A)):
+		f = S @ (v * v)
+		assert(np.allclose(f.eval(), [22., 64.]))
+		assert(isinstance(f._derivatives()[v], CSRJacobian))
+		assert(np.allclose(f._derivatives()[v], A * 2 * v._val))
+		g = S.T @ f
+		assert(isinstance(g._derivatives()[v], CSRJacobian))
+		assert(np.allclose(g._derivatives()[v], A.T @ A * 2 * v._val))
+		h = v @ S.T + S @ w
+		assert(isinstance(h._derivatives()[v], CSRJacobian))
+		assert(np.allclose(h._derivatives()[v], A))
+		assert(np.allclose(h._derivatives()[w], A))
+		k = S @ (np.ones((3, 3)) @ v)
+		assert(isinstance(k._derivatives()[v], MatrixJacobian))
+		assert(np.allclose(k._derivatives()[v], A @ np.ones((3, 3))))
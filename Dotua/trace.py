@@ -0,0 +1,617 @@
+import numpy as np
+from Dotua.elementary import ELEMENTARY
+
+
+# Rules of the arithmetic instructions as (value, derivative) pairs.  Both
+# functions take the values of the node arguments of an instruction followed
+# by its constants; derivative returns the tuple of partial derivatives with
+# respect to the node arguments.  The '_c' instructions combine a node with a
+# constant captured at trace time, mirroring the constant branches of the
+# rScalar operators.
+ARITHMETIC = {
+    'const': (lambda c: c, lambda c: ()),
+    'add': (lambda a, b: a + b, lambda a, b: (1, 1)),
+    'add_c': (lambda a, c: a + c, lambda a, c: (1,)),
+    'sub': (lambda a, b: a - b, lambda a, b: (1, -1)),
+    'rsub_c': (lambda a, c: c - a, lambda a, c: (-1,)),
+    'mul': (lambda a, b: a * b, lambda a, b: (b, a)),
+    'mul_c': (lambda a, c: a * c, lambda a, c: (c,)),
+    'div': (lambda a, b: a / b, lambda a, b: (1 / b, -a / (b ** 2))),
+    'div_c': (lambda a, c: a / c, lambda a, c: (1 / c,)),
+    'rdiv_c': (lambda a, c: c / a, lambda a, c: (-c / (a ** 2),)),
+    'pow': (lambda a, b: a ** b,
+            lambda a, b: (b * a ** (b - 1), a ** b * np.log(a))),
+    'pow_c': (lambda a, c: a ** c, lambda a, c: (c * a ** (c - 1),)),
+    'rpow_c': (lambda a, c: c ** a, lambda a, c: (c ** a * np.log(c),)),
+    'neg': (lambda a: -a, lambda a: (-1,)),
+}
+
+
+def _partials(derivative):
+    """Wrap the derivative of an elementary function to return a tuple."""
+    return lambda x, *args: (derivative(x, *args),)
+
+
+# Rules of every instruction, keyed by instruction name
+RULES = dict(ARITHMETIC)
+RULES.update({name: (value, _partials(derivative))
+              for name, (value, derivative) in ELEMENTARY.items()})
+
+# Names of the elementary functions, keyed by their (value, derivative) pair
+_NAMES = {pair: name for name, pair in ELEMENTARY.items()}
+
+
+class Tracer():
+    """
+    Placeholder node recording the operations applied to it in a Program.
+
+    Tracer objects stand in for the inputs of a function while it is traced.
+    Every arithmetic operator and every Operator or rOperator function applied
+    to a Tracer appends one instruction to the Program of the Tracer and
+    returns a new Tracer standing for the result, so running a function once
+    on Tracers records its whole computation as a flat instruction list.
+    """
+
+    __slots__ = ('_program', '_index')
+
+    # Make NumPy defer to the reflected operators of Tracer instead of
+    # broadcasting over it as an object
+    __array_ufunc__ = None
+
+    def __init__(self, program, index):
+        """
+        Return a Tracer standing for the value at index in program.
+
+        INPUTS
+        =======
+        program: Program instance recording the traced function
+        index: integer, the position of the value in the program
+        """
+        self._program = program
+        self._index = index
+
+    def _record(self, name, other, const_name):
+        """
+        Record the binary instruction name of self and other, or the
+        instruction const_name of self and the constant other.
+        """
+        try:
+            return self._program.record(name, (self._index, other._index))
+        except AttributeError:
+            return self._program.record(const_name, (self._index,), (other,))
+
+    def __add__(self, other):
+        return self._record('add', other, 'add_c')
+
+    def __radd__(self, other):
+        return self + other
+
+    def __sub__(self, other):
+        try:
+            return self._program.record('sub', (self._index, other._index))
+        except AttributeError:
+            return self._program.record('add_c', (self._index,), (-other,))
+
+    def __rsub__(self, other):
+        return self._program.record('rsub_c', (self._index,), (other,))
+
+    def __mul__(self, other):
+        return self._record('mul', other, 'mul_c')
+
+    def __rmul__(self, other):
+        return self * other
+
+    def __truediv__(self, other):
+        return self._record('div', other, 'div_c')
+
+    def __rtruediv__(self, other):
+        return self._program.record('rdiv_c', (self._index,), (other,))
+
+    def __pow__(self, other):
+        return self._record('pow', other, 'pow_c')
+
+    def __rpow__(self, other):
+        return self._program.record('rpow_c', (self._index,), (other,))
+
+    def __neg__(self):
+        return self._program.record('neg', (self._index,))
+
+
+def trace_elementary(x, value, derivative, *args):
+    """
+    Record the elementary function (value, derivative) applied to the
+    Tracer x; registered with Operator and rOperator for Tracer objects.
+    """
+    return x._program.record(_NAMES[(value, derivative)], (x._index,), args)
+
+
+class Program():
+    """
+    Flat instruction list recorded by tracing a function.
+
+    The first n_inputs values of a Program are its inputs.  Every following
+    value is produced by one instruction (name, args, consts) where name
+    selects a rule in RULES, args holds the indices of the values it operates
+    on and consts holds the constants captured when it was recorded.  The
+    instructions are stored in the order they were recorded, which is a
+    topological order of the computation.
+    """
+
+    def __init__(self, n_inputs):
+        """
+        Return an empty Program with n_inputs inputs.
+
+        INPUTS
+        =======
+        n_inputs: integer, the number of inputs of the traced function
+        """
+        self._n_inputs = n_inputs
+        self._instructions = []
+        self._output = None
+
+    def __len__(self):
+        """Return the number of values (inputs included) of the program."""
+        return self._n_inputs + len(self._instructions)
+
+    def record(self, name, args, consts=()):
+        """
+        Append the instruction (name, args, consts) to the program.
+
+        RETURNS
+        =======
+        Tracer standing for the value computed by the new instruction
+        """
+        self._instructions.append((name, args, consts))
+        return Tracer(self, len(self) - 1)
+
+
+def _output_index(program, output):
+    """
+    Return the index in program of the value output returned by the traced
+    function, recording it as a constant if it is not a value of program.
+    """
+    if not isinstance(output, Tracer) or output._program is not program:
+        output = program.record('const', (), (output,))
+    return output._index
+
+
+def trace(fn, n_inputs):
+    """
+    Return the Program recorded by calling fn on n_inputs Tracers.
+
+    INPUTS
+    =======
+    fn: function of n_inputs positional arguments composed of arithmetic
+        operators and Operator or rOperator functions
+    n_inputs: integer, the number of arguments of fn
+
+    RETURNS
+    =======
+    Program instance whose output is the value returned by fn
+
+    NOTES
+    ======
+    fn is called exactly once.  Tracer defines no comparison operators, so
+    fn cannot branch on the values of its arguments: a comparison such as
+    x > 0 raises a TypeError.  If fn returns a list
+    or tuple of values, the output of the program is the list of their
+    indices; otherwise it is the index of the single value returned.
+    """
+    program = Program(n_inputs)
+    output = fn(*[Tracer(program, i) for i in range(n_inputs)])
+    if isinstance(output, (list, tuple)):
+        program._output = [_output_index(program, o) for o in output]
+    else:
+        program._output = _output_index(program, output)
+    return program
+
+
+def outputs(program):
+    """Return the list of the indices of the outputs of program."""
+    if isinstance(program._output, list):
+        return program._output
+    return [program._output]
+
+
+# Instructions whose value does not depend on the order of their arguments
+_COMMUTATIVE = ('add', 'mul')
+
+# Constant forms of the binary instructions, keyed by instruction name and
+# position of the constant argument: the name of the equivalent instruction
+# taking the other argument alone, and the function turning the constant
+# into the constant it captures
+_CONSTANT_FORMS = {
+    ('add', 0): ('add_c', lambda c: c),
+    ('add', 1): ('add_c', lambda c: c),
+    ('sub', 0): ('rsub_c', lambda c: c),
+    ('sub', 1): ('add_c', lambda c: -c),
+    ('mul', 0): ('mul_c', lambda c: c),
+    ('mul', 1): ('mul_c', lambda c: c),
+    ('div', 0): ('rdiv_c', lambda c: c),
+    ('div', 1): ('div_c', lambda c: c),
+    ('pow', 0): ('rpow_c', lambda c: c),
+    ('pow', 1): ('pow_c', lambda c: c),
+}
+
+# Constant instructions returning their argument unchanged when their
+# constant equals the identity listed here
+_IDENTITIES = {'add_c': 0, 'mul_c': 1, 'div_c': 1, 'pow_c': 1}
+
+
+def _key(name, args, consts):
+    """
+    Return a hashable key identifying the instruction (name, args, consts);
+    unhashable constants, such as NumPy arrays, are identified by identity.
+    """
+    try:
+        hash(consts)
+        return name, args, consts
+    except TypeError:
+        return name, args, tuple(('id', id(c)) for c in consts)
+
+
+def optimize(program):
+    """
+    Return an optimized Program computing the same output as program.
+
+    INPUTS
+    =======
+    program: Program instance, as returned by trace
+
+    RETURNS
+    =======
+    Program instance
+
+    NOTES
+    ======
+    A single pass over the instructions folds instructions whose arguments
+    are all constants into constants, rewrites binary instructions with one
+    constant argument into their constant forms, drops additions of 0 and
+    multiplications, divisions and powers by 1, and merges instructions
+    identical to an earlier one (common subexpression elimination, with the
+    arguments of add and mul sorted first).  Instructions none of the outputs
+    depend on are then removed.  The inputs of the program are left
+    unchanged.
+    """
+    n_inputs = program._n_inputs
+    instructions = []
+    # index[i] is the index in instructions of value i of program
+    index = list(range(n_inputs))
+    constants = {}
+    seen = {}
+    for name, args, consts in program._instructions:
+        args = tuple(index[a] for a in args)
+        folded = [a for a in args if a in constants]
+        if folded and len(folded) == len(args):
+            value = RULES[name][0](*[constants[a] for a in args] + list(consts))
+            name, args, consts = 'const', (), (value,)
+        elif folded:
+            pos = args.index(folded[0])
+            name, capture = _CONSTANT_FORMS[(name, pos)]
+            consts = (capture(constants[args[pos]]),)
+            args = (args[1 - pos],)
+        if (name in _IDENTITIES and np.ndim(consts[0]) == 0 and
+                consts[0] == _IDENTITIES[name]):
+            index.append(args[0])
+            continue
+        if name in _COMMUTATIVE:
+            args = tuple(sorted(args))
+        key = _key(name, args, consts)
+        if key not in seen:
+            seen[key] = n_inputs + len(instructions)
+            instructions.append((name, args, consts))
+            if name == 'const':
+                constants[seen[key]] = consts[0]
+        index.append(seen[key])
+
+    # Keep only the instructions the outputs depend on
+    output = [index[o] for o in outputs(program)]
+    live = set(output)
+    for i in range(n_inputs + len(instructions) - 1, n_inputs - 1, -1):
+        if i in live:
+            live.update(instructions[i - n_inputs][1])
+    optimized = Program(n_inputs)
+    index = list(range(n_inputs))
+    for i, (name, args, consts) in enumerate(instructions, n_inputs):
+        index.append(len(optimized))
+        if i in live:
+            optimized.record(name, tuple(index[a] for a in args), consts)
+    output = [index[o] for o in output]
+    if isinstance(program._output, list):
+        optimized._output = output
+    else:
+        optimized._output = output[0]
+    return optimized
+
+
+# Instructions whose value is linear in the values of their node arguments
+_LINEAR = ('const', 'add', 'add_c', 'sub', 'rsub_c', 'mul_c', 'div_c', 'neg')
+
+
+def hessian_sparsity(program):
+    """
+    Return the structural sparsity pattern of the Hessian of program.
+
+    INPUTS
+    =======
+    program: Program instance, as returned by trace or optimize
+
+    RETURNS
+    =======
+    list holding, for each input i of program, the set of inputs j such that
+    the second derivative of the output with respect to inputs i and j may be
+    nonzero
+
+    NOTES
+    ======
+    The inputs each value depends on are propagated through the program.
+    Linear instructions create no second derivatives; mul couples the inputs
+    of its two arguments, div additionally couples the inputs of its
+    denominator with each other, and every other instruction couples all the
+    inputs of its arguments.  The pattern is symmetric and may overestimate
+    the true sparsity, for instance when terms cancel, but never misses a
+    nonzero entry.
+    """
+    n_inputs = program._n_inputs
+    deps = [set([i]) for i in range(n_inputs)]
+    pattern = [set() for _ in range(n_inputs)]
+
+    def couple(a, b):
+        for i in a:
+            pattern[i].update(b)
+        for i in b:
+            pattern[i].update(a)
+
+    for name, args, consts in program._instructions:
+        arg_deps = [deps[a] for a in args]
+        deps.append(set().union(*arg_deps))
+        if name in _LINEAR:
+            continue
+        if name == 'mul':
+            couple(arg_deps[0], arg_deps[1])
+        elif name == 'div':
+            couple(arg_deps[0], arg_deps[1])
+            couple(arg_deps[1], arg_deps[1])
+        else:
+            couple(deps[-1], deps[-1])
+    return pattern
+
+
+def jacobian_sparsity(program):
+    """
+    Return the structural sparsity pattern of the Jacobian of program.
+
+    INPUTS
+    =======
+    program: Program instance, as returned by trace or optimize
+
+    RETURNS
+    =======
+    list holding, for each output of program, the set of inputs on which it
+    may depend
+    """
+    n_inputs = program._n_inputs
+    deps = [set([i]) for i in range(n_inputs)]
+    for name, args, consts in program._instructions:
+        deps.append(set().union(*[deps[a] for a in args]))
+    return [deps[o] for o in outputs(program)]
+
+
+def evaluate(program, inputs):
+    """
+    Return the list of all the values of program evaluated at inputs.
+
+    INPUTS
+    =======
+    program: Program instance
+    inputs: list of numbers, NumPy arrays or Dual numbers, one per input
+
+    RETURNS
+    =======
+    list of the values of program, inputs first
+    """
+    values = list(inputs)
+    for name, args, consts in program._instructions:
+        values.append(RULES[name][0](*[values[a] for a in args], *consts))
+    return values
+
+
+def pullback(program, values, seeds):
+    """
+    Return the adjoints of the inputs of program in one reverse sweep.
+
+    INPUTS
+    =======
+    program: Program instance
+    values: list of the values of program, as returned by evaluate
+    seeds: list of (index, adjoint) pairs seeding the adjoints of values of
+           program, typically its outputs; adjoints may be NumPy arrays to
+           propagate several seeds at once
+
+    RETURNS
+    =======
+    list with the adjoint of each input of program, None for inputs that the
+    seeded values do not depend on
+    """
+    n_inputs = program._n_inputs
+    adjoints = [None] * len(values)
+    for index, seed in seeds:
+        if adjoints[index] is None:
+            adjoints[index] = seed
+        else:
+            adjoints[index] = adjoints[index] + seed
+    for i in range(len(values) - 1, n_inputs - 1, -1):
+        if adjoints[i] is None:
+            continue
+        name, args, consts = program._instructions[i - n_inputs]
+        if not args:
+            continue
+        ders = RULES[name][1](*[values[a] for a in args], *consts)
+        for a, der in zip(args, ders):
+            if adjoints[a] is None:
+                adjoints[a] = adjoints[i] * der
+            else:
+                adjoints[a] = adjoints[a] + adjoints[i] * der
+    return adjoints[:n_inputs]
+
+
+def _seed(value):
+    """Return the adjoint seed matching the shape of value."""
+    if np.ndim(value):
+        return np.ones(np.shape(value))
+    return 1.0
+
+
+class CompiledFunction():
+    """
+    Callable evaluating a traced function and its gradient.
+
+    A CompiledFunction turns the instruction list of a Program into the
+    source of a straight-line Python function, in which every instruction is
+    a single call of its rule on local variables, and compiles it once.
+    Evaluations therefore run on plain numbers or NumPy arrays without
+    allocating node objects or interpreting the instruction list.  In
+    'forward' mode the generated function propagates one tangent per input
+    alongside the values, restricted to the inputs each value depends on; in
+    'reverse' mode it computes the values and then obtains all adjoints in a
+    single reverse sweep.  Array inputs are evaluated elementwise, as a batch
+    of points.
+    """
+
+    def __init__(self, program, mode):
+        """
+        Return a CompiledFunction replaying program.
+
+        INPUTS
+        =======
+        program: Program instance, as returned by trace, with a single
+                 output
+        mode: string, 'forward' or 'reverse'
+        """
+        if mode not in ('forward', 'reverse'):
+            raise ValueError("Unknown differentiation mode '{}'.".format(mode))
+        if isinstance(program._output, list):
+            raise ValueError("Compiled functions must return a single value, "
+                             "not a list or tuple of values.")
+        self._program = program
+        self._mode = mode
+        self._namespace = {'_seed': _seed}
+        lines = self._values()
+        if mode == 'forward':
+            lines += self._tangents()
+        else:
+            lines += self._adjoints()
+        self._source = '\n'.join(lines) + '\n'
+        exec(self._source, self._namespace)
+        self._function = self._namespace['compiled']
+
+    def __call__(self, *inputs):
+        """
+        Return the value and gradient of the compiled function at inputs.
+
+        INPUTS
+        =======
+        inputs: one number or NumPy array per input of the function
+
+        RETURNS
+        =======
+        value: value of the function at inputs
+        gradient: NumPy array whose i-th entry is the partial derivative of
+                  the function with respect to its i-th input
+        """
+        n_inputs = self._program._n_inputs
+        if len(inputs) != n_inputs:
+            raise TypeError("Compiled function takes {} inputs but {} were "
+                            "given.".format(n_inputs, len(inputs)))
+        value, partials = self._function(*inputs)
+        gradient = np.zeros((n_inputs,) + np.shape(value))
+        for i, partial in enumerate(partials):
+            gradient[i] = partial
+        return value, gradient
+
+    def _call(self, i, args, consts):
+        """
+        Return the arguments, as source, of the rules of instruction i.
+        """
+        names = ['v{}'.format(a) for a in args]
+        for j, const in enumerate(consts):
+            name = 'c{}_{}'.format(i, j)
+            self._namespace[name] = const
+            names.append(name)
+        return ', '.join(names)
+
+    def _values(self):
+        """Return the source lines computing every value of the program."""
+        program = self._program
+        n_inputs = program._n_inputs
+        lines = ['def compiled({}):'.format(
+            ', '.join('v{}'.format(i) for i in range(n_inputs)))]
+        for i, (name, args, consts) in enumerate(program._instructions,
+                                                 n_inputs):
+            value, derivative = RULES[name]
+            self._namespace['f{}'.format(i)] = value
+            self._namespace['g{}'.format(i)] = derivative
+            lines.append('    v{} = f{}({})'.format(
+                i, i, self._call(i, args, consts)))
+        return lines
+
+    def _tangents(self):
+        """
+        Return the source lines propagating the tangents of the inputs and
+        returning the value and partial derivatives.
+        """
+        program = self._program
+        n_inputs = program._n_inputs
+        # deps[i] lists the inputs on which value i depends
+        deps = [[i] for i in range(n_inputs)]
+        lines = ['    t{0}_{0} = 1.0'.format(i) for i in range(n_inputs)]
+        for i, (name, args, consts) in enumerate(program._instructions,
+                                                 n_inputs):
+            inputs = sorted(set(k for a in args for k in deps[a]))
+            deps.append(inputs)
+            if not inputs:
+                continue
+            lines.append('    d = g{}({})'.format(
+                i, self._call(i, args, consts)))
+            for k in inputs:
+                terms = ['d[{}] * t{}_{}'.format(j, a, k)
+                         for j, a in enumerate(args) if k in deps[a]]
+                lines.append('    t{}_{} = {}'.format(i, k, ' + '.join(terms)))
+        output = program._output
+        partials = ['t{}_{}'.format(output, k) if k in deps[output] else '0.0'
+                    for k in range(n_inputs)]
+        lines.append('    return v{}, ({})'.format(
+            output, ''.join(p + ', ' for p in partials)))
+        return lines
+
+    def _adjoints(self):
+        """
+        Return the source lines of the reverse sweep accumulating the adjoints
+        of all values and returning the value and partial derivatives.
+        """
+        program = self._program
+        n_inputs = program._n_inputs
+        output = program._output
+        # Values whose adjoint has been assigned so far
+        assigned = set([output])
+        lines = ['    a{0} = _seed(v{0})'.format(output)]
+        for i in range(output, n_inputs - 1, -1):
+            if i not in assigned:
+                continue
+            name, args, consts = program._instructions[i - n_inputs]
+            if not args:
+                continue
+            lines.append('    d = g{}({})'.format(
+                i, self._call(i, args, consts)))
+            for j, a in enumerate(args):
+                if a in assigned:
+                    lines.append('    a{0} = a{0} + a{1} * d[{2}]'.format(
+                        a, i, j))
+                else:
+                    lines.append('    a{} = a{} * d[{}]'.format(a, i, j))
+                    assigned.add(a)
+        partials = ['a{}'.format(k) if k in assigned else '0.0'
+                    for k in range(n_inputs)]
+        lines.append('    return v{}, ({})'.format(
+            output, ''.join(p + ', ' for p in partials)))
+        return lines
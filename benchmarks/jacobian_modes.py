@@ -0,0 +1,76 @@
+"""
+Check that Dotua.jacobian selects the faster differentiation mode.
+
+Run from the root of the repository with
+
+    python -m benchmarks.jacobian_modes [n]
+
+For functions of n inputs with different Jacobian shapes and sparsity
+patterns, the Jacobian is computed in forward and in reverse mode and the
+best of several timings of each is reported next to the number of colors
+each mode needs and the mode selected by Dotua.derivatives.select_mode.  Tracing is included in every timing since
+Dotua.jacobian traces the function on each call.
+"""
+import sys
+import timeit
+import numpy as np
+from Dotua.coloring import column_coloring, transpose
+from Dotua.derivatives import jacobian, select_mode
+from Dotua.operator import Operator as op
+from Dotua.trace import trace, optimize, jacobian_sparsity
+
+
+def problems(n):
+    """Return (name, function, number of inputs) benchmark problems."""
+    def gradient(*x):
+        return sum(op.sin(x[i] * x[(i + 7) % n]) for i in range(n))
+
+    def curve(t):
+        return [op.exp(t * k / n) for k in range(n)]
+
+    def dense(*x):
+        s = sum(x)
+        return [op.sin(s * x[i]) for i in range(n)]
+
+    def banded(*u):
+        return ([u[0]] +
+                [u[i - 1] - 2 * u[i] + u[i + 1] + op.exp(u[i])
+                 for i in range(1, n - 1)] +
+                [u[-1]])
+
+    def arrow(*x):
+        s = sum(xi * xi for xi in x)
+        return [op.sin(xi) for xi in x] + [s]
+
+    return [('gradient (1 x n)', gradient, n),
+            ('curve (n x 1)', curve, 1),
+            ('dense (n x n)', dense, n),
+            ('banded (n x n)', banded, n),
+            ('arrow (n+1 x n)', arrow, n)]
+
+
+def best_time(fn, vals, mode, repeat=5):
+    """Return the best time of computing the Jacobian of fn in mode."""
+    return min(timeit.repeat(lambda: jacobian(fn, vals, mode),
+                             number=1, repeat=repeat))
+
+
+def main(n):
+    print('{:18s} {:>10s} {:>10s} {:>9s} {:>9s} {:>9s}'.format(
+        'problem', 'forward', 'reverse', 'colors', 'selected', 'fastest'))
+    for name, fn, n_inputs in problems(n):
+        vals = np.linspace(0.1, 1, n_inputs)
+        rows = jacobian_sparsity(optimize(trace(fn, n_inputs)))
+        selected, _ = select_mode(rows, n_inputs)
+        colors = '{}/{}'.format(
+            column_coloring(rows, n_inputs).max() + 1,
+            column_coloring(transpose(rows, n_inputs), len(rows)).max() + 1)
+        times = {mode: best_time(fn, vals, mode)
+                 for mode in ('forward', 'reverse')}
+        print('{:18s} {:9.4f}s {:9.4f}s {:>9s} {:>9s} {:>9s}'.format(
+            name, times['forward'], times['reverse'], colors, selected,
+            min(times, key=times.get)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
@@ -0,0 +1,111 @@
+"""
+Measure the memory used per node by the Dotua node classes.
+
+Run from the root of the repository with
+
+    python -m benchmarks.node_memory [n_nodes]
+
+For every node class, n_nodes nodes are created and kept alive while
+tracemalloc records the memory allocated for them.  The values and
+derivatives are shared between all nodes so that the reported figure is the
+overhead of the node objects themselves.  Each figure is reported next to
+that of an unslotted reference class setting the same attributes in an
+instance __dict__, the layout of the node classes before they declared
+__slots__.
+"""
+import sys
+import tracemalloc
+import numpy as np
+from Dotua.nodes.scalar import Scalar
+from Dotua.nodes.rscalar import rScalar
+from Dotua.nodes.vector import Vector
+from Dotua.nodes.rvector import rVector
+from Dotua.nodes.jacobian import DiagonalJacobian
+
+
+class DictScalar():
+    """Scalar attributes stored in an instance __dict__."""
+
+    def __init__(self, val, der=None):
+        self._val = val
+        self._jacobian = der
+
+
+class DictrScalar():
+    """rScalar attributes stored in an instance __dict__."""
+
+    def __init__(self, val):
+        self._val = val
+        self._children = ()
+        self._grad_val = 0
+        self._gen = 0
+
+    def __mul__(self, other):
+        new_child = DictrScalar(self._val)
+        new_child._val = self._val * other._val
+        new_child._children = ((self, other._val), (other, self._val))
+        return new_child
+
+
+class DictVector():
+    """Vector attributes stored in an instance __dict__."""
+
+    def __init__(self, val, der = 1):
+        self._val = np.array(val)
+        self._jacobian = DiagonalJacobian(der * np.ones(len(self._val)))
+        self._scalars = None
+        self._dict = None
+
+
+class DictrVector():
+    """rVector attributes stored in an instance __dict__."""
+
+    def __init__(self, vals):
+        self._val = np.asarray(vals)
+        self._children = ()
+        self._grad_val = 0
+        self._gen = 0
+        self._rscalars = None
+
+
+def bytes_per_node(factory, n_nodes):
+    """Return the average number of bytes allocated by factory()."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [factory() for _ in range(n_nodes)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Do not count the list holding the nodes
+    return (after - before - sys.getsizeof(nodes)) / n_nodes
+
+
+def main(n_nodes):
+    val = 1.5
+    vals = np.ones(4)
+    x = Scalar(val)
+    x.init_jacobian([x])
+    jacobian = x._jacobian
+    a, b = rScalar(val), rScalar(val)
+    c, d = DictrScalar(val), DictrScalar(val)
+    factories = [
+        ('Scalar', lambda: Scalar(val, jacobian),
+         lambda: DictScalar(val, jacobian)),
+        ('rScalar', lambda: rScalar(val), lambda: DictrScalar(val)),
+        ('a * b', lambda: a * b, lambda: c * d),
+        ('Vector', lambda: Vector(vals), lambda: DictVector(vals)),
+        ('rVector', lambda: rVector(vals), lambda: DictrVector(vals)),
+    ]
+    # 'a * b' is an rScalar graph node including its recorded children.  The
+    # arrays allocated by Vector and rVector are included for those classes,
+    # so their figures are dominated by NumPy rather than by the node.
+    print('{:8s} {:>10s} {:>10s} {:>8s}'.format(
+        'node', '__dict__', '__slots__', 'saved'))
+    for name, slotted, unslotted in factories:
+        after = bytes_per_node(slotted, n_nodes)
+        before = bytes_per_node(unslotted, n_nodes)
+        print('{:8s} {:10.1f} {:10.1f} {:7.1f}%'.format(
+            name, before, after, 100 * (before - after) / before))
+    print('(bytes/node)')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -1,6 +1,7 @@
 from Dotua.rautodiff import rAutoDiff as rad
 from Dotua.roperator import rOperator as op
 import random
+import numpy as np
 
 ad = rad()
 
@@ -52,17 +53,19 @@ class NeuralNetwork():
 			o = 1/(1+op.exp(-o))
 			error = error + (o - self.output[i]) ** 2
 
+		# To compute the derivatives of the error summed over the minibatch with respect to all weights in a single backward pass
+		d_tooutput = [ad.gradient(error, weights, summed=True) for weights in self.weights_tooutput]
+		d_tohidden = [ad.gradient(error, weights, summed=True) for weights in self.weights_tohidden]
+
 		# To update weights from hidden layer to output layer
 		for i in range(len(self.weights_tooutput)):
 			for j in range(len(self.weights_tooutput[i])):
-				d = ad.partial(error, self.weights_tooutput[i][j])
-				self.weights_tooutput[i][j] = self.weights_tooutput[i][j] - d * self.learning_rate
+				self.weights_tooutput[i][j] = self.weights_tooutput[i][j] - d_tooutput[i][j] * self.learning_rate
 
 		# To update weights from input layer to hidden layer
 		for i in range(len(self.weights_tohidden)):
-			for j in range(len(self.weights_tooutput[i])):
-				d = ad.partial(error, self.weights_tohidden[i][j])
-				self.weights_tohidden[i][j] = self.weights_tohidden[i][j] - d * self.learning_rate
+			for j in range(len(self.weights_tohidden[i])):
+				self.weights_tohidden[i][j] = self.weights_tohidden[i][j] - d_tohidden[i][j] * self.learning_rate
 
 	def predict(self, input_vals, output_vals):
 		self.input_vals = input_vals
@@ -86,14 +89,17 @@ class NeuralNetwork():
 				o = o + self.weights_tooutput[i][j] * self.hidden_layer[j]
 			o = o + self.hidden_bias
 			o = 1/(1+op.exp(-o))
-			output_layer.append(o.val)
+			output_layer.append(o.eval())
 			error = error + (o - self.output[i]) ** 2
 		error = error / len(self.output)
-		return (output_layer, error.val)
+		return (output_layer, error.eval())
 
-nn = NeuralNetwork([0.05,0.1],0.35,0.6,2,[0.01,0.09])
+# A minibatch of two samples: each input and output neuron holds one value per sample
+inputs = [np.array([0.05, 0.1]), np.array([0.1, 0.2])]
+outputs = [np.array([0.01, 0.02]), np.array([0.09, 0.1])]
+nn = NeuralNetwork(inputs,0.35,0.6,2,outputs)
 for i in range(100):
-	nn.train([0.05,0.1],[0.01,0.09])
-output, e = nn.predict([0.05,0.1],[0.01,0.09])
+	nn.train(inputs, outputs)
+output, e = nn.predict(inputs, outputs)
 print('Final prediction given by the Neural Network is ', output)
 print('The mean squared error is ', e)
\ No newline at end of file
@@ -1,3 +1,6 @@
+from Dotua.solvers import newton
+
+
 def NewtonsMethod(func, x0, tol=1e-15, maxiters=1000):
     '''
     Computes the roots of func through iterative guesses until change is below tolerance.
@@ -7,32 +10,12 @@ def NewtonsMethod(func, x0, tol=1e-15, maxiters=1000):
 
     func must be composed of 'AutoDiff.Operator' operations and AutoDiff.Scalar structures.
 
+    The iteration itself is carried out by Dotua.solvers.newton, which
+    obtains the value and the derivative of func from a single evaluation
+    per step.
+
     Example usage:
     '''
 
-    xn = x0
-    steps = []
-
-    for i in range(maxiters):
-
-        # Calculate y at this step.
-        y = func(xn)._val
-
-        # Calculate derivative at this step
-        dy_dx = list(func(xn)._jacobian.values())[0]
-
-        # If y reaches tolerance, stop
-        if abs(y) < tol:
-            return xn._val, steps
-            break
-
-        else:
-            steps.append((xn._val, y))
-            # Compute Newton Step
-            x_next = y / dy_dx
-
-            # Update X
-            xn = xn - x_next
-
-
-    return xn._val, steps
+    result = newton(func, x0._val, tol=tol, maxiters=maxiters)
+    return result.x, result.steps